@@ -2,6 +2,7 @@ import streamlit as st
 import time
 import os
 import asyncio
+from uuid import uuid4
 from nodes import InterviewerNode, PlannerNode, ResearcherNode, ContentWriterNode, DocGeneratorNode
 from utils.app_config import AppConfig
 from rag_agent import MedicalRAG
@@ -29,7 +30,9 @@ if "shared" not in st.session_state:
             "research_data": [],
             "doc_sections": [],
             "rag_agent": rag_agent,
-            "web_search_agent": web_search_agent
+            "web_search_agent": web_search_agent,
+            # Scopes this session's research results in the shared vector store
+            "session_id": uuid4().hex
         }
 
 # --- STAGE 1: INTERVIEW ---
@@ -154,13 +157,40 @@ elif st.session_state.stage == "executing":
 
         # 2. Write
         status_text.text("Đang soạn thảo nội dung (Retrieval & Content Writing)...")
+
+        # One placeholder per section, filled incrementally as tokens stream in
+        blueprint = st.session_state.shared.get("blueprint", [])
+        section_placeholders = []
+        for i, item in enumerate(blueprint):
+            with st.expander(f"{i+1}. {item.get('title')}", expanded=True):
+                section_placeholders.append(st.empty())
+        sections_done = {"count": 0}
+
+        def on_writer_event(event):
+            placeholder = section_placeholders[event["index"]]
+            if event["type"] == "section_delta":
+                placeholder.code(event["text"], language="yaml")
+            elif event["type"] == "section_done":
+                with placeholder.container():
+                    for block in event["section"].get('body', []):
+                        if block.get('heading'):
+                            st.write(f"**{block.get('heading')}**")
+                        if block.get('content'):
+                            st.write(block.get('content'))
+                sections_done["count"] += 1
+                progress_bar.progress(30 + int(30 * sections_done["count"] / max(len(blueprint), 1)))
+
+        st.session_state.shared["event_sink"] = on_writer_event
         writer = ContentWriterNode()
         # Use asyncio.run for async node in synchronous Streamlit app
         try:
-            loop = asyncio.get_running_loop()
-            loop.run_until_complete(writer.run_async(st.session_state.shared))
-        except RuntimeError:
-            asyncio.run(writer.run_async(st.session_state.shared))
+            try:
+                loop = asyncio.get_running_loop()
+                loop.run_until_complete(writer.run_async(st.session_state.shared))
+            except RuntimeError:
+                asyncio.run(writer.run_async(st.session_state.shared))
+        finally:
+            st.session_state.shared.pop("event_sink", None)
         progress_bar.progress(60)
 
         # 3. Doc Generation
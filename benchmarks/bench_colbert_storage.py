@@ -0,0 +1,182 @@
+"""
+Benchmark: measured memory and disk per chunk for each ColBERT storage mode.
+
+Ingests a synthetic corpus (random ColBERT token matrices, small dense/sparse
+vectors) through VectorStore.create_vectorstore_batch, once per colbert_storage
+mode ("float32", "int8", "binary"), and reports what was actually used:
+
+- Server mode (--url http://localhost:6333): RAM and disk usage summed over the
+  collection's segments from the Qdrant telemetry endpoint. Optimization is
+  forced after upload and awaited, so the quantized copies actually exist.
+- Local mode (default): every mode runs in a fresh subprocess against an on-disk
+  store in a temp dir. It reports the growth of the process RSS and the size of
+  the storage directory. Local Qdrant ignores quantization and stores vectors
+  as-is, so only server numbers show the effect of the compact modes.
+
+It also reports the client-side memory of the PointStructs passed to upsert.
+qdrant-client validates vectors into nested Python float lists, so this is
+the same in every mode.
+
+Usage:
+    python -m benchmarks.bench_colbert_storage --chunks 200
+    python -m benchmarks.bench_colbert_storage --url http://localhost:6333 --chunks 2000
+"""
+import argparse
+import multiprocessing
+import os
+import resource
+import tempfile
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+from uuid import uuid4
+
+import numpy as np
+
+DIM = 128  # ColBERTv2.0 token dimension
+MODES = ("float32", "int8", "binary")
+
+def synthetic_corpus(chunks, min_tokens, max_tokens, seed=0):
+    rng = np.random.default_rng(seed)
+    return [
+        rng.standard_normal((int(rng.integers(min_tokens, max_tokens)), DIM)).astype(np.float32)
+        for _ in range(chunks)
+    ]
+
+def rss_bytes():
+    """Current resident set size (Linux /proc), falling back to the peak from getrusage."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+def directory_bytes(path):
+    return sum(
+        os.path.getsize(os.path.join(root, name))
+        for root, _, files in os.walk(path) for name in files
+    )
+
+def _fake_embeddings(corpus):
+    """get_all_embeddings stand-in serving the synthetic ColBERT matrices (by chunk index)."""
+    from fastembed import SparseEmbedding
+
+    def embed(texts, batching=True):
+        rng = np.random.default_rng(1)
+        late = [corpus[int(text.split()[1])] for text in texts]
+        dense = [rng.random(384).tolist() for _ in texts]
+        sparse = [SparseEmbedding(values=np.array([1.0]), indices=np.array([i])) for i, _ in enumerate(texts)]
+        return dense, sparse, late
+    return embed
+
+def _make_store(mode, corpus, url=None, local_path=None):
+    import rag_agent.vectorstore_qdrant as vectorstore_qdrant
+    from utils.app_config import AppConfig
+
+    vectorstore_qdrant.get_all_embeddings = _fake_embeddings(corpus)
+    config = AppConfig()
+    config.rag.colbert_storage = mode
+    config.rag.collection_name = f"bench_colbert_{mode}_{uuid4().hex[:8]}"
+    config.rag.vector_url = url
+    config.rag.vector_local_path = local_path
+    return vectorstore_qdrant.VectorStore(config)
+
+def _ingest(store, corpus, batch=64):
+    texts = [f"chunk {i}" for i in range(len(corpus))]
+    for offset in range(0, len(texts), batch):
+        store.create_vectorstore_batch([([text], f"chunk_{offset + i}.md")
+                                        for i, text in enumerate(texts[offset:offset + batch])])
+
+def measure_local(mode, chunks, min_tokens, max_tokens):
+    """Subprocess worker: ingest into a fresh on-disk store, return (RSS growth, storage bytes)."""
+    corpus = synthetic_corpus(chunks, min_tokens, max_tokens)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "vectorstore")
+        store = _make_store(mode, corpus, local_path=path)
+        before = rss_bytes()
+        _ingest(store, corpus)
+        after = rss_bytes()
+        store.client.close()
+        return after - before, directory_bytes(path)
+
+def _sum_usage(node, totals):
+    if isinstance(node, dict):
+        for key, value in node.items():
+            if key in totals and isinstance(value, (int, float)):
+                totals[key] += value
+            else:
+                _sum_usage(value, totals)
+    elif isinstance(node, list):
+        for item in node:
+            _sum_usage(item, totals)
+
+def server_usage(url, collection_name):
+    """RAM/disk bytes of a collection's segments from the server telemetry."""
+    import httpx
+
+    telemetry = httpx.get(f"{url.rstrip('/')}/telemetry", params={"details_level": 10}, timeout=30).json()
+    collections = telemetry["result"]["collections"]["collections"]
+    collection = next(c for c in collections if c.get("id") == collection_name)
+    totals = {"ram_usage_bytes": 0, "disk_usage_bytes": 0}
+    _sum_usage(collection, totals)
+    return totals["ram_usage_bytes"], totals["disk_usage_bytes"]
+
+def measure_server(mode, corpus, url):
+    from qdrant_client import models
+
+    store = _make_store(mode, corpus, url=url)
+    try:
+        _ingest(store, corpus)
+        # Build optimized (quantized) segments now instead of waiting for the indexing threshold
+        store.client.update_collection(
+            collection_name=store.collection_name,
+            optimizers_config=models.OptimizersConfigDiff(indexing_threshold=1)
+        )
+        while store.client.get_collection(store.collection_name).status != models.CollectionStatus.GREEN:
+            time.sleep(0.5)
+        return server_usage(url, store.collection_name)
+    finally:
+        store.client.delete_collection(store.collection_name)
+
+def client_payload_bytes(corpus):
+    """Peak bytes held by the PointStructs handed to upsert (vectors as qdrant-client stores them)."""
+    from qdrant_client.http.models import PointStruct
+
+    tracemalloc.start()
+    points = [PointStruct(id=i, vector={"colbert": m.tolist()}) for i, m in enumerate(corpus)]
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del points
+    return peak
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--chunks", type=int, default=200)
+    parser.add_argument("--min-tokens", type=int, default=64)
+    parser.add_argument("--max-tokens", type=int, default=512)
+    parser.add_argument("--url", default=None, help="Qdrant server URL; local on-disk mode if omitted")
+    args = parser.parse_args()
+
+    corpus = synthetic_corpus(args.chunks, args.min_tokens, args.max_tokens)
+    tokens = sum(len(m) for m in corpus)
+    n = len(corpus)
+    print(f"{n} chunks, {tokens} tokens ({tokens / n:.0f} tokens/chunk avg)\n")
+
+    print(f"Client-side PointStruct payload: {client_payload_bytes(corpus) / n / 1024:.1f} KiB/chunk "
+          f"(raw float32 matrix: {tokens * DIM * 4 / n / 1024:.1f} KiB/chunk)\n")
+
+    if args.url:
+        print(f"Qdrant server {args.url} (segment telemetry, per chunk)   RAM        disk")
+        for mode in MODES:
+            ram, disk = measure_server(mode, corpus, args.url)
+            print(f"  {mode:<8} {ram / n / 1024:36.1f} KiB {disk / n / 1024:8.1f} KiB")
+    else:
+        print("Local on-disk store (quantization not applied; per chunk)   RSS growth   storage")
+        context = multiprocessing.get_context("spawn")
+        for mode in MODES:
+            with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+                rss, disk = pool.submit(measure_local, mode, args.chunks, args.min_tokens, args.max_tokens).result()
+            print(f"  {mode:<8} {rss / n / 1024:45.1f} KiB {disk / n / 1024:8.1f} KiB")
+
+if __name__ == "__main__":
+    main()
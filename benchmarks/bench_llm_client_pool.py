@@ -0,0 +1,78 @@
+"""
+Benchmark: pooled genai client vs. a new client per call.
+
+Runs a local HTTP stub that answers like the Gemini generateContent endpoint,
+so no network or API key is needed.
+
+Usage:
+    python -m benchmarks.bench_llm_client_pool --calls 200
+"""
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from google import genai
+from google.genai import types
+
+import utils.call_llm as llm
+
+STUB_RESPONSE = json.dumps({
+    "candidates": [{"content": {"role": "model", "parts": [{"text": "ok"}]}}]
+}).encode("utf-8")
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive
+    disable_nagle_algorithm = True
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        self.rfile.read(length)
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(STUB_RESPONSE)))
+        self.end_headers()
+        self.wfile.write(STUB_RESPONSE)
+
+    def log_message(self, format, *args):
+        pass
+
+def start_stub():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+def call_llm_unpooled(prompt, base_url):
+    """Previous behaviour: build a fresh client for every call."""
+    client = genai.Client(api_key="bench-key", http_options=types.HttpOptions(base_url=base_url))
+    response = client.models.generate_content(model="gemini-2.5-flash-lite", contents=[prompt])
+    return response.text
+
+def run(label, fn, calls):
+    start = time.perf_counter()
+    for i in range(calls):
+        fn(f"prompt {i}")
+    elapsed = time.perf_counter() - start
+    print(f"{label:<12} {calls} calls in {elapsed:.2f}s -> {calls / elapsed:.1f} calls/s")
+    return calls / elapsed
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--calls", type=int, default=200)
+    args = parser.parse_args()
+
+    server, base_url = start_stub()
+    llm.config.llm.base_url = base_url
+    llm.get_client_pool().close()
+
+    try:
+        unpooled = run("unpooled", lambda p: call_llm_unpooled(p, base_url), args.calls)
+        pooled = run("pooled", llm.call_llm, args.calls)
+        print(f"speed-up: {pooled / unpooled:.1f}x")
+    finally:
+        llm.get_client_pool().close()
+        server.shutdown()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""
+Benchmark: docling parsing throughput (pages per second) per parsing profile.
+
+Parses the bundled born-digital sample guideline (benchmarks/data/sample_guideline.pdf,
+text and a table-like layout on every page) or any --pdf with each profile from
+rag_agent.doc_parser.PARSING_PROFILES. The first parse of each profile includes model
+loading and is reported separately from the warm runs.
+
+Requires docling (and its models) to be installed.
+
+Usage:
+    python -m benchmarks.bench_parsing_profiles --runs 3
+    python -m benchmarks.bench_parsing_profiles --pdf path/to/scanned.pdf --profiles fast,accurate
+    python -m benchmarks.bench_parsing_profiles --regenerate-sample --pages 12
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import time
+
+SAMPLE_PDF = os.path.join(os.path.dirname(__file__), "data", "sample_guideline.pdf")
+
+SAMPLE_LINES = [
+    "Hypertension management in adults: summary of recommendations",
+    "Confirm the diagnosis with ambulatory or home blood pressure monitoring.",
+    "Offer lifestyle advice: reduce salt intake, regular exercise, limit alcohol.",
+    "Step 1: ACE inhibitor or ARB for patients with type 2 diabetes.",
+    "Step 2: add a calcium channel blocker or thiazide-like diuretic.",
+    "Step 3: combine ACE inhibitor or ARB, calcium channel blocker and diuretic.",
+    "Target clinic blood pressure below 140/90 mmHg for people under 80 years.",
+]
+SAMPLE_TABLE = [
+    ("Drug class", "Example", "Starting dose"),
+    ("ACE inhibitor", "Ramipril", "2.5 mg daily"),
+    ("ARB", "Losartan", "50 mg daily"),
+    ("CCB", "Amlodipine", "5 mg daily"),
+    ("Thiazide-like", "Indapamide", "1.5 mg daily"),
+]
+
+def _escape(text):
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+def write_sample_pdf(path, pages=10):
+    """Write a small born-digital PDF (Helvetica text with a text layer) without extra dependencies."""
+    objects = [
+        "<< /Type /Catalog /Pages 2 0 R >>",
+        None,  # page tree, filled in once page object numbers are known
+        "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    page_ids = []
+    for page_no in range(1, pages + 1):
+        commands = ["BT", "/F1 16 Tf", "72 760 Td", f"({_escape(f'Section {page_no}. ' + SAMPLE_LINES[0])}) Tj",
+                    "/F1 11 Tf", "0 -28 Td"]
+        for line in SAMPLE_LINES[1:]:
+            commands += [f"({_escape(line)}) Tj", "0 -18 Td"]
+        commands += ["0 -18 Td"]
+        for row in SAMPLE_TABLE:
+            for column, cell in enumerate(row):
+                # Td offsets are relative to the start of the current line
+                commands += [f"{150 * column} 0 Td", f"({_escape(cell)}) Tj", f"{-150 * column} 0 Td"]
+            commands += ["0 -18 Td"]
+        commands.append("ET")
+        stream = "\n".join(commands)
+        objects.append(f"<< /Length {len(stream.encode('latin-1'))} >>\nstream\n{stream}\nendstream")
+        content_id = len(objects)
+        objects.append(f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+                       f"/Resources << /Font << /F1 3 0 R >> >> /Contents {content_id} 0 R >>")
+        page_ids.append(len(objects))
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(f'{i} 0 R' for i in page_ids)}] /Count {pages} >>"
+
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(b"%PDF-1.4\n")
+        offsets = []
+        for number, body in enumerate(objects, start=1):
+            offsets.append(f.tell())
+            f.write(f"{number} 0 obj\n{body}\nendobj\n".encode("latin-1"))
+        xref = f.tell()
+        f.write(f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode("latin-1"))
+        for offset in offsets:
+            f.write(f"{offset:010d} 00000 n \n".encode("latin-1"))
+        f.write(f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode("latin-1"))
+    return path
+
+def count_pages(path):
+    import pypdfium2 as pdfium
+    pdf = pdfium.PdfDocument(path)
+    try:
+        return len(pdf)
+    finally:
+        pdf.close()
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pdf", default=SAMPLE_PDF)
+    parser.add_argument("--profiles", default="fast,balanced,accurate")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--regenerate-sample", action="store_true")
+    parser.add_argument("--pages", type=int, default=10)
+    args = parser.parse_args()
+
+    if args.regenerate_sample or (args.pdf == SAMPLE_PDF and not os.path.exists(SAMPLE_PDF)):
+        write_sample_pdf(SAMPLE_PDF, args.pages)
+        print(f"Wrote {SAMPLE_PDF}")
+        if args.regenerate_sample:
+            return
+
+    from rag_agent.doc_parser import MedicalDocParser, has_text_layer
+
+    pages = count_pages(args.pdf)
+    print(f"{args.pdf}: {pages} pages, text layer: {has_text_layer(args.pdf)}")
+    print(f"{'profile':<10} {'cold s':>8} {'warm s':>8} {'pages/s':>8}")
+    for profile in args.profiles.split(","):
+        doc_parser = MedicalDocParser(profile)
+        with tempfile.TemporaryDirectory() as output_dir:
+            start = time.perf_counter()
+            doc_parser.parse_document(args.pdf, output_dir)
+            cold = time.perf_counter() - start
+
+            warm = []
+            for _ in range(args.runs):
+                start = time.perf_counter()
+                doc_parser.parse_document(args.pdf, output_dir)
+                warm.append(time.perf_counter() - start)
+        median = statistics.median(warm)
+        print(f"{profile:<10} {cold:8.2f} {median:8.2f} {pages / median:8.2f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+Benchmark: image-summary substitution and LLM split-point grouping on a large document.
+
+Builds a synthetic markdown document (5 MB with 500 image placeholders by default) and
+compares ContentProcessor._replace_occurrences and _split_text_by_llm_suggestions with
+the previous implementations (one str.replace per summary, which rescans and copies the
+whole document each time, and a list membership test per chunk). Outputs are checked
+for equality. No LLM or network access is needed.
+
+Usage:
+    python -m benchmarks.bench_placeholder_substitution --size-mb 5 --images 500
+"""
+import argparse
+import re
+import time
+
+from rag_agent.content_processor import IMAGE_PLACEHOLDER, ContentProcessor
+
+def replace_occurrences_legacy(text, target, replacements):
+    """Previous behaviour: one str.replace(target, ..., 1) per replacement."""
+    result = text
+    for counter, replacement in enumerate(replacements):
+        if target not in result:
+            break
+        if replacement.lower() != 'non-informative':
+            result = result.replace(target, f'picture_counter_{counter} {replacement}', 1)
+        else:
+            result = result.replace(target, '', 1)
+    return result
+
+def split_by_suggestions_legacy(chunked_text, llm_response):
+    """Previous behaviour: findall, then a list membership test per chunk."""
+    split_after = [int(x) for x in re.findall(r"\d+", llm_response.split("split_after:")[1])]
+    chunks = re.findall(r"<\|start_chunk_(\d+)\|>(.*?)<\|end_chunk_\1\|>", chunked_text, re.DOTALL)
+    sections, current_section = [], []
+    for chunk_id, chunk_text in chunks:
+        current_section.append(chunk_text)
+        if int(chunk_id) in split_after:
+            sections.append("".join(current_section).strip())
+            current_section = []
+    if current_section:
+        sections.append("".join(current_section).strip())
+    return sections
+
+def build_document(size_mb, images):
+    paragraph = ("Patients with stage 2 hypertension should start combination therapy "
+                 "with an ACE inhibitor and a calcium channel blocker. ") * 4
+    sections = []
+    size = 0
+    target = size_mb * 1024 * 1024
+    i = 0
+    while size < target:
+        section = f"## Section {i}\n{paragraph}\n"
+        sections.append(section)
+        size += len(section)
+        i += 1
+    step = max(1, len(sections) // images)
+    for n in range(images):
+        index = min(n * step, len(sections) - 1)
+        sections[index] += f"{IMAGE_PLACEHOLDER}\n"
+    return "".join(sections)
+
+def timed(fn, *args, runs=3):
+    best = float("inf")
+    for _ in range(runs):
+        start = time.perf_counter()
+        result = fn(*args)
+        best = min(best, time.perf_counter() - start)
+    return result, best
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--size-mb", type=float, default=5)
+    parser.add_argument("--images", type=int, default=500)
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    processor = ContentProcessor(None)
+    document = build_document(args.size_mb, args.images)
+    summaries = [f"Figure {i}: bar plot of blood pressure by drug class." for i in range(args.images)]
+    summaries[::10] = ["non-informative"] * len(summaries[::10])
+    print(f"document: {len(document) / 1e6:.1f} MB, {document.count(IMAGE_PLACEHOLDER)} placeholders")
+
+    expected, legacy = timed(replace_occurrences_legacy, document, IMAGE_PLACEHOLDER, summaries, runs=args.runs)
+    result, single = timed(processor._replace_occurrences, document, IMAGE_PLACEHOLDER, summaries, runs=args.runs)
+    assert result == expected
+    print(f"{'replace':<8} legacy {legacy * 1000:8.1f} ms   single pass {single * 1000:8.1f} ms   "
+          f"x{legacy / single:.0f}")
+
+    chunked_text = processor._mark_sections(result)
+    section_count = chunked_text.count("<|start_chunk_")
+    response = "split_after: " + ", ".join(str(i) for i in range(0, section_count, 3))
+    expected, legacy = timed(split_by_suggestions_legacy, chunked_text, response, runs=args.runs)
+    result, single = timed(processor._split_text_by_llm_suggestions, chunked_text, response, runs=args.runs)
+    assert result == expected
+    print(f"{'split':<8} legacy {legacy * 1000:8.1f} ms   single pass {single * 1000:8.1f} ms   "
+          f"x{legacy / single:.0f}   ({section_count} chunks)")
+
+if __name__ == "__main__":
+    main()
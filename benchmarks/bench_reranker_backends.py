@@ -0,0 +1,96 @@
+"""
+Benchmark: cross-encoder reranker latency and accuracy per backend.
+
+Scores the same synthetic query/passage pairs with the PyTorch CrossEncoder and
+the ONNX Runtime backends, and reports p50/p95 latency per rerank call plus
+agreement with the PyTorch scores (Spearman rank correlation, top-k overlap).
+
+Requires `pip install sentence-transformers[onnx]`.
+
+Usage:
+    python -m benchmarks.bench_reranker_backends --queries 20 --docs 15
+"""
+import argparse
+import random
+import statistics
+import time
+
+import numpy as np
+
+from rag_agent.reranker import load_cross_encoder
+from utils.app_config import AppConfig
+
+TOPICS = [
+    ("hypertension", "blood pressure", "ACE inhibitors", "thiazide diuretics"),
+    ("type 2 diabetes", "HbA1c", "metformin", "insulin resistance"),
+    ("asthma", "bronchodilators", "inhaled corticosteroids", "peak flow"),
+    ("heart failure", "ejection fraction", "beta blockers", "BNP"),
+    ("chronic kidney disease", "eGFR", "proteinuria", "dialysis"),
+]
+
+def synthetic_pairs(num_queries, num_docs, seed=0):
+    rng = random.Random(seed)
+    cases = []
+    for _ in range(num_queries):
+        topic = rng.choice(TOPICS)
+        query = f"What is the first-line management of {topic[0]}?"
+        docs = []
+        for _ in range(num_docs):
+            other = rng.choice(TOPICS)
+            words = rng.randint(40, 250)
+            filler = " ".join(rng.choice(other) for _ in range(words // 3))
+            docs.append(f"{other[0].capitalize()} is managed with {other[2]}; monitor {other[1]}. {filler}")
+        cases.append((query, docs))
+    return cases
+
+def spearman(a, b):
+    ra = np.argsort(np.argsort(a))
+    rb = np.argsort(np.argsort(b))
+    if np.std(ra) == 0 or np.std(rb) == 0:
+        return 1.0
+    return float(np.corrcoef(ra, rb)[0, 1])
+
+def run_backend(model, cases):
+    latencies, scores = [], []
+    model.predict([(cases[0][0], cases[0][1][0])])  # warm-up
+    for query, docs in cases:
+        start = time.perf_counter()
+        result = model.predict([(query, doc) for doc in docs])
+        latencies.append((time.perf_counter() - start) * 1000)
+        scores.append(np.asarray(result, dtype=np.float32))
+    return latencies, scores
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--queries", type=int, default=20)
+    parser.add_argument("--docs", type=int, default=15)
+    parser.add_argument("--top-k", type=int, default=3)
+    parser.add_argument("--backends", default="torch,onnx,onnx-int8")
+    args = parser.parse_args()
+
+    config = AppConfig()
+    cases = synthetic_pairs(args.queries, args.docs)
+    results = {}
+    for backend in args.backends.split(","):
+        model = load_cross_encoder(
+            config.rag.reranker_model,
+            backend,
+            config.rag.reranker_onnx_dir,
+            config.rag.reranker_onnx_quantization
+        )
+        results[backend] = run_backend(model, cases)
+
+    reference = results.get("torch", next(iter(results.values())))[1]
+    print(f"{'backend':<10} {'p50 ms':>8} {'p95 ms':>8} {'spearman':>9} {'top-' + str(args.top_k):>7}")
+    for backend, (latencies, scores) in results.items():
+        p50 = statistics.median(latencies)
+        p95 = float(np.percentile(latencies, 95))
+        rho = statistics.mean(spearman(ref, s) for ref, s in zip(reference, scores))
+        overlap = statistics.mean(
+            len(set(np.argsort(-ref)[:args.top_k]) & set(np.argsort(-s)[:args.top_k])) / args.top_k
+            for ref, s in zip(reference, scores)
+        )
+        print(f"{backend:<10} {p50:8.1f} {p95:8.1f} {rho:9.3f} {overlap:7.2f}")
+
+if __name__ == "__main__":
+    main()
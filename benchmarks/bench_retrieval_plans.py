@@ -0,0 +1,148 @@
+"""
+Benchmark: recall@k and query latency (p50/p95) for each retrieval plan.
+
+Builds a synthetic corpus in an in-memory Qdrant collection. Each chunk mixes
+topic vocabulary shared with other chunks, a few rare terms of its own and
+filler words. Each query samples terms from one chunk, and that chunk is the
+single relevant result. recall@k is the share of queries whose chunk is among
+the k results.
+
+Latency covers query embedding plus search, timed per query through
+VectorStore.retrieve_relevant_chunks. The embedding cache is disabled so every
+plan pays for its own query encoding (queries never go through micro-batching).
+
+--embeddings fastembed (default) uses the configured dense/BM25/ColBERT models.
+--embeddings hashed uses deterministic bag-of-words projections, which need no
+model download. The hashed vectors only exercise the plumbing and latency: their
+recall says nothing about real model quality.
+
+Usage:
+    python -m benchmarks.bench_retrieval_plans --chunks 2000 --queries 200
+    python -m benchmarks.bench_retrieval_plans --embeddings hashed --top-k 10
+"""
+import argparse
+import statistics
+import time
+import zlib
+
+import numpy as np
+from fastembed import SparseEmbedding
+
+import rag_agent.vectorstore_qdrant as vectorstore_qdrant
+import utils.get_embedding as embedding
+from rag_agent.vectorstore_qdrant import VectorStore
+from utils.app_config import AppConfig
+
+STEMS = ["cardi", "nephr", "hepat", "neur", "pulmon", "gastr", "derm", "onc", "endocrin", "haemat",
+         "rheumat", "ophthalm", "immun", "vascul", "osteo", "myel", "lymph", "thyro", "pancrea", "uro"]
+SUFFIXES = ["itis", "opathy", "ology", "ectomy", "oma", "algia", "ic", "osis", "ostomy", "emia"]
+FILLER = ("the patient was with and of in for to a on after before daily dose treatment "
+          "study group showed results clinical trial evidence recommended").split()
+
+def plans(top_k):
+    plan = AppConfig.RAGConfig.RetrievalPlan
+    wide = top_k * 8
+    return {
+        "colbert": plan(mode="colbert"),
+        "colbert-wide": plan(mode="colbert", dense_limit=wide, sparse_limit=wide),
+        "rrf": plan(mode="rrf"),
+        "rrf-wide": plan(mode="rrf", dense_limit=wide, sparse_limit=wide),
+        "dense": plan(mode="dense"),
+    }
+
+def synthetic_corpus(chunks, queries, topics=20, seed=0):
+    """Return (chunk texts, [(query, index of its relevant chunk)])."""
+    rng = np.random.default_rng(seed)
+    topic_vocab = [
+        [f"{STEMS[t % len(STEMS)]}{SUFFIXES[i % len(SUFFIXES)]}{t}x{i}" for i in range(50)]
+        for t in range(topics)
+    ]
+    texts, rare_terms = [], []
+    for c in range(chunks):
+        topic = topic_vocab[c % topics]
+        rare = [f"marker{c}r{i}" for i in range(6)]
+        words = list(rng.choice(topic, 20)) + rare + list(rng.choice(FILLER, 30))
+        rng.shuffle(words)
+        texts.append(" ".join(words))
+        rare_terms.append((topic, rare))
+
+    pairs = []
+    for target in rng.choice(chunks, queries, replace=queries > chunks):
+        topic, rare = rare_terms[target]
+        words = list(rng.choice(rare, 2, replace=False)) + list(rng.choice(topic, 4)) + list(rng.choice(FILLER, 2))
+        pairs.append((" ".join(words), int(target)))
+    return texts, pairs
+
+def _word_vector(word, dim):
+    rng = np.random.default_rng(zlib.crc32(word.encode("utf-8")))
+    return rng.standard_normal(dim).astype(np.float32)
+
+def hashed_dense(texts):
+    vectors = []
+    for text in texts:
+        vector = np.sum([_word_vector(word, 384) for word in text.split()], axis=0)
+        vectors.append((vector / np.linalg.norm(vector)).tolist())
+    return vectors
+
+def hashed_sparse(texts):
+    embeddings = []
+    for text in texts:
+        counts = {}
+        for word in text.split():
+            index = zlib.crc32(word.encode("utf-8")) % (1 << 20)
+            counts[index] = counts.get(index, 0) + 1.0
+        embeddings.append(SparseEmbedding(values=np.array(list(counts.values())), indices=np.array(list(counts))))
+    return embeddings
+
+def hashed_all(texts, batching=True):
+    late = [np.stack([_word_vector(word, 128) for word in text.split()]) for text in texts]
+    return hashed_dense(texts), hashed_sparse(texts), late
+
+def use_hashed_embeddings():
+    vectorstore_qdrant.get_all_embeddings = hashed_all
+    vectorstore_qdrant.get_embedding = hashed_dense
+    vectorstore_qdrant.get_sparse_embedding = hashed_sparse
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--chunks", type=int, default=2000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--embeddings", choices=["fastembed", "hashed"], default="fastembed")
+    parser.add_argument("--plans", default=None, help="comma-separated subset of the plans")
+    args = parser.parse_args()
+
+    embedding.config.rag.embedding_cache_size = 0
+    if args.embeddings == "hashed":
+        use_hashed_embeddings()
+
+    config = AppConfig()
+    config.rag.vector_local_path = ":memory:"
+    config.rag.top_k = args.top_k
+    store = VectorStore(config)
+
+    texts, pairs = synthetic_corpus(args.chunks, args.queries)
+    start = time.perf_counter()
+    for offset in range(0, len(texts), 256):
+        store.create_vectorstore_batch([([text], f"chunk_{offset + i}.md") for i, text in enumerate(texts[offset:offset + 256])])
+    print(f"Indexed {len(texts)} chunks in {time.perf_counter() - start:.1f}s ({args.embeddings} embeddings)")
+
+    selected = plans(args.top_k)
+    if args.plans:
+        selected = {name: selected[name] for name in args.plans.split(",")}
+
+    print(f"{'plan':<14} {'recall@' + str(args.top_k):>10} {'p50 ms':>8} {'p95 ms':>8}")
+    for name, plan in selected.items():
+        store.set_retrieval_plan(plan)
+        store.retrieve_relevant_chunks(pairs[0][0])  # load the models this plan needs
+        hits, latencies = 0, []
+        for query, target in pairs:
+            started = time.perf_counter()
+            docs = store.retrieve_relevant_chunks(query)
+            latencies.append((time.perf_counter() - started) * 1000)
+            hits += any(doc["source"] == f"chunk_{target}.md" for doc in docs)
+        p95 = statistics.quantiles(latencies, n=20)[-1] if len(latencies) > 1 else latencies[0]
+        print(f"{name:<14} {hits / len(pairs):10.3f} {statistics.median(latencies):8.2f} {p95:8.2f}")
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,5 @@
 from pocketflow import Node, BatchNode, AsyncParallelBatchNode
-from utils.call_llm import call_llm
+from utils.call_llm import call_llm, call_llm_async, call_llm_stream_async
 from utils.tool_registry import get_tools, call_tool
 from utils.yaml_utils import parse_yaml_robustly
 import yaml
@@ -266,6 +266,7 @@ class ResearcherNode(AsyncParallelBatchNode):
     async def prep_async(self, shared):
         self.rag_agent = shared.get("rag_agent")
         self.web_search_agent = shared.get("web_search_agent")
+        self.session_id = shared.get("session_id")
         return shared.get("blueprint", [])
 
     async def exec_async(self, item):
@@ -280,7 +281,7 @@ Description: {item.get('description')}
 Return ONLY the query string, no quotes.
 """
         try:
-            query = await asyncio.to_thread(call_llm, prompt)
+            query = await call_llm_async(prompt)
             query = query.strip().strip('"')
             print(f"🔎 Researching: {query}")
 
@@ -300,7 +301,13 @@ Return ONLY the query string, no quotes.
                     chunks.append(chunk_text)
 
             if chunks and self.rag_agent:
-                await asyncio.to_thread(self.rag_agent.ingest_text_chunks, chunks, metadata_path=f"Query: {query}")
+                # Tag results with their section (and session) so the writer can search only them
+                metadata = {"section": item.get('title')}
+                if self.session_id:
+                    metadata["session_id"] = self.session_id
+                await asyncio.to_thread(
+                    self.rag_agent.ingest_text_chunks, chunks, metadata_path=f"Query: {query}", metadata=metadata
+                )
                 return f"Ingested {len(chunks)} results."
         except Exception as e:
             print(f"Researcher Error: {e}")
@@ -315,23 +322,53 @@ Return ONLY the query string, no quotes.
 class ContentWriterNode(AsyncParallelBatchNode):
     async def prep_async(self, shared):
         self.rag_agent = shared.get("rag_agent")
-        return shared.get("blueprint", [])
+        # Optional callable receiving partial section text as it streams in
+        self.event_sink = shared.get("event_sink")
+        items = [{**item, "index": i} for i, item in enumerate(shared.get("blueprint", []))]
+
+        # Retrieve context for the whole blueprint in one batched pass
+        if self.rag_agent and items:
+            queries = [f"{item.get('title')} {item.get('description')}" for item in items]
+            retrieve_batch = self.rag_agent.vector_store.retrieve_relevant_chunks_batch
+            session_id = shared.get("session_id")
+            try:
+                if session_id:
+                    # Each section searches only the research ingested for it in this session
+                    filters = [{"session_id": session_id, "section": item.get('title')} for item in items]
+                    docs_per_item = await asyncio.to_thread(retrieve_batch, queries, filters)
+                    # Sections without research results of their own fall back to the rest of this
+                    # session's research and the ingested documents, never to other sessions
+                    missing = [i for i, docs in enumerate(docs_per_item) if not docs]
+                    if missing:
+                        session_filter = self.rag_agent.vector_store.session_filter(session_id)
+                        fallback = await asyncio.to_thread(
+                            retrieve_batch, [queries[i] for i in missing], session_filter
+                        )
+                        for i, docs in zip(missing, fallback):
+                            docs_per_item[i] = docs
+                else:
+                    docs_per_item = await asyncio.to_thread(retrieve_batch, queries)
+                for item, docs in zip(items, docs_per_item):
+                    item["context_docs"] = docs
+                    print(f"📚 Retrieved {len(docs)} chunks for '{item.get('title')}'")
+            except Exception as e:
+                print(f"Retrieval error: {e}")
+        return items
+
+    def _emit(self, event):
+        if self.event_sink:
+            try:
+                self.event_sink(event)
+            except Exception as e:
+                print(f"Event sink error: {e}")
 
     async def exec_async(self, item):
+        index = item.get('index')
         title = item.get('title')
         description = item.get('description')
 
-        context = ""
-        if self.rag_agent:
-            # Retrieve relevant chunks
-            query = f"{title} {description}"
-            # Run sync retrieval in thread
-            try:
-                docs = await asyncio.to_thread(self.rag_agent.vector_store.retrieve_relevant_chunks, query)
-                context = "\n\n".join([d.get('content', '') for d in docs])
-                print(f"📚 Retrieved {len(docs)} chunks for '{title}'")
-            except Exception as e:
-                print(f"Retrieval error: {e}")
+        docs = item.get('context_docs') or []
+        context = "\n\n".join([d.get('content', '') for d in docs])
 
         prompt = f"""
 Vai trò: Medical Content Writer.
@@ -360,18 +397,28 @@ section:
 ```
 """
         try:
-            response = await asyncio.to_thread(call_llm, prompt)
+            response = ""
+            async for delta in call_llm_stream_async(prompt):
+                response += delta
+                self._emit({"type": "section_delta", "index": index, "title": title, "delta": delta, "text": response})
             result = parse_yaml_robustly(response)
             if isinstance(result, dict) and "section" in result:
-                return result["section"]
+                section = result["section"]
             else:
-                return {"title": title, "body": [{"content": "Error in generation"}]}
+                section = {"title": title, "body": [{"content": "Error in generation"}]}
         except Exception as e:
             print(f"Content Generation Error: {e}")
-            return {"title": title, "body": [{"content": "Error in generation"}]}
+            section = {"title": title, "body": [{"content": "Error in generation"}]}
+
+        self._emit({"type": "section_done", "index": index, "title": title, "section": section})
+        return section
 
     async def post_async(self, shared, prep_res, exec_res_list):
         shared["doc_sections"] = exec_res_list
+        # The session's research results were only needed for writing; drop them from the shared store
+        session_id = shared.get("session_id")
+        if self.rag_agent and session_id:
+            await asyncio.to_thread(self.rag_agent.vector_store.delete_session, session_id)
         return "default"
 
 class DocGeneratorNode(Node):
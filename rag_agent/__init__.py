@@ -1,6 +1,9 @@
 import os
 import time
+import asyncio
 import logging
+from uuid import uuid4
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Optional, Dict, Any
 
 from .doc_parser import MedicalDocParser
@@ -9,6 +12,9 @@ from .vectorstore_qdrant import VectorStore
 from .reranker import Reranker
 from .query_expander import QueryExpander
 from .response_generator import ResponseGenerator
+from .ingest_pipeline import IngestPipeline
+from .ingest_manifest import IngestManifest
+from utils.get_embedding import preload_models
 
 class MedicalRAG:
     """
@@ -25,17 +31,29 @@ class MedicalRAG:
         self.logger = logging.getLogger(f"{self.__module__}")
         self.logger.info("Initializing Medical RAG system")
         self.config = config
-        self.doc_parser = MedicalDocParser()
+        self.doc_parser = MedicalDocParser(**MedicalDocParser.options_from_config(config.rag))
         self.content_processor = ContentProcessor(config)
         self.vector_store = VectorStore(config)
         self.reranker = Reranker(config)
         self.query_expander = QueryExpander(config)
         self.response_generator = ResponseGenerator(config)
         self.parsed_content_dir = self.config.rag.parsed_content_dir
+
+        # Embedding models load lazily; only preload what this deployment needs
+        preload = getattr(self.config.rag, "embedding_preload", None)
+        if preload:
+            preload_models(preload, background=getattr(self.config.rag, "embedding_warmup_in_background", True))
     
     def ingest_directory(self, directory_path: str) -> Dict[str, Any]:
         """
         Ingest all files in a directory into the RAG system.
+
+        With config.rag.ingest_pipeline enabled, files go through the staged concurrent
+        IngestPipeline and the result also carries per-stage statistics. Called from a running
+        event loop, the pipeline runs on its own loop in a worker thread (the call still blocks
+        until ingestion is done). With config.rag.ingest_manifest_path
+        set, only new and changed files are ingested (see IngestManifest). Chunks are tagged
+        with an ingest_batch id (returned in the result) that retrieval can filter on.
         
         Args:
             directory_path: Path to the directory containing files to ingest
@@ -55,15 +73,67 @@ class MedicalRAG:
             files = [os.path.join(directory_path + '/', f) for f in os.listdir(directory_path) 
                      if os.path.isfile(os.path.join(directory_path, f))]
             
+            ingest_batch = uuid4().hex
+            batch_metadata = {"ingest_batch": ingest_batch}
+
+            # Incremental mode: skip unchanged files, drop points of changed and deleted ones
+            manifest = self._load_manifest()
+            sync_stats = {}
+            if manifest is not None:
+                plan = manifest.plan(directory_path, files)
+                # The manifest alone cannot tell whether the store still holds a file (in-memory store,
+                # wiped storage, another collection), so unchanged files missing from it are re-ingested
+                missing = [path for path in plan["unchanged"] if not self.vector_store.sync_source(path)]
+                if missing:
+                    self.logger.info(f"Ingestion manifest: {len(missing)} unchanged files missing from the vector store")
+                    plan["unchanged"] = [path for path in plan["unchanged"] if path not in missing]
+                    plan["new"] = plan["new"] + missing
+                for document_path in plan["changed"] + plan["deleted"]:
+                    entry = manifest.get(document_path)
+                    self.vector_store.delete_source(entry["document_path"], entry["chunk_ids"])
+                    manifest.remove(document_path)
+                files = plan["new"] + plan["changed"]
+                sync_stats = {
+                    "skipped_unchanged": len(plan["unchanged"]),
+                    "changed_documents": len(plan["changed"]),
+                    "deleted_documents": len(plan["deleted"])
+                }
+                self.logger.info(f"Ingestion manifest: {len(plan['new'])} new, {sync_stats}")
+
             if not files:
-                self.logger.warning(f"No files found in directory: {directory_path}")
+                self.logger.warning(f"No files to ingest in directory: {directory_path}")
+                if manifest is not None:
+                    manifest.save()
                 return {
                     "success": True,
                     "documents_ingested": 0,
                     "chunks_processed": 0,
+                    **sync_stats,
                     "processing_time": time.time() - start_time
                 }
             
+            if getattr(self.config.rag, "ingest_pipeline", False):
+                report = self._run_pipeline(files, batch_metadata)
+                failed_files = [{"file": r["file"], "error": r.get("error", "Unknown error")}
+                                for r in report["files"] if not r["success"]]
+                if manifest is not None:
+                    for r in report["files"]:
+                        if r["success"]:
+                            manifest.record(r["file"], r.get("chunk_ids", []))
+                    manifest.save()
+                return {
+                    "success": True,
+                    "documents_ingested": sum(1 for r in report["files"] if r["success"] and not r.get("skipped")),
+                    "failed_documents": len(failed_files),
+                    "failed_files": failed_files,
+                    "chunks_processed": sum(r["chunks_processed"] for r in report["files"]),
+                    "ingest_batch": ingest_batch,
+                    **sync_stats,
+                    "stage_stats": report["stage_stats"],
+                    "bottleneck": report["bottleneck"],
+                    "processing_time": time.time() - start_time
+                }
+
             # Track statistics
             total_chunks_processed = 0
             successful_ingestions = 0
@@ -75,10 +145,12 @@ class MedicalRAG:
                 self.logger.info(f"Processing file {successful_ingestions + failed_ingestions + 1}/{len(files)}: {file_path}")
                 
                 try:
-                    result = self.ingest_file(file_path)
+                    result = self.ingest_file(file_path, metadata=batch_metadata)
                     if result["success"]:
                         successful_ingestions += 1
                         total_chunks_processed += result.get("chunks_processed", 0)
+                        if manifest is not None:
+                            manifest.record(file_path, result.get("chunk_ids", []))
                     else:
                         failed_ingestions += 1
                         failed_files.append({"file": file_path, "error": result.get("error", "Unknown error")})
@@ -86,6 +158,9 @@ class MedicalRAG:
                     self.logger.error(f"Error processing file {file_path}: {e}")
                     failed_ingestions += 1
                     failed_files.append({"file": file_path, "error": str(e)})
+
+            if manifest is not None:
+                manifest.save()
             
             return {
                 "success": True,
@@ -93,6 +168,8 @@ class MedicalRAG:
                 "failed_documents": failed_ingestions,
                 "failed_files": failed_files,
                 "chunks_processed": total_chunks_processed,
+                "ingest_batch": ingest_batch,
+                **sync_stats,
                 "processing_time": time.time() - start_time
             }
             
@@ -104,12 +181,30 @@ class MedicalRAG:
                 "processing_time": time.time() - start_time
             }
     
-    def ingest_file(self, document_path: str) -> Dict[str, Any]:
+    def _run_pipeline(self, files: List[str], metadata: Dict[str, Any]) -> Dict[str, Any]:
+        """Run the IngestPipeline to completion, on a worker thread if this thread already runs an event loop."""
+        def run():
+            return asyncio.run(IngestPipeline.from_config(self).run(files, metadata=metadata))
+
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return run()
+        # asyncio.run cannot start a loop inside a running one (async node, notebook, server handler)
+        with ThreadPoolExecutor(max_workers=1) as pool:
+            return pool.submit(run).result()
+
+    def _load_manifest(self) -> Optional[IngestManifest]:
+        manifest_path = getattr(self.config.rag, "ingest_manifest_path", None)
+        return IngestManifest(manifest_path) if manifest_path else None
+
+    def ingest_file(self, document_path: str, metadata: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         """
         Ingest a single file into the RAG system.
         
         Args:
             document_path: Path to the file to ingest
+            metadata: Optional payload fields for every chunk (e.g. ingest_batch)
             
         Returns:
             Dictionary with ingestion results
@@ -118,6 +213,17 @@ class MedicalRAG:
         self.logger.info(f"Ingesting file: {document_path}")
 
         try:
+            # Warm start: the persistent store may already hold this document (same content)
+            if self.vector_store.sync_source(document_path):
+                self.logger.info(f"   Already in vector store, skipping: {document_path}")
+                return {
+                    "success": True,
+                    "documents_ingested": 0,
+                    "chunks_processed": 0,
+                    "skipped": True,
+                    "processing_time": time.time() - start_time
+                }
+
             # Step 1: Parse document
             self.logger.info("1. Parsing document and extracting images...")
             parsed_document, images = self.doc_parser.parse_document(document_path, self.parsed_content_dir)
@@ -139,15 +245,17 @@ class MedicalRAG:
 
             # Step 5: Create vector store and document store
             self.logger.info("5. Creating vector store knowledge base...")
-            self.vector_store.create_vectorstore(
+            chunk_ids = self.vector_store.create_vectorstore(
                 document_chunks=document_chunks, 
-                document_path=document_path
+                document_path=document_path,
+                metadata=metadata
                 )
             
             return {
                 "success": True,
                 "documents_ingested": 1,
                 "chunks_processed": len(document_chunks),
+                "chunk_ids": chunk_ids,
                 "processing_time": time.time() - start_time
             }
         
@@ -159,13 +267,20 @@ class MedicalRAG:
                 "processing_time": time.time() - start_time
             }
 
-    def ingest_text_chunks(self, chunks: List[str], metadata_path: str = "Ingested Text") -> Dict[str, Any]:
+    def ingest_text_chunks(
+            self,
+            chunks: List[str],
+            metadata_path: str = "Ingested Text",
+            metadata: Optional[Dict[str, Any]] = None
+        ) -> Dict[str, Any]:
         """
         Ingest text chunks directly into the RAG system.
 
         Args:
             chunks: List of text chunks
             metadata_path: Path metadata (e.g. source description)
+            metadata: Optional payload fields for every chunk, e.g. {"session_id": ..., "section": ...}
+                so research results can be retrieved per session and blueprint section
         """
         start_time = time.time()
         self.logger.info(f"Ingesting {len(chunks)} text chunks.")
@@ -173,7 +288,8 @@ class MedicalRAG:
         try:
             self.vector_store.create_vectorstore(
                 document_chunks=chunks,
-                document_path=metadata_path
+                document_path=metadata_path,
+                metadata=metadata
             )
             return {
                 "success": True,
@@ -188,13 +304,19 @@ class MedicalRAG:
                 "processing_time": time.time() - start_time
             }
         
-    def process_query(self, query: str, chat_history: Optional[List[Dict[str, str]]] = None) -> Dict[str, Any]:
+    def process_query(
+            self,
+            query: str,
+            chat_history: Optional[List[Dict[str, str]]] = None,
+            filters: Optional[Dict[str, Any]] = None
+        ) -> Dict[str, Any]:
         """
         Process a query with the RAG system.
         
         Args:
             query: The query string
             chat_history: Optional chat history for context
+            filters: Optional payload filter for retrieval, e.g. {"source": "guideline.pdf"}
             
         Returns:
             Response dictionary
@@ -209,7 +331,7 @@ class MedicalRAG:
             expansion_result = self.query_expander.expand_query(query)
             expanded_query = expansion_result["expanded_query"]
             self.logger.info(f"   Original: '{query}'")
-            self.logger.info(f"   Expanded: '{expanded_query}'")
+            self.logger.info(f"   Expanded ({expansion_result['expansion_source']}): '{expanded_query}'")
             query = expanded_query
 
             # Step 2: Retrieval
@@ -218,21 +340,14 @@ class MedicalRAG:
             self.vector_store.load_vectorstore()
 
             retrieved_documents = self.vector_store.retrieve_relevant_chunks(
-                query=query
+                query=query,
+                filters=filters
             )
 
             self.logger.info(f"   Retrieved {len(retrieved_documents)} relevant document chunks")
 
             # Step 3: Rerank the retrieved documents if we have a reranker and enough documents
-            self.logger.info(f"3. Reranking the retrieved documents")
-            if self.reranker and len(retrieved_documents) > 1:
-                reranked_documents, reranked_top_k_picture_paths = self.reranker.rerank(query, retrieved_documents, self.parsed_content_dir)
-                self.logger.info(f"   Reranked retrieved documents and chose top {len(reranked_documents)}")
-                self.logger.info(f"   Found {len(reranked_top_k_picture_paths)} referenced images")
-            else:
-                self.logger.info(f"   Could not rerank the retrieved documents, falling back to original scores")
-                reranked_documents = retrieved_documents
-                reranked_top_k_picture_paths = []
+            reranked_documents, reranked_top_k_picture_paths = self._rerank(query, retrieved_documents)
 
             # Step 4: Generate response
             self.logger.info("4. Generating response...")
@@ -260,3 +375,105 @@ class MedicalRAG:
                 "confidence": 0.0,
                 "processing_time": time.time() - start_time
             }
+
+    async def process_query_async(
+            self,
+            query: str,
+            chat_history: Optional[List[Dict[str, str]]] = None,
+            filters: Optional[Dict[str, Any]] = None
+        ) -> Dict[str, Any]:
+        """
+        Async variant of process_query that overlaps retrieval with query expansion.
+
+        Retrieval with the raw query starts while the expansion is in flight; if the expansion
+        changes the query, its results are merged with the raw-query candidates (deduplicated
+        by point id) before reranking. An unchanged query yields the same result as process_query.
+
+        Args:
+            query: The query string
+            chat_history: Optional chat history for context
+            filters: Optional payload filter for retrieval (see process_query)
+
+        Returns:
+            Response dictionary
+        """
+        start_time = time.time()
+        self.logger.info(f"RAG Agent processing query (async): {query}")
+
+        try:
+            self.vector_store.load_vectorstore()
+
+            # Step 1 + 2: Expand query while retrieving with the raw query
+            raw_retrieval = asyncio.create_task(
+                asyncio.to_thread(self.vector_store.retrieve_relevant_chunks, query, filters=filters)
+            )
+            try:
+                expansion_result = await self.query_expander.expand_query_async(query)
+            except Exception:
+                raw_retrieval.cancel()
+                raise
+            expanded_query = expansion_result["expanded_query"]
+            self.logger.info(f"   Expanded ({expansion_result['expansion_source']}): '{expanded_query}'")
+
+            if expanded_query.strip() == query.strip():
+                retrieved_documents = await raw_retrieval
+            else:
+                expanded_documents, raw_documents = await asyncio.gather(
+                    asyncio.to_thread(self.vector_store.retrieve_relevant_chunks, expanded_query, filters=filters),
+                    raw_retrieval
+                )
+                retrieved_documents = self._merge_candidates(expanded_documents, raw_documents)
+                query = expanded_query
+            self.logger.info(f"   Retrieved {len(retrieved_documents)} relevant document chunks")
+
+            # Step 3: Rerank
+            reranked_documents, reranked_top_k_picture_paths = await asyncio.to_thread(
+                self._rerank, query, retrieved_documents
+            )
+
+            # Step 4: Generate response
+            self.logger.info("4. Generating response...")
+            response = await asyncio.to_thread(
+                self.response_generator.generate_response,
+                query=query,
+                retrieved_docs=reranked_documents,
+                picture_paths=reranked_top_k_picture_paths,
+                chat_history=chat_history
+            )
+            response["processing_time"] = time.time() - start_time
+            return response
+
+        except Exception as e:
+            self.logger.error(f"Error processing query: {e}")
+            import traceback
+            self.logger.error(traceback.format_exc())
+            return {
+                "response": f"I encountered an error while processing your query: {str(e)}",
+                "sources": [],
+                "confidence": 0.0,
+                "processing_time": time.time() - start_time
+            }
+
+    def _rerank(self, query: str, retrieved_documents: List[Dict[str, Any]]):
+        """Rerank the retrieved documents if we have a reranker and enough documents."""
+        self.logger.info(f"3. Reranking the retrieved documents")
+        if self.reranker and len(retrieved_documents) > 1:
+            reranked_documents, reranked_top_k_picture_paths = self.reranker.rerank(query, retrieved_documents, self.parsed_content_dir)
+            self.logger.info(f"   Reranked retrieved documents and chose top {len(reranked_documents)}")
+            self.logger.info(f"   Found {len(reranked_top_k_picture_paths)} referenced images")
+            return reranked_documents, reranked_top_k_picture_paths
+
+        self.logger.info(f"   Could not rerank the retrieved documents, falling back to original scores")
+        return retrieved_documents, []
+
+    @staticmethod
+    def _merge_candidates(*candidate_lists: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Concatenate candidate lists in order, keeping the first occurrence of each point id."""
+        merged, seen = [], set()
+        for docs in candidate_lists:
+            for doc in docs:
+                if doc["id"] in seen:
+                    continue
+                seen.add(doc["id"])
+                merged.append(doc)
+        return merged
@@ -1,7 +1,48 @@
 import re
+import asyncio
 import logging
-from typing import List, Dict, Any, Optional, Tuple
-from utils.call_llm import call_llm
+from concurrent.futures import ThreadPoolExecutor
+from typing import Collection, List, Dict, Any, Optional, Tuple
+from utils.call_llm import call_llm, call_llm_async, get_rate_limiter, estimate_tokens
+from utils.get_embedding import get_embedding
+from .image_summarizer import IMAGE_TOKENS, get_image_summary_cache, prepare_image
+from .semantic_chunker import merge_sections, split_oversized
+
+IMAGE_PLACEHOLDER = "<!-- image_placeholder -->"
+PAGE_BREAK_PLACEHOLDER = "<!-- page_break -->"
+CHUNK_MARKER_PATTERN = re.compile(r"<\|start_chunk_(\d+)\|>(.*?)<\|end_chunk_\1\|>", re.DOTALL)
+
+IMAGE_SUMMARY_PROMPT = """Describe the image in detail while keeping it concise and to the point. 
+                        For context, the image is part of either a medical research paper or a research paper
+                        demonstrating the use of artificial intelligence techniques like
+                        machine learning and deep learning in diagnosing diseases or a medical report.
+                        Be specific about graphs, such as bar plots if they are present in the image.
+                        Only summarize what is present in the image, without adding any extra detail or comment.
+                        Summarize the image only if it is related to the context, return 'non-informative' explicitly 
+                        if the image is of some button not relevant to the context."""
+
+# LLM-based semantic chunking
+CHUNKING_PROMPT = """
+        You are an assistant specialized in splitting text into semantically consistent sections. 
+        
+        Following is the document text:
+        <document>
+        {document_text}
+        </document>
+        
+        <instructions>
+        Instructions:
+            1. The text has been divided into chunks, each marked with <|start_chunk_X|> and <|end_chunk_X|> tags, where X is the chunk number.
+            2. Identify points where splits should occur, such that consecutive chunks of similar themes stay together.
+            3. Each chunk must be between 256 and 512 words.
+            4. If chunks 1 and 2 belong together but chunk 3 starts a new topic, suggest a split after chunk 2.
+            5. The chunks must be listed in ascending order.
+            6. Provide your response in the form: 'split_after: 3, 5'.
+        </instructions>
+        
+        Respond only with the IDs of the chunks where you believe a split should occur.
+        YOU MUST RESPOND WITH AT LEAST ONE SPLIT.
+        """.strip()
 
 class ContentProcessor:
     """
@@ -13,39 +54,94 @@ class ContentProcessor:
         """
         self.logger = logging.getLogger(__name__)
         # Config models are no longer used, using call_llm directly
+        rag_config = getattr(config, "rag", None)
+        self.summary_workers = getattr(rag_config, "image_summary_workers", 8)
+        self.summary_max_side = getattr(rag_config, "image_summary_max_side", 1024)
+        self.summary_cache = get_image_summary_cache(getattr(rag_config, "image_summary_cache_size", 2048))
+        self.chunking_mode = getattr(rag_config, "chunking_mode", "llm")
+        self.chunk_min_words = getattr(rag_config, "chunk_min_words", 256)
+        self.chunk_max_words = getattr(rag_config, "chunk_max_words", 512)
+        self.chunk_similarity_threshold = getattr(rag_config, "chunk_similarity_threshold", 0.5)
+        self.chunk_window_tokens = getattr(rag_config, "chunk_window_tokens", 24000)
+        self.chunk_window_overlap = getattr(rag_config, "chunk_window_overlap", 2)
+        self.chunk_window_workers = getattr(rag_config, "chunk_window_workers", 4)
     
     def summarize_images(self, images: List[str]) -> List[str]:
         """
         Summarize images using the provided model, with error handling.
+        Distinct images are summarized concurrently on a bounded thread pool within the shared
+        LLM rate limits; repeated images (by content hash) are summarized once.
         
         Args:
-            images: List of image paths
+            images: List of image paths or data URIs
             
         Returns:
             List of image summaries, with placeholders for failed images
         """
-        
-        prompt_template = """Describe the image in detail while keeping it concise and to the point. 
-                        For context, the image is part of either a medical research paper or a research paper
-                        demonstrating the use of artificial intelligence techniques like
-                        machine learning and deep learning in diagnosing diseases or a medical report.
-                        Be specific about graphs, such as bar plots if they are present in the image.
-                        Only summarize what is present in the image, without adding any extra detail or comment.
-                        Summarize the image only if it is related to the context, return 'non-informative' explicitly 
-                        if the image is of some button not relevant to the context."""
-        
-        results = []
-        for image in images:
+        digests, pending = self._prepare_images(images)
+        summaries = {}
+        if pending:
+            with ThreadPoolExecutor(max_workers=min(self.summary_workers, len(pending))) as pool:
+                futures = {digest: pool.submit(self._summarize_one, image) for digest, image in pending.items()}
+                summaries = {digest: future.result() for digest, future in futures.items()}
+        return self._collect_summaries(digests, summaries)
+
+    async def summarize_images_async(self, images: List[str]) -> List[str]:
+        """Async variant of summarize_images; at most image_summary_workers calls to call_llm_async in flight."""
+        digests, pending = await asyncio.to_thread(self._prepare_images, images)
+        semaphore = asyncio.Semaphore(self.summary_workers)
+
+        async def summarize(image):
+            async with semaphore:
+                try:
+                    return await call_llm_async(IMAGE_SUMMARY_PROMPT, image_paths=[image])
+                except Exception as e:
+                    print(f"Error processing image: {str(e)}")
+                    return None
+
+        results = await asyncio.gather(*(summarize(image) for image in pending.values()))
+        return self._collect_summaries(digests, dict(zip(pending, results)))
+
+    def _prepare_images(self, images: List[str]):
+        """
+        Load and downscale images. Returns each image's content hash (None if unreadable)
+        and the distinct uncached images to summarize, keyed by hash.
+        """
+        digests, pending = [], {}
+        for image_ref in images:
             try:
-                # Call LLM with the image
-                summary = call_llm(prompt_template, image_paths=[image])
-                results.append(summary)
+                digest, image = prepare_image(image_ref, self.summary_max_side)
             except Exception as e:
-                # Log the error if needed
                 print(f"Error processing image: {str(e)}")
-                # Add placeholder for the failed image
-                results.append("no image summary")
-        
+                digests.append(None)
+                continue
+            digests.append(digest)
+            if digest not in pending and self.summary_cache.get(digest) is None:
+                pending[digest] = image
+        return digests, pending
+
+    def _summarize_one(self, image: Any) -> Optional[str]:
+        try:
+            get_rate_limiter().acquire_blocking(estimate_tokens(IMAGE_SUMMARY_PROMPT) + IMAGE_TOKENS)
+            # Call LLM with the image
+            return call_llm(IMAGE_SUMMARY_PROMPT, image_paths=[image])
+        except Exception as e:
+            # Log the error if needed
+            print(f"Error processing image: {str(e)}")
+            return None
+
+    def _collect_summaries(self, digests: List[Optional[str]], summaries: Dict[str, Optional[str]]) -> List[str]:
+        """Cache fresh summaries and map every input image to its summary or the failure placeholder."""
+        for digest, summary in summaries.items():
+            if summary is not None:
+                self.summary_cache.put(digest, summary)
+        results = []
+        for digest in digests:
+            summary = summaries.get(digest) if digest else None
+            if summary is None and digest:
+                summary = self.summary_cache.get(digest)
+            # Add placeholder for the failed image
+            results.append(summary if summary is not None else "no image summary")
         return results
     
     def format_document_with_images(self, parsed_document: Any, image_summaries: List[str]) -> str:
@@ -59,21 +155,19 @@ class ContentProcessor:
         Returns:
             Formatted document text with image summaries
         """
-        IMAGE_PLACEHOLDER = "<!-- image_placeholder -->"
-        PAGE_BREAK_PLACEHOLDER = "<!-- page_break -->"
-        
-        formatted_parsed_document = parsed_document.export_to_markdown(
+        return self.insert_image_summaries(self.export_markdown(parsed_document), image_summaries)
+
+    @staticmethod
+    def export_markdown(parsed_document: Any) -> str:
+        """Export a parsed document to markdown with image and page-break placeholders."""
+        return parsed_document.export_to_markdown(
             page_break_placeholder=PAGE_BREAK_PLACEHOLDER, 
             image_placeholder=IMAGE_PLACEHOLDER
         )
-        
-        formatted_document = self._replace_occurrences(
-            formatted_parsed_document, 
-            IMAGE_PLACEHOLDER, 
-            image_summaries
-        )
-        
-        return formatted_document
+
+    def insert_image_summaries(self, markdown: str, image_summaries: List[str]) -> str:
+        """Replace the image placeholders of exported markdown with image summaries."""
+        return self._replace_occurrences(markdown, IMAGE_PLACEHOLDER, image_summaries)
     
     def _replace_occurrences(self, text: str, target: str, replacements: List[str]) -> str:
         """
@@ -87,26 +181,22 @@ class ContentProcessor:
         Returns:
             Text with replacements
         """
-        result = text
-        for counter, replacement in enumerate(replacements):
-            if target in result:
-                if replacement.lower() != 'non-informative':
-                    result = result.replace(
-                        target, 
-                        f'picture_counter_{counter}' + ' ' + replacement, 
-                        1
-                    )
-                else:
-                    result = result.replace(target, '', 1)
-            else:
-                # Instead of raising an error, just break the loop when no more occurrences are found
-                break
-        
-        return result
+        # Single pass: split once and interleave the replacements (occurrences beyond
+        # len(replacements) stay in the last part; extra replacements are ignored)
+        parts = text.split(target, len(replacements))
+        pieces = [parts[0]]
+        for counter, (replacement, part) in enumerate(zip(replacements, parts[1:])):
+            if replacement.lower() != 'non-informative':
+                pieces.append(f'picture_counter_{counter} {replacement}')
+            pieces.append(part)
+        return "".join(pieces)
 
     def chunk_document(self, formatted_document: str) -> List[str]:
         """
-        Split the document into semantic chunks.
+        Split the document into semantic chunks, locally (chunking_mode "semantic") or
+        with LLM-suggested split points (chunking_mode "llm"). Documents larger than
+        chunk_window_tokens are cut into overlapping windows whose split points are
+        requested concurrently and stitched together.
         
         Args:
             formatted_document: Formatted document text
@@ -114,44 +204,140 @@ class ContentProcessor:
         Returns:
             List of document chunks
         """
-        
-        # Split by section boundaries
-        SPLIT_PATTERN = "\n#"
-        chunks = formatted_document.split(SPLIT_PATTERN)
-        
-        chunked_text = ""
-        for i, chunk in enumerate(chunks):
-            if chunk.startswith("#"):
-                chunk = f"#{chunk}"  # add the # back to the chunk
-            chunked_text += f"<|start_chunk_{i}|>\n{chunk}\n<|end_chunk_{i}|>\n"
-        
-        # LLM-based semantic chunking
-        CHUNKING_PROMPT = """
-        You are an assistant specialized in splitting text into semantically consistent sections. 
-        
-        Following is the document text:
-        <document>
-        {document_text}
-        </document>
-        
-        <instructions>
-        Instructions:
-            1. The text has been divided into chunks, each marked with <|start_chunk_X|> and <|end_chunk_X|> tags, where X is the chunk number.
-            2. Identify points where splits should occur, such that consecutive chunks of similar themes stay together.
-            3. Each chunk must be between 256 and 512 words.
-            4. If chunks 1 and 2 belong together but chunk 3 starts a new topic, suggest a split after chunk 2.
-            5. The chunks must be listed in ascending order.
-            6. Provide your response in the form: 'split_after: 3, 5'.
-        </instructions>
-        
-        Respond only with the IDs of the chunks where you believe a split should occur.
-        YOU MUST RESPOND WITH AT LEAST ONE SPLIT.
-        """.strip()
-        
-        formatted_chunking_prompt = CHUNKING_PROMPT.format(document_text=chunked_text)
-        chunking_response = call_llm(formatted_chunking_prompt)
-        
-        return self._split_text_by_llm_suggestions(chunked_text, chunking_response)
+        if self.chunking_mode != "llm":
+            return self._chunk_semantic(formatted_document)
+
+        sections = self._split_sections(formatted_document)
+        chunked_text = self._mark(sections)
+        windows = self._plan_windows(sections)
+        if len(windows) == 1:
+            chunking_response = call_llm(CHUNKING_PROMPT.format(document_text=chunked_text))
+            return self._split_text_by_llm_suggestions(chunked_text, chunking_response)
+
+        prompts = self._window_prompts(sections, windows)
+        with ThreadPoolExecutor(max_workers=min(self.chunk_window_workers, len(prompts))) as pool:
+            responses = list(pool.map(self._chunk_window, prompts))
+        return self._stitch_windows(chunked_text, windows, responses)
+
+    @staticmethod
+    def _chunk_window(prompt: str) -> str:
+        """Split points for one window; concurrent windows reserve the shared rate budget first."""
+        get_rate_limiter().acquire_blocking(estimate_tokens(prompt))
+        return call_llm(prompt)
+
+    async def chunk_document_async(self, formatted_document: str) -> List[str]:
+        """Async variant of chunk_document using call_llm_async."""
+        if self.chunking_mode != "llm":
+            return await asyncio.to_thread(self._chunk_semantic, formatted_document)
+
+        sections = self._split_sections(formatted_document)
+        chunked_text = self._mark(sections)
+        windows = self._plan_windows(sections)
+        if len(windows) == 1:
+            chunking_response = await call_llm_async(CHUNKING_PROMPT.format(document_text=chunked_text))
+            return self._split_text_by_llm_suggestions(chunked_text, chunking_response)
+
+        semaphore = asyncio.Semaphore(self.chunk_window_workers)
+
+        async def request(prompt):
+            async with semaphore:
+                return await call_llm_async(prompt)
+
+        responses = await asyncio.gather(*(request(prompt) for prompt in self._window_prompts(sections, windows)))
+        return self._stitch_windows(chunked_text, windows, responses)
+
+    def _chunk_semantic(self, formatted_document: str) -> List[str]:
+        """
+        Deterministic chunking: split on markdown headings, break up oversized sections,
+        then merge adjacent sections by dense-embedding cosine similarity within the word limits.
+        """
+        sections = [
+            piece
+            for section in self._split_sections(formatted_document) if section.strip()
+            for piece in split_oversized(section, self.chunk_max_words)
+        ]
+        if len(sections) <= 1:
+            return [section.strip() for section in sections]
+
+        embeddings = get_embedding(sections)
+        return merge_sections(
+            sections,
+            embeddings,
+            min_words=self.chunk_min_words,
+            max_words=self.chunk_max_words,
+            similarity_threshold=self.chunk_similarity_threshold
+        )
+
+    @staticmethod
+    def _split_sections(formatted_document: str) -> List[str]:
+        """Split markdown at headings, keeping each heading with its section."""
+        # Split before every line starting with "#" (lookahead keeps the heading intact)
+        return re.split(r"\n(?=#)", formatted_document)
+
+    def _mark_sections(self, formatted_document: str) -> str:
+        """Wrap each markdown section in <|start_chunk_i|>/<|end_chunk_i|> markers."""
+        return self._mark(self._split_sections(formatted_document))
+
+    @staticmethod
+    def _mark(sections: List[str], start: int = 0) -> str:
+        """Wrap sections in chunk markers numbered from start (global ids, also inside a window)."""
+        return "".join(
+            f"<|start_chunk_{i}|>\n{chunk}\n<|end_chunk_{i}|>\n" for i, chunk in enumerate(sections, start)
+        )
+
+    def _plan_windows(self, sections: List[str]) -> List[Tuple[int, int, int, int]]:
+        """
+        Cut sections into windows of at most chunk_window_tokens (estimated), consecutive
+        windows sharing chunk_window_overlap sections. A single section over the budget
+        gets a window of its own.
+
+        Returns:
+            (start, end, own_start, own_end) section ranges per window. A window's split
+            points are kept only in [own_start, own_end): ownership of the overlap changes
+            hands in its middle, so every boundary is decided with context on both sides.
+        """
+        if not self.chunk_window_tokens:
+            return [(0, len(sections), 0, len(sections))]
+
+        tokens = [estimate_tokens(section) for section in sections]
+        ranges = []
+        start = 0
+        while True:
+            end, used = start, 0
+            while end < len(sections) and (end == start or used + tokens[end] <= self.chunk_window_tokens):
+                used += tokens[end]
+                end += 1
+            ranges.append((start, end))
+            if end >= len(sections):
+                break
+            start = max(start + 1, end - self.chunk_window_overlap)
+
+        windows = []
+        own_start = 0
+        for (start, end), following in zip(ranges, ranges[1:] + [None]):
+            own_end = (following[0] + end) // 2 if following else len(sections)
+            windows.append((start, end, own_start, own_end))
+            own_start = own_end
+        return windows
+
+    def _window_prompts(self, sections: List[str], windows: List[Tuple[int, int, int, int]]) -> List[str]:
+        return [
+            CHUNKING_PROMPT.format(document_text=self._mark(sections[start:end], start))
+            for start, end, _, _ in windows
+        ]
+
+    def _stitch_windows(
+            self,
+            chunked_text: str,
+            windows: List[Tuple[int, int, int, int]],
+            responses: List[str]
+        ) -> List[str]:
+        """Combine the split points each window owns and split the whole marked document once."""
+        split_after = set()
+        for (_, _, own_start, own_end), response in zip(windows, responses):
+            split_after.update(i for i in self._parse_split_points(response) if own_start <= i < own_end)
+        self.logger.info(f"Chunked {len(windows)} windows concurrently, {len(split_after)} split points")
+        return self._split_at(chunked_text, split_after)
     
     def _split_text_by_llm_suggestions(self, chunked_text: str, llm_response: str) -> List[str]:
         """
@@ -164,30 +350,35 @@ class ContentProcessor:
         Returns:
             List of document chunks
         """
-        # Extract split points from LLM response
-        split_after = [] 
-        if "split_after:" in llm_response:
-            split_points = llm_response.split("split_after:")[1].strip()
-            split_after = [int(x.strip()) for x in split_points.replace(',', ' ').split()] 
+        return self._split_at(chunked_text, self._parse_split_points(llm_response))
+
+    @staticmethod
+    def _parse_split_points(llm_response: str) -> List[int]:
+        """Extract the chunk ids from a 'split_after: 3, 5' response."""
+        if "split_after:" not in llm_response:
+            return []
+        split_points = llm_response.split("split_after:")[1].strip()
+        # Tolerate stray text around the ids (e.g. "split_after: 3, 5." or "chunk 7")
+        return [int(x) for x in re.findall(r"\d+", split_points)]
 
+    @staticmethod
+    def _split_at(chunked_text: str, split_after: Collection[int]) -> List[str]:
+        """Group marked chunks into sections, closing a section after each id in split_after."""
         # If no splits were suggested, return the whole text as one section
         if not split_after:
             return [chunked_text]
 
-        # Find all chunk markers in the text
-        chunk_pattern = r"<\|start_chunk_(\d+)\|>(.*?)<\|end_chunk_\1\|>"
-        chunks = re.findall(chunk_pattern, chunked_text, re.DOTALL)
+        split_after = set(split_after)
 
-        # Group chunks according to split points
+        # Stream over the chunk markers, grouping chunk bodies until a split point
         sections = []
-        current_section = [] 
-
-        for chunk_id, chunk_text in chunks:
-            current_section.append(chunk_text)
-            if int(chunk_id) in split_after:
+        current_section = []
+        for match in CHUNK_MARKER_PATTERN.finditer(chunked_text):
+            current_section.append(match.group(2))
+            if int(match.group(1)) in split_after:
                 sections.append("".join(current_section).strip())
-                current_section = [] 
-        
+                current_section = []
+
         # Add the last section if it's not empty
         if current_section:
             sections.append("".join(current_section).strip())
@@ -1,9 +1,11 @@
 import os
 import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
 from pathlib import Path
-from typing import Dict, List, Tuple, Any
+from typing import Dict, List, Tuple, Any, Optional
 
-from docling.datamodel.base_models import InputFormat
+from docling.datamodel.base_models import ConversionStatus, InputFormat
 from docling.datamodel.pipeline_options import (
     PdfPipelineOptions, 
     TableFormerMode, 
@@ -13,26 +15,214 @@ from docling.datamodel.pipeline_options import (
 from docling.document_converter import DocumentConverter, PdfFormatOption
 from docling_core.types.doc import PictureItem, TableItem
 
+# Named parsing profiles. "accurate" is the original behaviour; "fast" trades table
+# fidelity and image resolution for throughput. do_ocr "auto" skips OCR for PDFs that
+# already carry a text layer (born-digital).
+PARSING_PROFILES: Dict[str, Dict[str, Any]] = {
+    "accurate": {
+        "image_resolution_scale": 2.0,
+        "do_ocr": True,
+        "do_tables": True,
+        "table_mode": "accurate",
+        "do_formulas": True,
+        "page_images": True
+    },
+    "balanced": {
+        "image_resolution_scale": 1.5,
+        "do_ocr": "auto",
+        "do_tables": True,
+        "table_mode": "accurate",
+        "do_formulas": False,
+        "page_images": False
+    },
+    "fast": {
+        "image_resolution_scale": 1.0,
+        "do_ocr": "auto",
+        "do_tables": True,
+        "table_mode": "fast",
+        "do_formulas": False,
+        "page_images": False
+    }
+}
+
+def has_text_layer(document_path: str, max_pages: int = 3, min_chars_per_page: int = 50) -> bool:
+    """
+    Check whether a PDF has an extractable text layer on its first pages (born-digital
+    rather than scanned). Returns False when the file cannot be inspected, so OCR stays on.
+    """
+    if not document_path.lower().endswith(".pdf"):
+        return False
+    try:
+        import pypdfium2 as pdfium
+    except ImportError:
+        return False
+
+    try:
+        pdf = pdfium.PdfDocument(document_path)
+    except Exception:
+        return False
+    try:
+        pages = min(len(pdf), max_pages)
+        if pages == 0:
+            return False
+        chars = 0
+        for index in range(pages):
+            page = pdf[index]
+            textpage = page.get_textpage()
+            chars += len("".join(textpage.get_text_range().split()))
+            textpage.close()
+            page.close()
+        return chars >= min_chars_per_page * pages
+    finally:
+        pdf.close()
+
+class ImageWriter:
+    """
+    Encodes and writes extracted images on a thread pool, so parsing does not wait on
+    PNG/WebP compression (Pillow releases the GIL while encoding).
+    """
+    EXTENSIONS = {"png": "png", "webp": "webp", "jpeg": "jpg"}
+
+    def __init__(self, image_format: str = "png", quality: int = 90, png_compress_level: int = 1, max_workers: int = 4):
+        self.logger = logging.getLogger(__name__)
+        if image_format not in self.EXTENSIONS:
+            raise ValueError(f"Unsupported image format '{image_format}', expected one of {list(self.EXTENSIONS)}")
+        self.image_format = image_format
+        self.extension = self.EXTENSIONS[image_format]
+        self.quality = quality
+        self.png_compress_level = png_compress_level
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="image-writer")
+        self._pending = set()
+        self._lock = threading.Lock()
+
+    def submit(self, image: Any, path: Path) -> None:
+        """Queue an image for writing; errors are logged, not raised."""
+        future = self.executor.submit(self._write, image, path)
+        with self._lock:
+            self._pending.add(future)
+        future.add_done_callback(self._done)
+
+    def _write(self, image: Any, path: Path) -> None:
+        if self.image_format == "png":
+            image.save(path, "PNG", compress_level=self.png_compress_level)
+        elif self.image_format == "webp":
+            image.save(path, "WEBP", quality=self.quality, method=2)
+        else:
+            image.convert("RGB").save(path, "JPEG", quality=self.quality)
+
+    def _done(self, future) -> None:
+        with self._lock:
+            self._pending.discard(future)
+        if future.exception() is not None:
+            self.logger.error(f"Error writing image: {future.exception()}")
+
+    def flush(self, timeout: Optional[float] = None) -> None:
+        """Block until every queued image is on disk."""
+        with self._lock:
+            pending = list(self._pending)
+        wait(pending, timeout=timeout)
+
+def image_extension(rag_config: Any) -> str:
+    """File extension of extracted images for a RAG config."""
+    return ImageWriter.EXTENSIONS[getattr(rag_config, "image_format", "png")]
+
 class MedicalDocParser:
     """
     Handles parsing of medical research documents using docling.
     """
-    def __init__(self):
+    def __init__(
+            self,
+            profile: str = "accurate",
+            image_format: str = "png",
+            image_quality: int = 90,
+            png_compress_level: int = 1,
+            image_write_workers: int = 4,
+            export_page_images: Optional[bool] = None
+        ):
         self.logger = logging.getLogger(__name__)
-        self.logger.info("Medical Document Parser initialized!")
+        if profile not in PARSING_PROFILES:
+            raise ValueError(f"Unknown parsing profile '{profile}', expected one of {list(PARSING_PROFILES)}")
+        self.profile = profile
+        # None follows the profile's page_images setting
+        self.export_page_images = export_page_images
+        self.image_writer = ImageWriter(image_format, image_quality, png_compress_level, image_write_workers)
+        # Converters hold the layout/TableFormer/OCR models, so one is built per distinct
+        # set of pipeline options and reused across documents
+        self._converters: Dict[Tuple, DocumentConverter] = {}
+        self._converters_lock = threading.Lock()
+        self.logger.info(f"Medical Document Parser initialized ({profile} profile)!")
+
+    @staticmethod
+    def options_from_config(rag_config: Any) -> Dict[str, Any]:
+        """Constructor arguments taken from a RAG config."""
+        return {
+            "profile": getattr(rag_config, "parsing_profile", "accurate"),
+            "image_format": getattr(rag_config, "image_format", "png"),
+            "image_quality": getattr(rag_config, "image_quality", 90),
+            "png_compress_level": getattr(rag_config, "png_compress_level", 1),
+            "image_write_workers": getattr(rag_config, "image_write_workers", 4),
+            "export_page_images": getattr(rag_config, "export_page_images", None)
+        }
+
+    def flush(self, timeout: Optional[float] = None) -> None:
+        """Wait for images queued by earlier parse calls to be written."""
+        self.image_writer.flush(timeout)
+
+    def _resolve_options(self, document_path: str, **overrides) -> Dict[str, Any]:
+        """Profile settings with explicit (non-None) arguments applied and OCR "auto" resolved."""
+        options = dict(PARSING_PROFILES[self.profile])
+        options.update({key: value for key, value in overrides.items() if value is not None})
+        options.setdefault("do_picture_desc", False)
+        if self.export_page_images is not None:
+            options["page_images"] = self.export_page_images
+        if options["do_ocr"] == "auto":
+            options["do_ocr"] = not has_text_layer(document_path)
+        return options
+
+    def _get_converter(self, options: Dict[str, Any]) -> DocumentConverter:
+        key = tuple(sorted(options.items()))
+        with self._converters_lock:
+            converter = self._converters.get(key)
+            if converter is None:
+                self.logger.info(f"Creating document converter for options {options}")
+                # Configure pipeline options
+                pipeline_options = PdfPipelineOptions(
+                    generate_page_images=options["page_images"],
+                    generate_picture_images=True,
+                    images_scale=options["image_resolution_scale"],
+                    do_ocr=options["do_ocr"],
+                    do_table_structure=options["do_tables"],
+                    do_formula_enrichment=options["do_formulas"],
+                    do_picture_description=options["do_picture_desc"]
+                )
+                if not options["page_images"]:
+                    # Table crops come from page images otherwise
+                    pipeline_options.generate_table_images = True
+
+                # Set table structure mode
+                pipeline_options.table_structure_options.mode = (
+                    TableFormerMode.FAST if options["table_mode"] == "fast" else TableFormerMode.ACCURATE
+                )
+
+                converter = DocumentConverter(
+                    format_options={InputFormat.PDF: PdfFormatOption(pipeline_options=pipeline_options)}
+                )
+                self._converters[key] = converter
+            return converter
 
     def parse_document(
             self,
             document_path: str,
             output_dir: str,
-            image_resolution_scale: float = 2.0,
-            do_ocr: bool = True,
-            do_tables: bool = True,
-            do_formulas: bool = True,
-            do_picture_desc: bool = False
+            image_resolution_scale: Optional[float] = None,
+            do_ocr: Optional[bool] = None,
+            do_tables: Optional[bool] = None,
+            do_formulas: Optional[bool] = None,
+            do_picture_desc: Optional[bool] = None
         ) -> Tuple[Any, List[str]]:
         """
         Parse the document and extract structured content and images.
+        Options left as None come from the parser's profile.
         
         Args:
             document_path: Path to the document to parse
@@ -46,40 +236,78 @@ class MedicalDocParser:
         Returns:
             Tuple containing (parsed_document, list_of_image_paths)
         """
-        # Create output directory if it doesn't exist
-        output_dir_path = Path(output_dir)
-        output_dir_path.mkdir(parents=True, exist_ok=True)
-        
-        # Configure pipeline options
-        pipeline_options = PdfPipelineOptions(
-            generate_page_images=True,
-            generate_picture_images=True,
-            images_scale=image_resolution_scale,
+        options = self._resolve_options(
+            document_path,
+            image_resolution_scale=image_resolution_scale,
             do_ocr=do_ocr,
-            do_table_structure=do_tables,
-            do_formula_enrichment=do_formulas,
-            do_picture_description=do_picture_desc
-        )
-        
-        # Set table structure mode
-        pipeline_options.table_structure_options.mode = TableFormerMode.ACCURATE    # Can choose between FAST and ACCURATE
-        
-        # Initialize document converter
-        converter = DocumentConverter(
-            format_options={InputFormat.PDF: PdfFormatOption(pipeline_options=pipeline_options)}
+            do_tables=do_tables,
+            do_formulas=do_formulas,
+            do_picture_desc=do_picture_desc
         )
+        converter = self._get_converter(options)
         
         # Convert document
         conversion_res = converter.convert(document_path)
         
+        return self._save_outputs(conversion_res, output_dir, options["page_images"])
+
+    def parse_documents(
+            self,
+            document_paths: List[str],
+            output_dir: str,
+            **options
+        ) -> List[Optional[Tuple[Any, List[str]]]]:
+        """
+        Parse several documents via docling's multi-document conversion, one converter
+        per distinct set of resolved options (e.g. scanned vs born-digital PDFs).
+        
+        Args:
+            document_paths: Paths of the documents to parse
+            output_dir: Directory to save extracted images
+            options: Overrides as in parse_document
+            
+        Returns:
+            List aligned with document_paths holding (parsed_document, list_of_image_paths),
+            or None for documents that failed to convert
+        """
+        groups: Dict[Tuple, List[int]] = {}
+        resolved = {}
+        for index, document_path in enumerate(document_paths):
+            document_options = self._resolve_options(document_path, **options)
+            key = tuple(sorted(document_options.items()))
+            resolved[key] = document_options
+            groups.setdefault(key, []).append(index)
+
+        results: List[Optional[Tuple[Any, List[str]]]] = [None] * len(document_paths)
+        for key, indices in groups.items():
+            group_options = resolved[key]
+            paths = [document_paths[i] for i in indices]
+            conversions = self._get_converter(group_options).convert_all(paths, raises_on_error=False)
+            for index, conversion_res in zip(indices, conversions):
+                if conversion_res.status not in (ConversionStatus.SUCCESS, ConversionStatus.PARTIAL_SUCCESS):
+                    self.logger.error(f"Failed to parse {document_paths[index]}: {conversion_res.status}")
+                    continue
+                results[index] = self._save_outputs(conversion_res, output_dir, group_options["page_images"])
+        return results
+
+    def _save_outputs(self, conversion_res: Any, output_dir: str, page_images: bool = True) -> Tuple[Any, List[str]]:
+        """
+        Queue page (optional), table and figure images of a conversion result for writing.
+        Files are written in the background; call flush() to wait for them.
+        """
+        # Create output directory if it doesn't exist
+        output_dir_path = Path(output_dir)
+        output_dir_path.mkdir(parents=True, exist_ok=True)
+        extension = self.image_writer.extension
+        
         # Get document filename
         doc_filename = conversion_res.input.file.stem
         
         # Save page images
-        for page_no, page in conversion_res.document.pages.items():
-            page_image_filename = output_dir_path / f"{doc_filename}-{page_no}.png"
-            with page_image_filename.open("wb") as fp:
-                page.image.pil_image.save(fp, format="PNG")
+        if page_images:
+            for page_no, page in conversion_res.document.pages.items():
+                if page.image is not None:
+                    self.image_writer.submit(page.image.pil_image, output_dir_path / f"{doc_filename}-{page_no}.{extension}")
         
         # Save images of figures and tables
         table_counter = 0
@@ -89,15 +317,15 @@ class MedicalDocParser:
         for element, _level in conversion_res.document.iterate_items():
             if isinstance(element, TableItem):
                 table_counter += 1
-                element_image_filename = output_dir_path / f"{doc_filename}-table-{table_counter}.png"
-                with element_image_filename.open("wb") as fp:
-                    element.get_image(conversion_res.document).save(fp, "PNG")
+                table_image = element.get_image(conversion_res.document)
+                if table_image is not None:
+                    self.image_writer.submit(table_image, output_dir_path / f"{doc_filename}-table-{table_counter}.{extension}")
                     
             if isinstance(element, PictureItem):
-                picture_path = f"{doc_filename}-picture-{picture_counter}.png"
-                element_image_filename = output_dir_path / picture_path
-                with element_image_filename.open("wb") as fp:
-                    element.get_image(conversion_res.document).save(fp, "PNG")
+                element_image_filename = output_dir_path / f"{doc_filename}-picture-{picture_counter}.{extension}"
+                picture_image = element.get_image(conversion_res.document)
+                if picture_image is not None:
+                    self.image_writer.submit(picture_image, element_image_filename)
                 
                 # Add path to the list of images
                 image_paths.append(str(element_image_filename))
@@ -0,0 +1,77 @@
+import io
+import base64
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+from PIL import Image
+
+# Gemini bills an image of up to 384px per side as 258 tokens and larger ones per 768px tile
+IMAGE_TOKENS = 258
+
+def load_image_bytes(image_ref: str) -> bytes:
+    """Raw bytes of an image given as a file path or a base64 data URI (docling's picture.image.uri)."""
+    if image_ref.startswith("data:"):
+        _, _, payload = image_ref.partition(",")
+        return base64.b64decode(payload)
+    with open(image_ref, "rb") as f:
+        return f.read()
+
+def prepare_image(image_ref: str, max_side: Optional[int]) -> Tuple[str, Image.Image]:
+    """
+    Load an image for summarization.
+
+    Returns:
+        (sha256 of the original bytes, RGB image downscaled so its longest side is at most max_side)
+    """
+    data = load_image_bytes(image_ref)
+    digest = hashlib.sha256(data).hexdigest()
+    image = Image.open(io.BytesIO(data))
+    image.load()
+    if image.mode not in ("RGB", "L"):
+        image = image.convert("RGB")
+    if max_side and max(image.size) > max_side:
+        image.thumbnail((max_side, max_side), Image.LANCZOS)
+    return digest, image
+
+class ImageSummaryCache:
+    """Thread-safe LRU of image summaries keyed by image content hash."""
+    def __init__(self, max_entries: int = 2048):
+        self.max_entries = max_entries
+        self.entries: "OrderedDict[str, str]" = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, digest: str) -> Optional[str]:
+        with self.lock:
+            summary = self.entries.get(digest)
+            if summary is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(digest)
+            self.hits += 1
+            return summary
+
+    def put(self, digest: str, summary: str) -> None:
+        if self.max_entries <= 0:
+            return
+        with self.lock:
+            self.entries[digest] = summary
+            self.entries.move_to_end(digest)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def stats(self):
+        with self.lock:
+            return {"entries": len(self.entries), "hits": self.hits, "misses": self.misses}
+
+_summary_cache = None
+
+def get_image_summary_cache(max_entries: int = 2048) -> ImageSummaryCache:
+    """Process-wide cache, so logos and figures repeated across documents are summarized once."""
+    global _summary_cache
+    if _summary_cache is None:
+        _summary_cache = ImageSummaryCache(max_entries)
+    return _summary_cache
@@ -0,0 +1,92 @@
+import os
+import json
+import hashlib
+import logging
+from typing import Any, Dict, List, Optional
+
+def file_hash(path: str, block_size: int = 1 << 20) -> str:
+    """sha256 of a file's bytes, read in blocks."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+class IngestManifest:
+    """
+    Record of ingested files (size, mtime, content hash, point ids), persisted as JSON so
+    re-running ingest_directory only processes new and changed files.
+
+    Files whose size and mtime match the manifest are treated as unchanged without reading
+    them; otherwise the content hash decides (a touched but identical file is not re-ingested).
+    """
+    def __init__(self, path: str):
+        self.logger = logging.getLogger(__name__)
+        self.path = path
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        if os.path.exists(path):
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    self.entries = json.load(f).get("files", {})
+            except (OSError, ValueError) as e:
+                self.logger.error(f"Could not read ingestion manifest {path}, starting fresh: {e}")
+
+    @staticmethod
+    def _key(document_path: str) -> str:
+        return os.path.abspath(document_path)
+
+    def get(self, document_path: str) -> Optional[Dict[str, Any]]:
+        return self.entries.get(self._key(document_path))
+
+    def status(self, document_path: str) -> str:
+        """Return "new", "unchanged" or "changed" for a file on disk."""
+        entry = self.get(document_path)
+        if entry is None:
+            return "new"
+        stat = os.stat(document_path)
+        if stat.st_size == entry["size"] and stat.st_mtime == entry["mtime"]:
+            return "unchanged"
+        if stat.st_size == entry["size"] and file_hash(document_path) == entry["sha256"]:
+            entry["mtime"] = stat.st_mtime
+            return "unchanged"
+        return "changed"
+
+    def plan(self, directory_path: str, files: List[str]) -> Dict[str, List[str]]:
+        """
+        Classify the files of a directory against the manifest.
+
+        Returns:
+            Dictionary with "new", "changed" and "unchanged" file paths, and "deleted" holding the
+            document paths recorded under this directory that no longer exist
+        """
+        plan = {"new": [], "changed": [], "unchanged": [], "deleted": []}
+        for document_path in files:
+            plan[self.status(document_path)].append(document_path)
+
+        current = {self._key(document_path) for document_path in files}
+        directory = self._key(directory_path)
+        for key, entry in self.entries.items():
+            if os.path.dirname(key) == directory and key not in current:
+                plan["deleted"].append(entry["document_path"])
+        return plan
+
+    def record(self, document_path: str, chunk_ids: List[str]) -> None:
+        stat = os.stat(document_path)
+        self.entries[self._key(document_path)] = {
+            "document_path": document_path,
+            "size": stat.st_size,
+            "mtime": stat.st_mtime,
+            "sha256": file_hash(document_path),
+            "chunk_ids": list(chunk_ids)
+        }
+
+    def remove(self, document_path: str) -> None:
+        self.entries.pop(self._key(document_path), None)
+
+    def save(self) -> None:
+        """Write the manifest atomically (temp file + rename)."""
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"version": 1, "files": self.entries}, f, indent=2)
+        os.replace(tmp_path, self.path)
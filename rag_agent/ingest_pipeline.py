@@ -0,0 +1,248 @@
+import time
+import asyncio
+import logging
+import functools
+import multiprocessing
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .doc_parser import MedicalDocParser
+from .content_processor import ContentProcessor
+
+_DONE = object()
+_worker_parsers: Dict[Tuple, MedicalDocParser] = {}
+
+def parse_to_markdown(
+        document_path: str,
+        output_dir: str,
+        parser_options: Optional[Dict[str, Any]] = None
+    ) -> Tuple[str, List[str]]:
+    """
+    Process-pool worker: parse one document and return (markdown with placeholders, image paths).
+    Markdown is returned instead of the docling document to keep the inter-process payload small.
+    """
+    parser_options = parser_options or {}
+    key = tuple(sorted(parser_options.items()))
+    parser = _worker_parsers.get(key)
+    if parser is None:
+        parser = _worker_parsers[key] = MedicalDocParser(**parser_options)
+    parsed_document, images = parser.parse_document(document_path, output_dir)
+    return ContentProcessor.export_markdown(parsed_document), images
+
+class StageStats:
+    """Busy time, item counts and input-queue depth (sampled per item) for one pipeline stage."""
+    def __init__(self, name: str, workers: int):
+        self.name = name
+        self.workers = workers
+        self.items = 0
+        self.failures = 0
+        self.busy_time = 0.0
+        self.depth_samples = 0
+        self.depth_total = 0
+        self.max_depth = 0
+
+    def sample_queue(self, depth: int) -> None:
+        self.depth_samples += 1
+        self.depth_total += depth
+        self.max_depth = max(self.max_depth, depth)
+
+    def record(self, elapsed: float, items: int = 1, ok: bool = True) -> None:
+        self.busy_time += elapsed
+        if ok:
+            self.items += items
+        else:
+            self.failures += items
+
+    def as_dict(self, wall_time: float) -> Dict[str, Any]:
+        return {
+            "items": self.items,
+            "failures": self.failures,
+            "workers": self.workers,
+            "busy_seconds": round(self.busy_time, 3),
+            "items_per_second": round(self.items / wall_time, 3) if wall_time else 0.0,
+            # Share of the stage's worker capacity spent busy; the bottleneck runs closest to 1.0
+            "utilization": round(self.busy_time / (wall_time * self.workers), 3) if wall_time else 0.0,
+            "avg_queue_depth": round(self.depth_total / self.depth_samples, 2) if self.depth_samples else 0.0,
+            "max_queue_depth": self.max_depth
+        }
+
+class IngestPipeline:
+    """
+    Staged ingestion: parsing in a process pool -> async LLM stage (image summaries and
+    chunking) -> batched embed/upsert consumer, connected by bounded queues so a slow
+    stage applies backpressure instead of buffering whole documents in memory.
+    """
+    def __init__(
+            self,
+            rag: Any,
+            parse_workers: int = 2,
+            llm_concurrency: int = 4,
+            queue_size: int = 4,
+            embed_batch_chunks: int = 256,
+            parse_executor: Optional[Executor] = None,
+            parse_fn: Callable[[str, str], Tuple[str, List[str]]] = parse_to_markdown
+        ):
+        self.logger = logging.getLogger(__name__)
+        self.rag = rag
+        self.parse_workers = parse_workers
+        self.llm_concurrency = llm_concurrency
+        self.queue_size = queue_size
+        self.embed_batch_chunks = embed_batch_chunks
+        self.parse_executor = parse_executor
+        self.parse_fn = parse_fn
+
+    @classmethod
+    def from_config(cls, rag: Any, **kwargs) -> "IngestPipeline":
+        rag_config = rag.config.rag
+        kwargs.setdefault("parse_fn", functools.partial(
+            parse_to_markdown, parser_options=MedicalDocParser.options_from_config(rag_config)
+        ))
+        return cls(
+            rag,
+            parse_workers=rag_config.ingest_parse_workers,
+            llm_concurrency=rag_config.ingest_llm_concurrency,
+            queue_size=rag_config.ingest_queue_size,
+            embed_batch_chunks=rag_config.ingest_embed_batch_chunks,
+            **kwargs
+        )
+
+    async def run(self, files: List[str], metadata: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        Ingest files concurrently; metadata (e.g. ingest_batch) is stored with every chunk.
+
+        Returns:
+            Dictionary with per-file results and per-stage statistics
+        """
+        start_time = time.time()
+        results = {path: {"file": path, "success": False, "chunks_processed": 0} for path in files}
+        stats = {
+            "parse": StageStats("parse", self.parse_workers),
+            "llm": StageStats("llm", self.llm_concurrency),
+            "embed": StageStats("embed", 1)
+        }
+
+        path_queue = asyncio.Queue()
+        llm_queue = asyncio.Queue(maxsize=self.queue_size)
+        embed_queue = asyncio.Queue(maxsize=self.queue_size)
+
+        for path in files:
+            if self.rag.vector_store.sync_source(path):
+                self.logger.info(f"Already in vector store, skipping: {path}")
+                results[path].update(success=True, skipped=True)
+            else:
+                path_queue.put_nowait(path)
+
+        executor = self.parse_executor or ProcessPoolExecutor(
+            max_workers=self.parse_workers,
+            mp_context=multiprocessing.get_context("spawn")
+        )
+        try:
+            parsers = [
+                asyncio.create_task(self._parse_worker(path_queue, llm_queue, executor, stats["parse"], results))
+                for _ in range(self.parse_workers)
+            ]
+            llm_workers = [
+                asyncio.create_task(self._llm_worker(llm_queue, embed_queue, stats["llm"], results))
+                for _ in range(self.llm_concurrency)
+            ]
+            embedder = asyncio.create_task(self._embed_consumer(embed_queue, stats["embed"], results, metadata))
+
+            await asyncio.gather(*parsers)
+            for _ in llm_workers:
+                await llm_queue.put(_DONE)
+            await asyncio.gather(*llm_workers)
+            await embed_queue.put(_DONE)
+            await embedder
+        finally:
+            if self.parse_executor is None:
+                executor.shutdown(cancel_futures=True)
+
+        wall_time = time.time() - start_time
+        stage_stats = {name: stage.as_dict(wall_time) for name, stage in stats.items()}
+        bottleneck = max(stage_stats, key=lambda name: stage_stats[name]["utilization"])
+        self.logger.info(f"Ingested {len(files)} files in {wall_time:.1f}s; bottleneck stage: {bottleneck}")
+        for name, stage in stage_stats.items():
+            self.logger.info(f"   {name}: {stage}")
+
+        return {
+            "files": list(results.values()),
+            "stage_stats": stage_stats,
+            "bottleneck": bottleneck,
+            "processing_time": wall_time
+        }
+
+    async def _parse_worker(self, path_queue, llm_queue, executor, stage, results) -> None:
+        loop = asyncio.get_running_loop()
+        output_dir = self.rag.parsed_content_dir
+        while True:
+            try:
+                path = path_queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            stage.sample_queue(path_queue.qsize() + 1)
+            started = time.perf_counter()
+            try:
+                markdown, images = await loop.run_in_executor(executor, self.parse_fn, path, output_dir)
+            except Exception as e:
+                self.logger.error(f"Error parsing {path}: {e}")
+                results[path]["error"] = str(e)
+                stage.record(time.perf_counter() - started, ok=False)
+                continue
+            stage.record(time.perf_counter() - started)
+            await llm_queue.put((path, markdown, images))
+
+    async def _llm_worker(self, llm_queue, embed_queue, stage, results) -> None:
+        processor = self.rag.content_processor
+        while True:
+            item = await llm_queue.get()
+            if item is _DONE:
+                return
+            stage.sample_queue(llm_queue.qsize() + 1)
+            path, markdown, images = item
+            started = time.perf_counter()
+            try:
+                image_summaries = await processor.summarize_images_async(images)
+                formatted_document = processor.insert_image_summaries(markdown, image_summaries)
+                chunks = await processor.chunk_document_async(formatted_document)
+            except Exception as e:
+                self.logger.error(f"Error chunking {path}: {e}")
+                results[path]["error"] = str(e)
+                stage.record(time.perf_counter() - started, ok=False)
+                continue
+            stage.record(time.perf_counter() - started)
+            await embed_queue.put((path, chunks))
+
+    async def _embed_consumer(self, embed_queue, stage, results, metadata=None) -> None:
+        batch: List[Tuple[str, List[str]]] = []
+        batch_chunks = 0
+        done = False
+        while not done:
+            item = await embed_queue.get()
+            if item is _DONE:
+                done = True
+            else:
+                stage.sample_queue(embed_queue.qsize() + 1)
+                batch.append(item)
+                batch_chunks += len(item[1])
+            # Flush once the batch is big enough or nothing else is waiting
+            if batch and (done or batch_chunks >= self.embed_batch_chunks or embed_queue.empty()):
+                await self._flush(batch, stage, results, metadata)
+                batch, batch_chunks = [], 0
+
+    async def _flush(self, batch, stage, results, metadata=None) -> None:
+        started = time.perf_counter()
+        try:
+            point_ids = await asyncio.to_thread(
+                self.rag.vector_store.create_vectorstore_batch,
+                [(chunks, path) for path, chunks in batch],
+                metadata
+            )
+        except Exception as e:
+            self.logger.error(f"Error upserting batch of {len(batch)} documents: {e}")
+            for path, _ in batch:
+                results[path]["error"] = str(e)
+            stage.record(time.perf_counter() - started, items=len(batch), ok=False)
+            return
+        stage.record(time.perf_counter() - started, items=len(batch))
+        for path, chunks in batch:
+            results[path].update(success=True, chunks_processed=len(chunks), chunk_ids=point_ids.get(path, []))
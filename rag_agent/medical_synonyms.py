@@ -0,0 +1,191 @@
+import re
+import json
+from typing import Dict, List, Optional, Tuple
+
+# Common Vietnamese / English medical abbreviations and terms with their expansions.
+# Keys containing uppercase letters (abbreviations) match case-sensitively so that short
+# everyday words are not mistaken for them; lowercase keys match case-insensitively.
+# Multi-word keys are matched as whole phrases.
+MEDICAL_SYNONYMS: Dict[str, List[str]] = {
+    # Cardiovascular
+    "THA": ["tăng huyết áp", "hypertension"],
+    "tăng huyết áp": ["hypertension", "high blood pressure"],
+    "HTN": ["hypertension", "tăng huyết áp"],
+    "hypertension": ["tăng huyết áp", "high blood pressure"],
+    "NMCT": ["nhồi máu cơ tim", "myocardial infarction"],
+    "nhồi máu cơ tim": ["myocardial infarction", "heart attack"],
+    "MI": ["myocardial infarction", "nhồi máu cơ tim"],
+    "AMI": ["acute myocardial infarction", "nhồi máu cơ tim cấp"],
+    "HCVC": ["hội chứng vành cấp", "acute coronary syndrome"],
+    "ACS": ["acute coronary syndrome", "hội chứng vành cấp"],
+    "BMV": ["bệnh mạch vành", "coronary artery disease"],
+    "CAD": ["coronary artery disease", "bệnh mạch vành"],
+    "suy tim": ["heart failure"],
+    "HF": ["heart failure", "suy tim"],
+    "CHF": ["congestive heart failure", "suy tim sung huyết"],
+    "RN": ["rung nhĩ", "atrial fibrillation"],
+    "rung nhĩ": ["atrial fibrillation"],
+    "AF": ["atrial fibrillation", "rung nhĩ"],
+    "ĐQ": ["đột quỵ", "stroke"],
+    "TBMMN": ["tai biến mạch máu não", "stroke", "đột quỵ"],
+    "đột quỵ": ["stroke", "cerebrovascular accident"],
+    "CVA": ["cerebrovascular accident", "stroke"],
+    "TIA": ["transient ischemic attack", "cơn thiếu máu não thoáng qua"],
+    "HA": ["huyết áp", "blood pressure"],
+    "BP": ["blood pressure", "huyết áp"],
+    "ECG": ["electrocardiogram", "điện tâm đồ"],
+    # Endocrine / metabolic
+    "ĐTĐ": ["đái tháo đường", "diabetes mellitus"],
+    "đái tháo đường": ["diabetes mellitus", "tiểu đường"],
+    "tiểu đường": ["diabetes mellitus", "đái tháo đường"],
+    "DM": ["diabetes mellitus", "đái tháo đường"],
+    "T2DM": ["type 2 diabetes mellitus", "đái tháo đường típ 2"],
+    "HbA1c": ["glycated hemoglobin", "hemoglobin A1c"],
+    "RLLM": ["rối loạn lipid máu", "dyslipidemia"],
+    "rối loạn lipid máu": ["dyslipidemia", "hyperlipidemia"],
+    "BMI": ["body mass index", "chỉ số khối cơ thể"],
+    # Respiratory
+    "BPTNMT": ["bệnh phổi tắc nghẽn mạn tính", "COPD", "chronic obstructive pulmonary disease"],
+    "COPD": ["chronic obstructive pulmonary disease", "bệnh phổi tắc nghẽn mạn tính"],
+    "hen phế quản": ["asthma", "bronchial asthma"],
+    "VP": ["viêm phổi", "pneumonia"],
+    "viêm phổi": ["pneumonia"],
+    "TB": ["tuberculosis", "lao"],
+    "lao phổi": ["pulmonary tuberculosis"],
+    "ARDS": ["acute respiratory distress syndrome", "hội chứng suy hô hấp cấp tiến triển"],
+    # Renal / hepatic / GI
+    "BTM": ["bệnh thận mạn", "chronic kidney disease"],
+    "bệnh thận mạn": ["chronic kidney disease", "CKD"],
+    "CKD": ["chronic kidney disease", "bệnh thận mạn"],
+    "AKI": ["acute kidney injury", "tổn thương thận cấp"],
+    "eGFR": ["estimated glomerular filtration rate", "mức lọc cầu thận ước tính"],
+    "XHTH": ["xuất huyết tiêu hóa", "gastrointestinal bleeding"],
+    "GERD": ["gastroesophageal reflux disease", "trào ngược dạ dày thực quản"],
+    "VGB": ["viêm gan B", "hepatitis B"],
+    "VGC": ["viêm gan C", "hepatitis C"],
+    "xơ gan": ["liver cirrhosis", "cirrhosis"],
+    # Infectious / other
+    "NKH": ["nhiễm khuẩn huyết", "sepsis"],
+    "nhiễm khuẩn huyết": ["sepsis", "nhiễm trùng huyết"],
+    "NKTN": ["nhiễm khuẩn tiết niệu", "urinary tract infection"],
+    "UTI": ["urinary tract infection", "nhiễm khuẩn tiết niệu"],
+    "HIV": ["human immunodeficiency virus"],
+    "SXHD": ["sốt xuất huyết Dengue", "dengue hemorrhagic fever"],
+    "UT": ["ung thư", "cancer"],
+    "ung thư": ["cancer", "malignancy"],
+    "UTV": ["ung thư vú", "breast cancer"],
+    "UTP": ["ung thư phổi", "lung cancer"],
+    "KS": ["kháng sinh", "antibiotics"],
+    "kháng sinh": ["antibiotics", "antimicrobial therapy"],
+    "NSAID": ["non-steroidal anti-inflammatory drug", "thuốc chống viêm không steroid"],
+    "ACEi": ["angiotensin-converting enzyme inhibitor", "thuốc ức chế men chuyển"],
+    "ARB": ["angiotensin receptor blocker", "thuốc chẹn thụ thể angiotensin"],
+    "CCB": ["calcium channel blocker", "thuốc chẹn kênh canxi"],
+}
+
+# Abbreviations with several common meanings: the LLM should disambiguate from context
+AMBIGUOUS_ABBREVIATIONS: Dict[str, List[str]] = {
+    "MS": ["multiple sclerosis", "mitral stenosis"],
+    "PE": ["pulmonary embolism", "pleural effusion"],
+    "CA": ["cancer", "calcium", "cardiac arrest"],
+    "PID": ["pelvic inflammatory disease", "primary immunodeficiency"],
+    "RA": ["rheumatoid arthritis", "right atrium"],
+}
+
+_TOKEN_PATTERN = re.compile(r"\w+", re.UNICODE)
+
+def tokenize(text: str) -> List[Tuple[str, str, int, int]]:
+    """Split text into (raw token, casefolded token, start, end) tuples."""
+    return [(m.group(0), m.group(0).casefold(), m.start(), m.end()) for m in _TOKEN_PATTERN.finditer(text)]
+
+def _key_tokens(term: str) -> List[str]:
+    case_sensitive = term != term.casefold()
+    return [raw if case_sensitive else folded for raw, folded, _, _ in tokenize(term)]
+
+class SynonymIndex:
+    """
+    Token-level trie over synonym keys, so single- and multi-word terms are found in one
+    left-to-right scan with longest-match semantics.
+    """
+    _END = "$"
+
+    def __init__(self, synonyms: Dict[str, List[str]], ambiguous: Optional[Dict[str, List[str]]] = None):
+        self.root: Dict = {}
+        self.size = 0
+        for term, expansions in synonyms.items():
+            self.add(term, expansions)
+        self.ambiguous = dict(ambiguous or {})
+
+    @classmethod
+    def from_json(cls, path: str) -> "SynonymIndex":
+        """Load {"synonyms": {term: [expansions]}, "ambiguous": {abbr: [senses]}} from disk."""
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return cls(data.get("synonyms", {}), data.get("ambiguous", {}))
+
+    def add(self, term: str, expansions: List[str]) -> None:
+        node = self.root
+        for token in _key_tokens(term):
+            node = node.setdefault(token, {})
+        if self._END not in node:
+            self.size += 1
+        node[self._END] = list(expansions)
+
+    @staticmethod
+    def _child(node: Dict, raw: str, folded: str) -> Optional[Dict]:
+        child = node.get(raw)
+        return child if child is not None else node.get(folded)
+
+    def find(self, text: str) -> List[Tuple[int, int, List[str]]]:
+        """Longest non-overlapping matches as (start_char, end_char, expansions)."""
+        tokens = tokenize(text)
+        matches = []
+        i = 0
+        while i < len(tokens):
+            node = self.root
+            best = None
+            j = i
+            while j < len(tokens):
+                node = self._child(node, tokens[j][0], tokens[j][1])
+                if node is None:
+                    break
+                j += 1
+                if self._END in node:
+                    best = (j, node[self._END])
+            if best:
+                end_index, expansions = best
+                matches.append((tokens[i][2], tokens[end_index - 1][3], expansions))
+                i = end_index
+            else:
+                i += 1
+        return matches
+
+    def contains(self, term: str) -> bool:
+        node = self.root
+        for raw, folded, _, _ in tokenize(term):
+            node = self._child(node, raw, folded)
+            if node is None:
+                return False
+        return self._END in node
+
+    def ambiguous_terms(self, text: str) -> List[str]:
+        return [raw for raw, _, _, _ in tokenize(text) if raw in self.ambiguous]
+
+    def unknown_abbreviations(self, text: str) -> List[str]:
+        """All-caps tokens (e.g. "XYZ") that the dictionary cannot expand."""
+        return [
+            raw for raw, _, _, _ in tokenize(text)
+            if len(raw) >= 2 and raw.isupper() and raw not in self.ambiguous and not self.contains(raw)
+        ]
+
+    def __len__(self) -> int:
+        return self.size
+
+_default_index = None
+
+def get_default_index() -> SynonymIndex:
+    """Shared index over the built-in dictionary."""
+    global _default_index
+    if _default_index is None:
+        _default_index = SynonymIndex(MEDICAL_SYNONYMS, AMBIGUOUS_ABBREVIATIONS)
+    return _default_index
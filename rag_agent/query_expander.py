@@ -1,6 +1,8 @@
 import logging
+import threading
 from typing import List, Dict, Any
-from utils.call_llm import call_llm
+from utils.call_llm import call_llm, call_llm_async
+from .medical_synonyms import SynonymIndex, get_default_index
 
 class QueryExpander:
     """
@@ -10,7 +12,15 @@ class QueryExpander:
         self.logger = logging.getLogger(f"{self.__module__}")
         self.config = config
         # self.model = config.rag.llm # Removed
-        
+        self.mode = config.rag.query_expansion_mode
+        self.llm_min_words = config.rag.query_expansion_llm_min_words
+        if config.rag.synonym_dict_path:
+            self.index = SynonymIndex.from_json(config.rag.synonym_dict_path)
+        else:
+            self.index = get_default_index()
+        self._stats_lock = threading.Lock()
+        self.counters = {"local": 0, "llm": 0, "none": 0}
+
     def expand_query(self, original_query: str) -> Dict[str, Any]:
         """
         Expand the original query with relevant medical terms.
@@ -19,21 +29,80 @@ class QueryExpander:
             original_query: The user's original query
             
         Returns:
-            Dictionary with original and expanded queries
+            Dictionary with original and expanded queries, and which engine produced
+            the expansion ("local", "llm" or "none")
         """
         self.logger.info(f"Expanding query: {original_query}")
-        
-        # Generate expansions
-        expanded_query = self._generate_expansions(original_query)
-        
+
+        if self._uses_llm(original_query):
+            return self._result(original_query, self._generate_expansions(original_query), "llm")
+        return self._local_result(original_query)
+
+    async def expand_query_async(self, original_query: str) -> Dict[str, Any]:
+        """Async variant of expand_query; the LLM fallback goes through call_llm_async."""
+        self.logger.info(f"Expanding query: {original_query}")
+
+        if self._uses_llm(original_query):
+            expansion = await call_llm_async(self._build_prompt(original_query))
+            return self._result(original_query, expansion, "llm")
+        return self._local_result(original_query)
+
+    def _uses_llm(self, query: str) -> bool:
+        return self.mode == "llm" or (self.mode == "hybrid" and self._needs_llm(query))
+
+    def _local_result(self, query: str) -> Dict[str, Any]:
+        expanded_query = self._expand_locally(query)
+        return self._result(query, expanded_query, "local" if expanded_query != query else "none")
+
+    def _result(self, original_query: str, expanded_query: str, source: str) -> Dict[str, Any]:
+        with self._stats_lock:
+            self.counters[source] += 1
+
         return {
             "original_query": original_query,
-            "expanded_query": expanded_query
+            "expanded_query": expanded_query,
+            "expansion_source": source
+        }
+
+    def _needs_llm(self, query: str) -> bool:
+        """Heuristic: long queries and abbreviations the dictionary cannot resolve go to the LLM."""
+        if len(query.split()) >= self.llm_min_words:
+            return True
+        return bool(self.index.ambiguous_terms(query) or self.index.unknown_abbreviations(query))
+
+    def _expand_locally(self, query: str) -> str:
+        """Append dictionary expansions in parentheses after each matched term."""
+        folded_query = query.casefold()
+        parts = []
+        last = 0
+        for start, end, expansions in self.index.find(query):
+            new_terms = [e for e in expansions if e.casefold() not in folded_query]
+            if not new_terms:
+                continue
+            parts.append(query[last:end])
+            parts.append(f" ({', '.join(new_terms)})")
+            last = end
+        parts.append(query[last:])
+        return "".join(parts)
+
+    def stats(self) -> Dict[str, Any]:
+        """Expansion counts per engine and the share of queries that skipped the LLM."""
+        with self._stats_lock:
+            counters = dict(self.counters)
+        total = sum(counters.values())
+        return {
+            **counters,
+            "total": total,
+            "local_hit_rate": counters["local"] / total if total else 0.0,
+            "llm_rate": counters["llm"] / total if total else 0.0
         }
     
     def _generate_expansions(self, query: str) -> str:
         """Use LLM to expand query with medical terminology."""
-        prompt = f"""
+        return call_llm(self._build_prompt(query))
+
+    def _build_prompt(self, query: str) -> str:
+        return f"""
         As a medical expert, expand the following query with relevant medical terminology, 
         synonyms, and related concepts that would help in retrieving relevant medical information:
         
@@ -44,6 +113,3 @@ class QueryExpander:
         If the user query asks about answering in tabular format, include that in the expanded query and do not answer in tabular format yourself.
         Provide only the expanded query without explanations.
         """
-        expansion = call_llm(prompt)
-        
-        return expansion
@@ -1,9 +1,121 @@
 import os
 import re
+import time
+import queue
 import logging
+import threading
+from concurrent.futures import Future
 from pathlib import Path
-from typing import List, Dict, Any, Optional, Union
+from typing import List, Dict, Any, Optional, Union, Tuple
 from sentence_transformers import CrossEncoder
+from .doc_parser import image_extension
+
+class RerankerService:
+    """
+    Process-wide cross-encoder scoring service shared by every Reranker.
+    Pairs from concurrent rerank requests are merged into one forward pass; within a pass
+    pairs are sorted by length so each predict batch holds similar lengths (less padding).
+    """
+    def __init__(self, model, batch_size: int = 32, window_ms: float = 10):
+        self.logger = logging.getLogger(__name__)
+        self.model = model
+        self.batch_size = batch_size
+        self.window = window_ms / 1000.0
+        self.requests = queue.Queue()
+        self.worker = threading.Thread(target=self._run, name="reranker-service", daemon=True)
+        self.worker.start()
+
+    def score(self, pairs: List[Tuple[str, str]]) -> List[float]:
+        """Relevance score for each (query, document) pair, in input order."""
+        if not pairs:
+            return []
+        future = Future()
+        self.requests.put((list(pairs), future))
+        return future.result()
+
+    def _predict(self, pairs: List[Tuple[str, str]]) -> List[float]:
+        """Score pairs in length-sorted batches and restore the original order."""
+        order = sorted(range(len(pairs)), key=lambda i: len(pairs[i][0]) + len(pairs[i][1]))
+        sorted_scores = self.model.predict([pairs[i] for i in order], batch_size=self.batch_size)
+        scores = [0.0] * len(pairs)
+        for position, index in enumerate(order):
+            scores[index] = float(sorted_scores[position])
+        return scores
+
+    def _collect(self):
+        batch = [self.requests.get()]
+        deadline = time.monotonic() + self.window
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self.requests.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            combined = [pair for pairs, _ in batch for pair in pairs]
+            try:
+                scores = self._predict(combined)
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+
+            offset = 0
+            for pairs, future in batch:
+                future.set_result(scores[offset:offset + len(pairs)])
+                offset += len(pairs)
+
+def load_cross_encoder(model_name: str, backend: str = "torch", onnx_dir: Optional[str] = None,
+                       quantization: str = "avx512_vnni"):
+    """
+    Load a CrossEncoder on the requested backend.
+    "onnx" runs the exported graph on ONNX Runtime; "onnx-int8" additionally applies dynamic
+    int8 quantization. Exported graphs are saved under onnx_dir and reused on later loads.
+    """
+    if backend == "torch":
+        return CrossEncoder(model_name)
+    if backend not in ("onnx", "onnx-int8"):
+        raise ValueError(f"Unknown reranker backend: {backend}")
+
+    export_dir = os.path.join(onnx_dir or "output/reranker_onnx", model_name.replace("/", "__"))
+    if not os.path.exists(os.path.join(export_dir, "onnx", "model.onnx")):
+        # Export the PyTorch weights to an ONNX graph once
+        CrossEncoder(model_name, backend="onnx").save_pretrained(export_dir)
+
+    if backend == "onnx":
+        return CrossEncoder(export_dir, backend="onnx")
+
+    quantized_file = f"model_qint8_{quantization}.onnx"
+    if not os.path.exists(os.path.join(export_dir, "onnx", quantized_file)):
+        from sentence_transformers import export_dynamic_quantized_onnx_model
+        export_dynamic_quantized_onnx_model(
+            CrossEncoder(export_dir, backend="onnx"),
+            quantization_config=quantization,
+            model_name_or_path=export_dir
+        )
+    return CrossEncoder(export_dir, backend="onnx", model_kwargs={"file_name": f"onnx/{quantized_file}"})
+
+_services = {}
+_services_lock = threading.Lock()
+
+def get_reranker_service(model_name: str, batch_size: int = 32, window_ms: float = 10,
+                         backend: str = "torch", onnx_dir: Optional[str] = None,
+                         quantization: str = "avx512_vnni") -> RerankerService:
+    """Return the shared service for this model and backend, loading the weights once per process."""
+    key = (model_name, backend)
+    with _services_lock:
+        service = _services.get(key)
+        if service is None:
+            model = load_cross_encoder(model_name, backend, onnx_dir, quantization)
+            service = RerankerService(model, batch_size=batch_size, window_ms=window_ms)
+            _services[key] = service
+    return service
 
 class Reranker:
     """
@@ -21,11 +133,21 @@ class Reranker:
         # Load the cross-encoder model for reranking
         # For medical data, specialized models like 'pritamdeka/S-PubMedBert-MS-MARCO'
         # would be ideal, but using a general one here for simplicity
+        # The model is shared process-wide, so sessions don't duplicate its weights
         try:
             self.model_name = config.rag.reranker_model
             self.logger.info(f"Loading reranker model: {self.model_name}")
-            self.model = CrossEncoder(self.model_name)
+            self.service = get_reranker_service(
+                self.model_name,
+                batch_size=getattr(config.rag, "reranker_batch_size", 32),
+                window_ms=getattr(config.rag, "reranker_batch_window_ms", 10),
+                backend=getattr(config.rag, "reranker_backend", "torch"),
+                onnx_dir=getattr(config.rag, "reranker_onnx_dir", None),
+                quantization=getattr(config.rag, "reranker_onnx_quantization", "avx512_vnni")
+            )
+            self.model = self.service.model
             self.top_k = config.rag.reranker_top_k
+            self.image_extension = image_extension(config.rag)
         except Exception as e:
             self.logger.error(f"Error loading reranker model: {e}")
             raise
@@ -79,7 +201,7 @@ class Reranker:
             pairs = [(query, doc["content"]) for doc in documents]
             
             # Get relevance scores
-            scores = self.model.predict(pairs)
+            scores = self.service.score(pairs)
             
             # Add scores to documents
             for i, score in enumerate(scores):
@@ -105,8 +227,8 @@ class Reranker:
                     counter_value = int(match.group(1))
                     # Create picture path based on document source and counter
                     doc_basename = os.path.splitext(doc['source'])[0]  # Remove file extension
-                    # picture_path = Path(os.path.abspath(parsed_content_dir + "/" + f"{doc_basename}-picture-{counter_value}.png")).as_uri()
-                    picture_path = os.path.join("http://localhost:8000/", parsed_content_dir + "/" + f"{doc_basename}-picture-{counter_value}.png")
+                    # picture_path = Path(os.path.abspath(parsed_content_dir + "/" + f"{doc_basename}-picture-{counter_value}.{self.image_extension}")).as_uri()
+                    picture_path = os.path.join("http://localhost:8000/", parsed_content_dir + "/" + f"{doc_basename}-picture-{counter_value}.{self.image_extension}")
                     picture_reference_paths.append(picture_path)
             
             return reranked_docs, picture_reference_paths
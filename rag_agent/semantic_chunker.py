@@ -0,0 +1,73 @@
+from typing import List, Sequence
+
+import numpy as np
+
+def split_oversized(section: str, max_words: int) -> List[str]:
+    """Split a section longer than max_words on paragraph boundaries, then into word windows."""
+    if len(section.split()) <= max_words:
+        return [section]
+
+    pieces, current, current_words = [], [], 0
+    for paragraph in section.split("\n\n"):
+        paragraph_words = paragraph.split()
+        if not paragraph_words:
+            continue
+        if len(paragraph_words) > max_words:
+            if current:
+                pieces.append("\n\n".join(current))
+                current, current_words = [], 0
+            pieces.extend(
+                " ".join(paragraph_words[i:i + max_words]) for i in range(0, len(paragraph_words), max_words)
+            )
+            continue
+        if current_words + len(paragraph_words) > max_words:
+            pieces.append("\n\n".join(current))
+            current, current_words = [], 0
+        current.append(paragraph)
+        current_words += len(paragraph_words)
+    if current:
+        pieces.append("\n\n".join(current))
+    return pieces
+
+def adjacent_similarity(embeddings: Sequence[Sequence[float]]) -> np.ndarray:
+    """Cosine similarity between each section embedding and the next one (length n - 1)."""
+    vectors = np.asarray(embeddings, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    vectors = vectors / np.where(norms == 0, 1.0, norms)
+    return np.einsum("ij,ij->i", vectors[:-1], vectors[1:])
+
+def merge_sections(
+        sections: List[str],
+        embeddings: Sequence[Sequence[float]],
+        min_words: int = 256,
+        max_words: int = 512,
+        similarity_threshold: float = 0.5
+    ) -> List[str]:
+    """
+    Greedily merge adjacent sections into chunks of at most max_words.
+
+    A section joins the current chunk if it fits and either the chunk is still below
+    min_words or the section is similar enough (cosine) to the previous one. A short
+    final chunk is folded into the one before it when that stays within max_words.
+    """
+    if not sections:
+        return []
+
+    similarity = adjacent_similarity(embeddings) if len(sections) > 1 else np.zeros(0, dtype=np.float32)
+    words = np.fromiter((len(section.split()) for section in sections), dtype=np.int64, count=len(sections))
+
+    groups = [[0]]
+    group_words = [int(words[0])]
+    for i in range(1, len(sections)):
+        fits = group_words[-1] + words[i] <= max_words
+        if fits and (group_words[-1] < min_words or similarity[i - 1] >= similarity_threshold):
+            groups[-1].append(i)
+            group_words[-1] += int(words[i])
+        else:
+            groups.append([i])
+            group_words.append(int(words[i]))
+
+    if len(groups) > 1 and group_words[-1] < min_words and group_words[-2] + group_words[-1] <= max_words:
+        groups[-2].extend(groups.pop())
+
+    return ["\n".join(sections[i].strip() for i in group) for group in groups]
@@ -1,7 +1,8 @@
 import os
 import logging
+import threading
 from uuid import uuid4
-from typing import List, Dict, Any, Tuple, Optional
+from typing import List, Dict, Any, Tuple, Optional, Union
 
 from qdrant_client import QdrantClient, models
 from qdrant_client.http.models import (
@@ -14,12 +15,70 @@ from qdrant_client.http.models import (
     MultiVectorConfig,
     MultiVectorComparator
 )
-from utils.get_embedding import get_all_embeddings, get_embedding
+from utils.get_embedding import get_all_embeddings, get_embedding, get_sparse_embedding
+from utils.embedding_cache import content_hash
+from .ingest_manifest import file_hash
+
+RETRIEVAL_MODES = ("colbert", "rrf", "dense")
+
+# Keyword payload fields indexed on the server, so retrieval can be filtered to one source,
+# research session, blueprint section or ingestion batch, and the deduplication lookup of every
+# ingest (content_hash) runs without scanning the collection
+PAYLOAD_INDEX_FIELDS = (
+    "source", "source_path", "source_paths", "session_id", "section", "ingest_batch", "content_hash"
+)
+# Metadata fields that scope deduplication: a source or chunk is stored once per session and section
+SCOPE_FIELDS = ("session_id", "section")
+
+# Local on-disk Qdrant storage can only be opened once per process, so clients are shared
+_clients = {}
+_clients_lock = threading.Lock()
+
+class _SerializedClient:
+    """
+    Local (on-disk or in-memory) QdrantClient whose calls are serialized with a lock.
+    Local mode is not thread-safe: concurrent upserts (e.g. research ingested from parallel
+    worker threads, or several app sessions sharing one store) corrupt the collection.
+    """
+    def __init__(self, client: QdrantClient):
+        self._client = client
+        self._lock = threading.RLock()
+
+    def __getattr__(self, name: str) -> Any:
+        attr = getattr(self._client, name)
+        if not callable(attr):
+            return attr
+
+        def locked(*args, **kwargs):
+            with self._lock:
+                return attr(*args, **kwargs)
+        return locked
+
+def _get_client(vector_url: Optional[str], vector_local_path: str) -> Union[QdrantClient, _SerializedClient]:
+    """Return a Qdrant client for a server URL, an on-disk path, or a fresh in-memory store."""
+    if vector_url:
+        key = ("url", vector_url)
+    elif vector_local_path and vector_local_path != ":memory:":
+        key = ("path", os.path.abspath(vector_local_path))
+    else:
+        return _SerializedClient(QdrantClient(":memory:"))
+
+    with _clients_lock:
+        client = _clients.get(key)
+        if client is None:
+            if key[0] == "url":
+                client = QdrantClient(url=vector_url)
+            else:
+                os.makedirs(key[1], exist_ok=True)
+                client = _SerializedClient(QdrantClient(path=key[1]))
+            _clients[key] = client
+    return client
 
 class VectorStore:
     """
-    Create vector store, ingest documents, retrieve relevant documents using Qdrant (in-memory)
-    with Hybrid Search (Dense + Sparse) and Late Interaction Reranking (ColBERT).
+    Create vector store, ingest documents, retrieve relevant documents using Qdrant
+    (on-disk, server or in-memory) with Hybrid Search (Dense + Sparse) and
+    Late Interaction Reranking (ColBERT).
     """
     def __init__(self, config):
         self.logger = logging.getLogger(__name__)
@@ -32,9 +91,24 @@ class VectorStore:
         self.dense_vector_name = "all-MiniLM-L6-v2"
         self.sparse_vector_name = "bm25"
         self.colbert_vector_name = "colbertv2.0"
+        self.colbert_storage = getattr(config.rag, "colbert_storage", "float32")
+        self.set_retrieval_plan(getattr(config.rag, "retrieval_plan", None))
 
-        # In-memory Qdrant client
-        self.client = QdrantClient(":memory:")
+        self.vector_url = getattr(config.rag, "vector_url", None)
+        self.vector_local_path = config.rag.vector_local_path
+        self.client = _get_client(self.vector_url, self.vector_local_path)
+        self._payload_indexed = False
+
+    def set_retrieval_plan(self, plan: Any = None) -> None:
+        """Apply a RAGConfig.RetrievalPlan; None (or missing fields) keeps the default ColBERT plan."""
+        mode = getattr(plan, "mode", None) or "colbert"
+        if mode not in RETRIEVAL_MODES:
+            raise ValueError(f"Unknown retrieval mode: {mode}")
+        self.retrieval_mode = mode
+        self.dense_prefetch_limit = getattr(plan, "dense_limit", None) or self.retrieval_top_k * 2
+        self.sparse_prefetch_limit = getattr(plan, "sparse_limit", None) or self.retrieval_top_k * 2
+        self.retrieval_limit = getattr(plan, "limit", None) or self.retrieval_top_k
+        self.retrieval_min_score = getattr(plan, "min_score", None)
 
     def _does_collection_exist(self) -> bool:
         """Check if the collection already exists in Qdrant."""
@@ -46,6 +120,38 @@ class VectorStore:
             self.logger.error(f"Error checking for collection existence: {e}")
             return False
 
+    def _colbert_vector_params(self) -> VectorParams:
+        """ColBERT multivector config for the configured storage mode."""
+        multivector_config = MultiVectorConfig(comparator=MultiVectorComparator.MAX_SIM)
+        if self.colbert_storage == "float32":
+            return VectorParams(
+                size=128, # ColBERTv2.0 dimension
+                distance=Distance.COSINE,
+                multivector_config=multivector_config
+            )
+
+        if self.colbert_storage == "int8":
+            quantization_config = models.ScalarQuantization(
+                scalar=models.ScalarQuantizationConfig(type=models.ScalarType.INT8, always_ram=True)
+            )
+        elif self.colbert_storage == "binary":
+            quantization_config = models.BinaryQuantization(
+                binary=models.BinaryQuantizationConfig(always_ram=True)
+            )
+        else:
+            raise ValueError(f"Unknown colbert_storage mode: {self.colbert_storage}")
+
+        # ColBERT is only used to rerank prefetched candidates, so no HNSW graph is needed
+        return VectorParams(
+            size=128,
+            distance=Distance.COSINE,
+            multivector_config=multivector_config,
+            datatype=models.Datatype.FLOAT16,
+            on_disk=True,
+            quantization_config=quantization_config,
+            hnsw_config=models.HnswConfigDiff(m=0)
+        )
+
     def _create_collection(self):
         """Create a new collection with Dense, Sparse, and Late Interaction vector configs."""
         try:
@@ -54,13 +160,7 @@ class VectorStore:
                     size=self.dense_dim,
                     distance=Distance.COSINE
                 ),
-                self.colbert_vector_name: VectorParams(
-                    size=128, # ColBERTv2.0 dimension
-                    distance=Distance.COSINE,
-                    multivector_config=MultiVectorConfig(
-                        comparator=MultiVectorComparator.MAX_SIM
-                    )
-                )
+                self.colbert_vector_name: self._colbert_vector_params()
             }
 
             sparse_vectors_config = {
@@ -80,47 +180,291 @@ class VectorStore:
         except Exception as e:
             self.logger.error(f"Error creating collection: {e}")
             raise e
+        self.ensure_payload_indexes()
+
+    def ensure_payload_indexes(self) -> None:
+        """
+        Create keyword indexes on PAYLOAD_INDEX_FIELDS (idempotent). Only a Qdrant server
+        uses payload indexes; the local on-disk/in-memory store filters without them.
+        """
+        if self._payload_indexed or not self.vector_url:
+            return
+        for field in PAYLOAD_INDEX_FIELDS:
+            try:
+                self.client.create_payload_index(
+                    collection_name=self.collection_name,
+                    field_name=field,
+                    field_schema=models.PayloadSchemaType.KEYWORD
+                )
+            except Exception as e:
+                self.logger.error(f"Error creating payload index on {field}: {e}")
+                return
+        self._payload_indexed = True
             
     def load_vectorstore(self):
         """
         Check if vectorstore is ready.
-        For in-memory, this just verifies the collection exists (if created).
+        This verifies the collection exists (persisted or created in this session).
         """
         if not self._does_collection_exist():
             self.logger.warning(f"Collection {self.collection_name} does not exist. Please ingest documents first.")
             return None
-            
-        self.logger.info(f"Vectorstore (in-memory) is ready")
+
+        # Collections created before payload indexing get their indexes here
+        self.ensure_payload_indexes()
+        self.logger.info(f"Vectorstore ({self.vector_url or self.vector_local_path}) is ready")
         return None
 
+    @staticmethod
+    def _source_path(document_path: str) -> str:
+        return os.path.join("http://localhost:8000/", document_path)
+
+    @staticmethod
+    def build_filter(filters: Optional[Union[Dict[str, Any], models.Filter]]) -> Optional[models.Filter]:
+        """
+        Qdrant filter from {payload field: value}; a list/tuple/set value matches any of its
+        items, e.g. {"session_id": "abc", "section": ["Diagnosis", "Treatment"]}.
+        A models.Filter is passed through unchanged.
+        """
+        if not filters:
+            return None
+        if isinstance(filters, models.Filter):
+            return filters
+        conditions = []
+        for key, value in filters.items():
+            if isinstance(value, (list, tuple, set)):
+                match = models.MatchAny(any=list(value))
+            else:
+                match = models.MatchValue(value=value)
+            conditions.append(models.FieldCondition(key=key, match=match))
+        return models.Filter(must=conditions)
+
+    @staticmethod
+    def session_filter(session_id: str) -> models.Filter:
+        """
+        Filter for one research session: its own results plus ingested documents (points without
+        a session_id). Research results of other sessions are excluded.
+        """
+        return models.Filter(should=[
+            models.FieldCondition(key="session_id", match=models.MatchValue(value=session_id)),
+            models.IsEmptyCondition(is_empty=models.PayloadField(key="session_id"))
+        ])
+
+    @staticmethod
+    def _scope_conditions(metadata: Optional[Dict[str, Any]]) -> List[models.FieldCondition]:
+        """Conditions restricting deduplication lookups to the session/section in metadata."""
+        return [
+            models.FieldCondition(key=field, match=models.MatchValue(value=metadata[field]))
+            for field in SCOPE_FIELDS if metadata and metadata.get(field) is not None
+        ]
+
+    @classmethod
+    def _source_condition(cls, document_path: str) -> models.Filter:
+        """Points referencing this source: stored under its path or shared with it by deduplication."""
+        source_path = cls._source_path(document_path)
+        return models.Filter(should=[
+            models.FieldCondition(key="source_path", match=models.MatchValue(value=source_path)),
+            models.FieldCondition(key="source_paths", match=models.MatchValue(value=source_path))
+        ])
+
+    @staticmethod
+    def _point_sources(payload: Dict[str, Any]) -> List[str]:
+        """Source paths referencing a point (points stored before reference tracking have one)."""
+        if payload.get("source_paths"):
+            return list(payload["source_paths"])
+        return [payload["source_path"]] if payload.get("source_path") else []
+
+    def has_source(self, document_path: str, metadata: Optional[Dict[str, Any]] = None) -> bool:
+        """
+        Check whether chunks from this source are already stored (warm start), within the
+        session/section of metadata when it has them.
+        """
+        if not self._does_collection_exist():
+            return False
+        try:
+            result = self.client.count(
+                collection_name=self.collection_name,
+                count_filter=models.Filter(must=[
+                    self._source_condition(document_path),
+                    *self._scope_conditions(metadata)
+                ]),
+                exact=False
+            )
+            return result.count > 0
+        except Exception as e:
+            self.logger.error(f"Error checking for existing source: {e}")
+            return False
+
+    def _stored_source_hash(self, document_path: str) -> Optional[str]:
+        """Hash this source had when its chunks were stored ("" if none was recorded), None if absent."""
+        points, _ = self.client.scroll(
+            collection_name=self.collection_name,
+            scroll_filter=self._source_condition(document_path),
+            limit=1,
+            with_payload=["source_hashes"],
+            with_vectors=False
+        )
+        if not points:
+            return None
+        return (points[0].payload.get("source_hashes") or {}).get(self._source_path(document_path), "")
+
+    def sync_source(self, document_path: str) -> bool:
+        """
+        Warm start keyed on content: True when this file's chunks are stored and were ingested
+        from the same bytes (sha256). Chunks of an edited file (or stored before hashes were
+        recorded) are deleted and False is returned, so the caller re-ingests it.
+        Sources that are not files on disk fall back to has_source.
+        """
+        if not os.path.isfile(document_path):
+            return self.has_source(document_path)
+        if not self._does_collection_exist():
+            return False
+        try:
+            stored_hash = self._stored_source_hash(document_path)
+        except Exception as e:
+            self.logger.error(f"Error checking for existing source: {e}")
+            return False
+        if stored_hash is None:
+            return False
+        if stored_hash == file_hash(document_path):
+            return True
+        self.logger.info(f"Source changed since it was ingested, replacing its chunks: {document_path}")
+        self.delete_source(document_path)
+        return False
+
+    def _existing_points(self, hashes: List[str], metadata: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Stored points (with their sources) for the content hashes already in the collection (and scope)."""
+        existing = {}
+        offset = None
+        try:
+            while True:
+                points, offset = self.client.scroll(
+                    collection_name=self.collection_name,
+                    scroll_filter=models.Filter(must=[
+                        models.FieldCondition(key="content_hash", match=models.MatchAny(any=hashes)),
+                        *self._scope_conditions(metadata)
+                    ]),
+                    limit=256,
+                    offset=offset,
+                    with_payload=["content_hash", "source_path", "source_paths", "source_hashes"],
+                    with_vectors=False
+                )
+                existing.update((p.payload.get("content_hash"), p) for p in points)
+                if offset is None:
+                    break
+        except Exception as e:
+            self.logger.error(f"Error looking up existing chunks: {e}")
+        return existing
+
     def create_vectorstore(
             self,
             document_chunks: List[str],
             document_path: str,
-        ) -> None:
+            metadata: Optional[Dict[str, Any]] = None
+        ) -> List[str]:
         """
         Ingest documents into Qdrant store using all 3 embedding models.
+        Returns the ids of the points written for this document.
         """
-        
-        if not document_chunks:
-            return
+        return self.create_vectorstore_batch([(document_chunks, document_path)], metadata).get(document_path, [])
+
+    def create_vectorstore_batch(
+            self,
+            documents: List[Tuple[List[str], str]],
+            metadata: Optional[Dict[str, Any]] = None
+        ) -> Dict[str, List[str]]:
+        """
+        Ingest several (document_chunks, document_path) pairs with one embedding call and one upsert.
+        metadata (e.g. session_id, section, ingest_batch) is added to the payload of every point;
+        its session_id/section also scope deduplication, so each session and section gets its own copy.
+        A chunk whose content is already stored is not embedded or upserted again: the document is
+        added to the existing point's source_paths, and delete_source only removes a point once no
+        source references it.
+        Returns the ids of the points holding each document's chunks, per document path.
+        Raises if embedding or upserting fails, so callers do not record the documents as ingested.
+        """
+        documents = [(chunks, path) for chunks, path in documents if chunks]
+        if not documents:
+            return {}
 
         # Check if collection exists, create if it doesn't
+        existing = {}
         if not self._does_collection_exist():
             self._create_collection()
-        
+        else:
+            # Collections from before content_hash was indexed get the index before the lookups below
+            self.ensure_payload_indexes()
+            known = [path for _, path in documents if self.has_source(path, metadata)]
+            for path in known:
+                self.logger.info(f"Source already ingested, skipping: {path}")
+            documents = [(chunks, path) for chunks, path in documents if path not in known]
+            hashes = {content_hash(chunk) for chunks, _ in documents for chunk in chunks}
+            existing = self._existing_points(list(hashes), metadata)
+
+        # Content hash of each source file, checked by sync_source on the next warm start
+        source_hashes = {
+            self._source_path(path): file_hash(path) for _, path in documents if os.path.isfile(path)
+        }
+
+        # Skip chunks whose content is already stored or repeated within this batch,
+        # recording every document that references each point instead
+        new_chunks, new_hashes, new_ids = [], [], []
+        batch_ids = {}
+        references = {}
+        point_ids = {}
+        total_chunks = 0
+        for chunks, path in documents:
+            total_chunks += len(chunks)
+            ids = point_ids.setdefault(path, [])
+            for chunk in chunks:
+                chunk_hash = content_hash(chunk)
+                if chunk_hash in existing:
+                    point_id = existing[chunk_hash].id
+                elif chunk_hash in batch_ids:
+                    point_id = batch_ids[chunk_hash]
+                else:
+                    point_id = str(uuid4())
+                    batch_ids[chunk_hash] = point_id
+                    new_chunks.append(chunk)
+                    new_hashes.append(chunk_hash)
+                    new_ids.append(point_id)
+                if point_id not in ids:
+                    ids.append(point_id)
+                    references.setdefault(point_id, []).append(self._source_path(path))
+        if len(new_chunks) < total_chunks:
+            self.logger.info(f"Skipping {total_chunks - len(new_chunks)} duplicate chunks")
+
+        if new_chunks:
+            self._upsert_chunks(new_chunks, new_hashes, new_ids, references, source_hashes, metadata)
+        self._add_references(
+            [point for point in existing.values() if point.id in references],
+            references, source_hashes
+        )
+        return {path: ids for path, ids in point_ids.items() if ids}
+
+    def _upsert_chunks(
+            self,
+            document_chunks: List[str],
+            hashes: List[str],
+            point_ids: List[str],
+            references: Dict[str, List[str]],
+            source_hashes: Dict[str, str],
+            metadata: Optional[Dict[str, Any]] = None
+        ) -> None:
+        """Embed new chunks with all 3 models and upsert them as points."""
         # Generate embeddings
         try:
             self.logger.info("Generating embeddings (Dense, Sparse, ColBERT)...")
             dense_embs, sparse_embs, late_embs = get_all_embeddings(document_chunks)
         except Exception as e:
             self.logger.error(f"Failed to generate embeddings: {e}")
-            return
+            raise
 
         points = []
         self.logger.info("Preparing points for upload...")
         for i, chunk in enumerate(document_chunks):
-            doc_id = str(uuid4())
+            doc_id = point_ids[i]
+            source_paths = references[doc_id]
 
             # Prepare Dense
             dense_vec = dense_embs[i]
@@ -134,15 +478,24 @@ class VectorStore:
             )
 
             # Prepare ColBERT
-            # late_embs[i] is numpy array (N, 128)
+            # late_embs[i] is numpy array (N, 128). qdrant-client serializes points as nested lists
+            # whatever we pass, so the compact modes save memory on the server (float16 + quantization)
             colbert_vec = late_embs[i].tolist()
 
             payload = {
+                **(metadata or {}),
                 "content": chunk,
-                "source": os.path.basename(document_path),
-                "source_path": os.path.join("http://localhost:8000/", document_path),
-                "doc_id": doc_id
+                "source": os.path.basename(source_paths[0]),
+                "source_path": source_paths[0],
+                "source_paths": source_paths,
+                "doc_id": doc_id,
+                "content_hash": hashes[i]
+            }
+            point_source_hashes = {
+                path: source_hashes[path] for path in source_paths if path in source_hashes
             }
+            if point_source_hashes:
+                payload["source_hashes"] = point_source_hashes
 
             points.append(PointStruct(
                 id=doc_id,
@@ -163,70 +516,164 @@ class VectorStore:
             self.logger.info(f"Ingested {len(points)} chunks into {self.collection_name}")
         except Exception as e:
             self.logger.error(f"Error upserting points: {e}")
+            raise
 
-    def retrieve_relevant_chunks(
-            self,
-            query: str,
-            vectorstore: Any = None,
-            docstore: Any = None,
-        ) -> List[Dict[str, Any]]:
+    def _add_references(self, points: List[Any], references: Dict[str, List[str]], source_hashes: Dict[str, str]) -> None:
+        """Add the new documents referencing already stored points to their source_paths."""
+        for point in points:
+            sources = self._point_sources(point.payload)
+            added = [path for path in references[point.id] if path not in sources]
+            if not added:
+                continue
+            point_source_hashes = dict(point.payload.get("source_hashes") or {})
+            point_source_hashes.update((path, source_hashes[path]) for path in added if path in source_hashes)
+            self.client.set_payload(
+                collection_name=self.collection_name,
+                payload={"source_paths": sources + added, "source_hashes": point_source_hashes},
+                points=[point.id]
+            )
+
+    def delete_source(self, document_path: str, point_ids: Optional[List[str]] = None) -> None:
         """
-        Retrieve relevant chunks based on a query using Hybrid Search + ColBERT Reranking.
+        Remove a document from the store: the given ids plus anything else referencing its source path.
+        Points other sources still reference are kept and only drop this source.
         """
-        # Generate query embeddings
+        if not self._does_collection_exist():
+            return
+        source_path = self._source_path(document_path)
+        fields = ["source_path", "source_paths", "source_hashes"]
         try:
-            dense_q, sparse_q, late_q = get_all_embeddings([query])
+            points = {}
+            if point_ids:
+                for point in self.client.retrieve(self.collection_name, ids=point_ids, with_payload=fields):
+                    points[point.id] = point
+            offset = None
+            while True:
+                batch, offset = self.client.scroll(
+                    collection_name=self.collection_name,
+                    scroll_filter=self._source_condition(document_path),
+                    limit=256,
+                    offset=offset,
+                    with_payload=fields,
+                    with_vectors=False
+                )
+                points.update((point.id, point) for point in batch)
+                if offset is None:
+                    break
 
-            # Extract single query items
-            dense_vec = dense_q[0]
+            unreferenced = []
+            for point in points.values():
+                sources = self._point_sources(point.payload)
+                if source_path not in sources:
+                    continue
+                remaining = [path for path in sources if path != source_path]
+                if not remaining:
+                    unreferenced.append(point.id)
+                    continue
+                payload = {
+                    "source_paths": remaining,
+                    "source_hashes": {
+                        path: value for path, value in (point.payload.get("source_hashes") or {}).items()
+                        if path != source_path
+                    }
+                }
+                if point.payload.get("source_path") == source_path:
+                    payload["source_path"] = remaining[0]
+                    payload["source"] = os.path.basename(remaining[0])
+                self.client.set_payload(
+                    collection_name=self.collection_name,
+                    payload=payload,
+                    points=[point.id]
+                )
+            if unreferenced:
+                self.client.delete(
+                    collection_name=self.collection_name,
+                    points_selector=models.PointIdsList(points=unreferenced)
+                )
+            self.logger.info(f"Deleted stored chunks of {document_path}")
+        except Exception as e:
+            self.logger.error(f"Error deleting chunks of {document_path}: {e}")
 
-            sp_obj = sparse_q[0].as_object()
-            sparse_vec = SparseVector(
-                indices=sp_obj['indices'].tolist(),
-                values=sp_obj['values'].tolist()
+    def delete_session(self, session_id: str) -> None:
+        """Remove the research results stored for a session (points tagged with its session_id)."""
+        if not session_id or not self._does_collection_exist():
+            return
+        try:
+            self.client.delete(
+                collection_name=self.collection_name,
+                points_selector=models.FilterSelector(filter=models.Filter(must=[
+                    models.FieldCondition(key="session_id", match=models.MatchValue(value=session_id))
+                ]))
             )
-
-            colbert_vec = late_q[0].tolist()
-
+            self.logger.info(f"Deleted research results of session {session_id}")
         except Exception as e:
-             self.logger.error(f"Failed to generate query embeddings: {e}")
-             return []
+            self.logger.error(f"Error deleting research results of session {session_id}: {e}")
 
-        try:
-            # Prefetch: Hybrid Search (Dense + Sparse)
-            # We want to retrieve candidates that match EITHER Dense OR Sparse
-            prefetch = [
-                models.Prefetch(
-                    query=dense_vec,
-                    using=self.dense_vector_name,
-                    limit=self.retrieval_top_k * 2 # Fetch more candidates
-                ),
-                models.Prefetch(
-                    query=sparse_vec,
-                    using=self.sparse_vector_name,
-                    limit=self.retrieval_top_k * 2
-                )
-            ]
+    def _embed_queries(self, queries: List[str]) -> Tuple[List[Any], List[Any], List[Any]]:
+        """Query embeddings for the retrieval mode; models the mode does not use are skipped (None)."""
+        if self.retrieval_mode == "colbert":
+            # Interactive queries must not wait for the ingest micro-batching window
+            return get_all_embeddings(queries, batching=False)
+        dense = get_embedding(queries)
+        sparse = get_sparse_embedding(queries) if self.retrieval_mode == "rrf" else [None] * len(queries)
+        return dense, sparse, [None] * len(queries)
 
-            # Rerank with ColBERT
-            # Use query_points with prefetch
-            result = self.client.query_points(
-                collection_name=self.collection_name,
-                prefetch=prefetch,
-                query=colbert_vec,
-                using=self.colbert_vector_name,
-                limit=self.retrieval_top_k,
+    def _query_request(self, dense_vec, sparse_emb, late_emb, query_filter=None) -> models.QueryRequest:
+        """Search request for one query's embeddings, following the retrieval plan."""
+        if self.retrieval_mode == "dense":
+            return models.QueryRequest(
+                query=dense_vec,
+                using=self.dense_vector_name,
+                filter=query_filter,
+                limit=self.retrieval_limit,
+                score_threshold=self.retrieval_min_score,
                 with_payload=True
             )
 
-            search_result = result.points
+        sp_obj = sparse_emb.as_object()
+        sparse_vec = SparseVector(
+            indices=sp_obj['indices'].tolist(),
+            values=sp_obj['values'].tolist()
+        )
 
-        except Exception as e:
-            self.logger.error(f"Error searching Qdrant: {e}")
-            return []
-        
+        # Prefetch: Hybrid Search (Dense + Sparse)
+        # We want to retrieve candidates that match EITHER Dense OR Sparse
+        prefetch = [
+            models.Prefetch(
+                query=dense_vec,
+                using=self.dense_vector_name,
+                filter=query_filter,
+                limit=self.dense_prefetch_limit
+            ),
+            models.Prefetch(
+                query=sparse_vec,
+                using=self.sparse_vector_name,
+                filter=query_filter,
+                limit=self.sparse_prefetch_limit
+            )
+        ]
+
+        if self.retrieval_mode == "rrf":
+            # Fuse the two candidate lists by reciprocal rank
+            query, using = models.FusionQuery(fusion=models.Fusion.RRF), None
+        else:
+            # Rerank with ColBERT
+            query, using = late_emb.tolist(), self.colbert_vector_name
+
+        return models.QueryRequest(
+            prefetch=prefetch,
+            query=query,
+            using=using,
+            filter=query_filter,
+            limit=self.retrieval_limit,
+            score_threshold=self.retrieval_min_score,
+            with_payload=True
+        )
+
+    @staticmethod
+    def _to_docs(search_result) -> List[Dict[str, Any]]:
         retrieved_docs = []
-        
+
         for scored_point in search_result:
             payload = scored_point.payload
             doc = {
@@ -237,5 +684,84 @@ class VectorStore:
                 "source_path": payload.get("source_path")
             }
             retrieved_docs.append(doc)
-            
+
         return retrieved_docs
+
+    def retrieve_relevant_chunks(
+            self,
+            query: str,
+            vectorstore: Any = None,
+            docstore: Any = None,
+            filters: Optional[Union[Dict[str, Any], models.Filter]] = None
+        ) -> List[Dict[str, Any]]:
+        """
+        Retrieve relevant chunks based on a query using Hybrid Search + ColBERT Reranking
+        (or the cheaper stages selected by the retrieval plan).
+        filters restricts every stage to matching payloads, e.g. {"source": "guideline.pdf"}
+        or {"session_id": ..., "section": ...} (see build_filter).
+        """
+        # Generate query embeddings
+        try:
+            dense_q, sparse_q, late_q = self._embed_queries([query])
+            request = self._query_request(dense_q[0], sparse_q[0], late_q[0], self.build_filter(filters))
+        except Exception as e:
+             self.logger.error(f"Failed to generate query embeddings: {e}")
+             return []
+
+        try:
+            result = self.client.query_points(
+                collection_name=self.collection_name,
+                prefetch=request.prefetch,
+                query=request.query,
+                using=request.using,
+                query_filter=request.filter,
+                limit=request.limit,
+                score_threshold=request.score_threshold,
+                with_payload=True
+            )
+            search_result = result.points
+
+        except Exception as e:
+            self.logger.error(f"Error searching Qdrant: {e}")
+            return []
+
+        return self._to_docs(search_result)
+
+    def retrieve_relevant_chunks_batch(
+            self,
+            queries: List[str],
+            filters: Optional[Union[Dict[str, Any], models.Filter, List[Any]]] = None
+        ) -> List[List[Dict[str, Any]]]:
+        """
+        Retrieve relevant chunks for many queries in one pass: every query is embedded in a
+        single batch per model, and all searches go to Qdrant in one query_batch_points call.
+        filters is either one filter for every query or a list with one (or None) per query.
+
+        Returns:
+            One list of retrieved chunks per query, in the same order
+        """
+        if not queries:
+            return []
+
+        try:
+            if not isinstance(filters, list):
+                filters = [filters] * len(queries)
+            dense_q, sparse_q, late_q = self._embed_queries(list(queries))
+            requests = [
+                self._query_request(dense_q[i], sparse_q[i], late_q[i], self.build_filter(filters[i]))
+                for i in range(len(queries))
+            ]
+        except Exception as e:
+            self.logger.error(f"Failed to generate query embeddings: {e}")
+            return [[] for _ in queries]
+
+        try:
+            responses = self.client.query_batch_points(
+                collection_name=self.collection_name,
+                requests=requests
+            )
+        except Exception as e:
+            self.logger.error(f"Error searching Qdrant: {e}")
+            return [[] for _ in queries]
+
+        return [self._to_docs(response.points) for response in responses]
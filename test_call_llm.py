@@ -0,0 +1,118 @@
+import asyncio
+import time
+import unittest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import utils.call_llm as llm
+from benchmarks.bench_llm_client_pool import start_stub
+
+class TestLLMClientPool(unittest.TestCase):
+    def setUp(self):
+        llm.get_client_pool().clients = {}
+
+    def tearDown(self):
+        llm.get_client_pool().clients = {}
+
+    @patch('utils.call_llm.genai.Client')
+    def test_client_reused_across_calls(self, mock_client_cls):
+        mock_client_cls.return_value.models.generate_content.return_value = MagicMock(text="ok")
+
+        self.assertEqual(llm.call_llm("a"), "ok")
+        self.assertEqual(llm.call_llm("b"), "ok")
+
+        self.assertEqual(mock_client_cls.call_count, 1)
+        self.assertEqual(mock_client_cls.return_value.models.generate_content.call_count, 2)
+
+    @patch('utils.call_llm.genai.Client')
+    def test_client_keyed_by_api_key_and_model(self, mock_client_cls):
+        mock_client_cls.side_effect = lambda **kwargs: MagicMock()
+        pool = llm.get_client_pool()
+
+        a = pool.get_client("key-1", "model-a")
+        self.assertIs(pool.get_client("key-1", "model-a"), a)
+        self.assertIsNot(pool.get_client("key-1", "model-b"), a)
+        self.assertIsNot(pool.get_client("key-2", "model-a"), a)
+
+        http_options = mock_client_cls.call_args.kwargs["http_options"]
+        self.assertIn("limits", http_options.client_args)
+
+class TestCallLLMAsync(unittest.TestCase):
+    def setUp(self):
+        llm.get_client_pool().clients = {}
+        llm.get_client_pool().async_clients = {}
+
+    def tearDown(self):
+        llm.get_client_pool().clients = {}
+        llm.get_client_pool().async_clients = {}
+
+    def test_calls_across_event_loops(self):
+        # Real SDK client against the local HTTP stub; each asyncio.run gets a fresh loop
+        server, base_url = start_stub()
+        try:
+            with patch.object(llm.config.llm, "base_url", base_url), \
+                    patch.object(llm, "_limiter", llm.RateLimiter()):
+                results = [asyncio.run(llm.call_llm_async(f"p{i}")) for i in range(3)]
+
+                async def stream():
+                    return [chunk async for chunk in llm.call_llm_stream_async("s")]
+                streamed = [asyncio.run(stream()) for _ in range(2)]
+        finally:
+            server.shutdown()
+        self.assertEqual(results, ["ok"] * 3)
+        self.assertEqual(streamed, [["ok"], ["ok"]])
+        # Clients of finished loops are not kept around
+        self.assertEqual(len(llm.get_client_pool().async_clients), 1)
+
+    @patch('utils.call_llm.genai.Client')
+    def test_in_flight_requests_bounded_by_semaphore(self, mock_client_cls):
+        in_flight = 0
+        peak = 0
+
+        async def fake_generate(**kwargs):
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.01)
+            in_flight -= 1
+            return MagicMock(text="ok", usage_metadata=None)
+
+        mock_client_cls.return_value.aio.models.generate_content = AsyncMock(side_effect=fake_generate)
+
+        async def run():
+            return await asyncio.gather(*(llm.call_llm_async(f"p{i}") for i in range(10)))
+
+        with patch.object(llm.config.llm, "max_concurrent_requests", 3), \
+                patch.object(llm, "_limiter", llm.RateLimiter()):
+            results = asyncio.run(run())
+
+        self.assertEqual(results, ["ok"] * 10)
+        self.assertLessEqual(peak, 3)
+
+class TestRateLimiter(unittest.TestCase):
+    def test_request_budget_blocks_until_window_frees(self):
+        limiter = llm.RateLimiter(requests_per_minute=2)
+        limiter.events.extend([[0.0, 1], [1.0, 1]])
+        self.assertAlmostEqual(limiter._wait_time(1, now=30.0), 30.0)
+        self.assertEqual(limiter._wait_time(1, now=61.0), 0.0)
+
+    def test_token_budget_waits_for_enough_tokens_to_expire(self):
+        limiter = llm.RateLimiter(tokens_per_minute=100)
+        limiter.events.extend([[0.0, 60], [10.0, 30]])
+        self.assertEqual(limiter._wait_time(10, now=20.0), 0.0)
+        self.assertAlmostEqual(limiter._wait_time(50, now=20.0), 40.0)
+
+    def test_record_replaces_estimate(self):
+        limiter = llm.RateLimiter(tokens_per_minute=100)
+        event = asyncio.run(limiter.acquire(90))
+        limiter.record(event, 10)
+        self.assertEqual(limiter._wait_time(80, now=event[0]), 0.0)
+
+    def test_blocking_acquire_waits_for_window(self):
+        limiter = llm.RateLimiter(requests_per_minute=1, window=0.2)
+        limiter.acquire_blocking(1)
+        start = time.monotonic()
+        limiter.acquire_blocking(1)
+        self.assertGreaterEqual(time.monotonic() - start, 0.15)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,114 @@
+import unittest
+import asyncio
+from unittest.mock import patch, MagicMock
+from pocketflow import AsyncFlow
+from nodes import ContentWriterNode
+
+SECTION_YAML = """```yaml
+section:
+  title: "Section 1"
+  body:
+    - heading: "Overview"
+      content: |
+        Text
+```"""
+
+class TestContentWriterNode(unittest.TestCase):
+    def setUp(self):
+        self.events = []
+        self.shared = {
+            "blueprint": [
+                {"title": "Section 1", "description": "Description 1"},
+                {"title": "Section 2", "description": "Description 2"}
+            ],
+            "rag_agent": None,
+            "event_sink": self.events.append
+        }
+
+    def test_streams_partial_text_to_event_sink(self):
+        async def fake_stream(prompt):
+            for i in range(0, len(SECTION_YAML), 20):
+                yield SECTION_YAML[i:i + 20]
+
+        with patch('nodes.call_llm_stream_async', side_effect=fake_stream):
+            asyncio.run(AsyncFlow(start=ContentWriterNode()).run_async(self.shared))
+
+        sections = self.shared["doc_sections"]
+        self.assertEqual([s["title"] for s in sections], ["Section 1", "Section 1"])
+
+        deltas = [e for e in self.events if e["type"] == "section_delta"]
+        done = [e for e in self.events if e["type"] == "section_done"]
+        self.assertGreater(len(deltas), 2)
+        self.assertEqual(sorted(e["index"] for e in done), [0, 1])
+        # Accumulated text grows monotonically and ends with the full response
+        section_0 = [e["text"] for e in deltas if e["index"] == 0]
+        self.assertEqual(section_0[-1], SECTION_YAML)
+        self.assertTrue(all(b.startswith(a) for a, b in zip(section_0, section_0[1:])))
+
+    def test_generation_error_still_emits_done(self):
+        async def failing_stream(prompt):
+            raise Exception("LLM Error")
+            yield
+
+        with patch('nodes.call_llm_stream_async', side_effect=failing_stream):
+            asyncio.run(AsyncFlow(start=ContentWriterNode()).run_async(self.shared))
+
+        done = [e for e in self.events if e["type"] == "section_done"]
+        self.assertEqual(len(done), 2)
+        self.assertEqual(done[0]["section"]["body"][0]["content"], "Error in generation")
+
+    def test_retrieval_batched_across_blueprint(self):
+        rag_agent = MagicMock()
+        rag_agent.vector_store.retrieve_relevant_chunks_batch.return_value = [
+            [{"content": "context one"}],
+            [{"content": "context two"}]
+        ]
+        self.shared["rag_agent"] = rag_agent
+        prompts = []
+
+        async def fake_stream(prompt):
+            prompts.append(prompt)
+            yield SECTION_YAML
+
+        with patch('nodes.call_llm_stream_async', side_effect=fake_stream):
+            asyncio.run(AsyncFlow(start=ContentWriterNode()).run_async(self.shared))
+
+        rag_agent.vector_store.retrieve_relevant_chunks_batch.assert_called_once_with(
+            ["Section 1 Description 1", "Section 2 Description 2"]
+        )
+        rag_agent.vector_store.retrieve_relevant_chunks.assert_not_called()
+        self.assertTrue(any("context one" in p for p in prompts))
+        self.assertTrue(any("context two" in p for p in prompts))
+
+    def test_retrieval_scoped_to_session_section(self):
+        rag_agent = MagicMock()
+        rag_agent.vector_store.retrieve_relevant_chunks_batch.side_effect = [
+            [[{"content": "own research"}], []],
+            [[{"content": "shared context"}]]
+        ]
+        self.shared["rag_agent"] = rag_agent
+        self.shared["session_id"] = "session-1"
+        prompts = []
+
+        async def fake_stream(prompt):
+            prompts.append(prompt)
+            yield SECTION_YAML
+
+        with patch('nodes.call_llm_stream_async', side_effect=fake_stream):
+            asyncio.run(AsyncFlow(start=ContentWriterNode()).run_async(self.shared))
+
+        scoped, fallback = rag_agent.vector_store.retrieve_relevant_chunks_batch.call_args_list
+        self.assertEqual(scoped.args[1], [
+            {"session_id": "session-1", "section": "Section 1"},
+            {"session_id": "session-1", "section": "Section 2"}
+        ])
+        # Section 2 had no research of its own and searched this session and the ingested documents
+        rag_agent.vector_store.session_filter.assert_called_once_with("session-1")
+        self.assertEqual(fallback.args, (["Section 2 Description 2"], rag_agent.vector_store.session_filter.return_value))
+        self.assertTrue(any("own research" in p for p in prompts))
+        self.assertTrue(any("shared context" in p for p in prompts))
+        # The session's research results are dropped once the sections are written
+        rag_agent.vector_store.delete_session.assert_called_once_with("session-1")
+
+if __name__ == '__main__':
+    unittest.main()
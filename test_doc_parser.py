@@ -0,0 +1,136 @@
+import sys
+from unittest.mock import MagicMock
+
+# Mock heavy parsing/reranking dependencies pulled in by the rag_agent package
+for name in ["docling", "docling.datamodel", "docling.datamodel.base_models",
+             "docling.datamodel.pipeline_options", "docling.document_converter",
+             "docling_core", "docling_core.types", "docling_core.types.doc",
+             "sentence_transformers"]:
+    sys.modules.setdefault(name, MagicMock())
+
+import importlib.util
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+import numpy as np
+from PIL import Image
+
+import rag_agent.doc_parser as doc_parser_module
+from benchmarks.bench_parsing_profiles import SAMPLE_PDF
+from rag_agent.doc_parser import ImageWriter, MedicalDocParser, has_text_layer
+
+def conversion_result(status):
+    result = MagicMock()
+    result.status = status
+    result.document.pictures = []
+    return result
+
+class TestMedicalDocParser(unittest.TestCase):
+    def test_converter_reused_per_pipeline_options(self):
+        with tempfile.TemporaryDirectory() as tmp, \
+                patch.object(doc_parser_module, "DocumentConverter") as converter_cls:
+            parser = MedicalDocParser()
+            parser.parse_document("a.pdf", tmp)
+            parser.parse_document("b.pdf", tmp)
+            self.assertEqual(converter_cls.call_count, 1)
+
+            parser.parse_document("c.pdf", tmp, do_ocr=False)
+            self.assertEqual(converter_cls.call_count, 2)
+
+    def test_parse_documents_uses_batch_conversion(self):
+        success = doc_parser_module.ConversionStatus.SUCCESS
+        with tempfile.TemporaryDirectory() as tmp, \
+                patch.object(doc_parser_module, "DocumentConverter") as converter_cls:
+            converter = converter_cls.return_value
+            converter.convert_all.return_value = iter([conversion_result(success), conversion_result("failure")])
+
+            results = MedicalDocParser().parse_documents(["a.pdf", "b.pdf"], tmp)
+
+            converter.convert_all.assert_called_once_with(["a.pdf", "b.pdf"], raises_on_error=False)
+            converter.convert.assert_not_called()
+            self.assertIsNotNone(results[0])
+            self.assertIsNone(results[1])
+
+class TestParsingProfiles(unittest.TestCase):
+    def test_unknown_profile_rejected(self):
+        with self.assertRaises(ValueError):
+            MedicalDocParser("turbo")
+
+    @unittest.skipUnless(importlib.util.find_spec("pypdfium2"), "pypdfium2 not installed")
+    def test_text_layer_detection(self):
+        self.assertTrue(has_text_layer(SAMPLE_PDF))
+        with tempfile.TemporaryDirectory() as tmp:
+            blank = os.path.join(tmp, "scan.pdf")
+            with open(blank, "wb") as f:
+                f.write(b"not really a pdf")
+            self.assertFalse(has_text_layer(blank))
+
+    def test_fast_profile_options(self):
+        with tempfile.TemporaryDirectory() as tmp, \
+                patch.object(doc_parser_module, "DocumentConverter"), \
+                patch.object(doc_parser_module, "PdfPipelineOptions") as options_cls, \
+                patch.object(doc_parser_module, "has_text_layer", return_value=True):
+            parser = MedicalDocParser("fast")
+            with patch.object(parser, "_save_outputs") as save_outputs:
+                parser.parse_document("guideline.pdf", tmp)
+
+            kwargs = options_cls.call_args.kwargs
+            self.assertEqual(kwargs["images_scale"], 1.0)
+            self.assertFalse(kwargs["do_ocr"])
+            self.assertFalse(kwargs["generate_page_images"])
+            self.assertIs(options_cls.return_value.table_structure_options.mode,
+                          doc_parser_module.TableFormerMode.FAST)
+            self.assertFalse(save_outputs.call_args.args[2])
+
+            # Explicit arguments still override the profile
+            parser.parse_document("scan.pdf", tmp, do_ocr=True)
+            self.assertTrue(options_cls.call_args.kwargs["do_ocr"])
+
+class TestImageWriter(unittest.TestCase):
+    def test_formats_written_in_background(self):
+        rng = np.random.default_rng(0)
+        image = Image.fromarray((rng.random((256, 256, 3)) * 255).astype(np.uint8))
+        sizes = {}
+        with tempfile.TemporaryDirectory() as tmp:
+            for image_format in ("png", "webp", "jpeg"):
+                writer = ImageWriter(image_format)
+                path = os.path.join(tmp, f"figure.{writer.extension}")
+                writer.submit(image, path)
+                writer.flush()
+                with Image.open(path) as written:
+                    self.assertEqual(written.size, (256, 256))
+                sizes[image_format] = os.path.getsize(path)
+        self.assertLess(sizes["webp"], sizes["png"])
+
+    def test_unknown_format_rejected(self):
+        with self.assertRaises(ValueError):
+            ImageWriter("tiff")
+
+    def test_page_images_follow_override(self):
+        with tempfile.TemporaryDirectory() as tmp, \
+                patch.object(doc_parser_module, "DocumentConverter") as converter_cls:
+            page = MagicMock()
+            result = conversion_result(doc_parser_module.ConversionStatus.SUCCESS)
+            result.document.pages = {1: page}
+            converter_cls.return_value.convert.return_value = result
+
+            parser = MedicalDocParser("accurate", export_page_images=False)
+            with patch.object(parser.image_writer, "submit") as submit:
+                parser.parse_document("a.pdf", tmp)
+            submit.assert_not_called()
+
+            # PNG by default, WebP only when configured
+            parser = MedicalDocParser("accurate")
+            with patch.object(parser.image_writer, "submit") as submit:
+                parser.parse_document("a.pdf", tmp)
+            self.assertTrue(str(submit.call_args.args[1]).endswith("-1.png"))
+
+            parser = MedicalDocParser("accurate", image_format="webp")
+            with patch.object(parser.image_writer, "submit") as submit:
+                parser.parse_document("a.pdf", tmp)
+            self.assertTrue(str(submit.call_args.args[1]).endswith("-1.webp"))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,151 @@
+import tempfile
+import threading
+import unittest
+from unittest.mock import patch
+
+import numpy as np
+from fastembed import SparseEmbedding
+
+import utils.get_embedding as emb
+from utils.embedding_cache import DiskEmbeddingStore, EmbeddingCache, content_hash
+from utils.get_embedding import EmbeddingBatcher
+
+calls = []
+
+def fake_embed(texts):
+    calls.append(list(texts))
+    return ([f"d:{t}" for t in texts], [f"s:{t}" for t in texts], [f"l:{t}" for t in texts])
+
+class TestEmbeddingBatcher(unittest.TestCase):
+    def setUp(self):
+        calls.clear()
+
+    def test_concurrent_callers_share_one_model_pass(self):
+        batcher = EmbeddingBatcher(fake_embed, window_ms=200, max_texts=1000)
+        results = {}
+        barrier = threading.Barrier(4)
+
+        def worker(i):
+            barrier.wait()
+            results[i] = batcher.embed([f"{i}-a", f"{i}-b"])
+
+        threads = [threading.Thread(target=worker, args=(i,)) for i in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(len(calls[0]), 8)
+        for i in range(4):
+            dense, sparse, late = results[i]
+            self.assertEqual(dense, [f"d:{i}-a", f"d:{i}-b"])
+            self.assertEqual(sparse, [f"s:{i}-a", f"s:{i}-b"])
+            self.assertEqual(late, [f"l:{i}-a", f"l:{i}-b"])
+
+    def test_batch_flushes_at_max_texts(self):
+        batcher = EmbeddingBatcher(fake_embed, window_ms=10_000, max_texts=2)
+        self.assertEqual(batcher.embed(["a", "b"])[0], ["d:a", "d:b"])
+
+    def test_queries_bypass_batch_window(self):
+        batcher = EmbeddingBatcher(fake_embed, window_ms=10_000, max_texts=1000)
+        with patch.object(emb, "get_embedding_batcher", return_value=batcher), \
+                patch.object(emb, "_compute_all_embeddings", side_effect=fake_embed), \
+                patch.object(emb.config.rag, "embedding_cache_size", 0), \
+                patch.object(emb.config.rag, "embedding_batching", True):
+            dense, _, _ = emb.get_all_embeddings(["query"], batching=False)
+        self.assertEqual(dense, ["d:query"])
+        self.assertEqual(batcher.batches, 0)
+
+    def test_errors_propagate_to_every_caller(self):
+        def failing(texts):
+            raise RuntimeError("model failure")
+
+        batcher = EmbeddingBatcher(failing, window_ms=1)
+        with self.assertRaises(RuntimeError):
+            batcher.embed(["a"])
+
+def numeric_embed(texts, batching=True):
+    calls.append(list(texts))
+    dense = [[float(len(t))] * 4 for t in texts]
+    sparse = [SparseEmbedding(values=np.array([1.0, 2.0]), indices=np.array([len(t), 7])) for t in texts]
+    late = [np.full((len(t), 3), float(len(t)), dtype=np.float32) for t in texts]
+    return dense, sparse, late
+
+class TestEmbeddingCache(unittest.TestCase):
+    def setUp(self):
+        calls.clear()
+
+    def test_unique_texts_embedded_once(self):
+        with patch.object(emb, "_cache", EmbeddingCache(max_entries=100)), \
+                patch.object(emb, "_embed_uncached", numeric_embed):
+            dense, sparse, late = emb.get_all_embeddings(["aa", "bbb", "aa"])
+            self.assertEqual(calls, [["aa", "bbb"]])
+            self.assertEqual([d[0] for d in dense], [2.0, 3.0, 2.0])
+            self.assertEqual(late[2].shape, (2, 3))
+
+            emb.get_all_embeddings(["bbb", "cccc"])
+            self.assertEqual(calls[-1], ["cccc"])
+
+    def test_lru_limit(self):
+        cache = EmbeddingCache(max_entries=2)
+        for key in ("a", "b", "c"):
+            cache.put(key, (key, None, None))
+        self.assertIsNone(cache.get("a"))
+        self.assertEqual(cache.get("c")[0], "c")
+
+    def test_memory_bounded_by_bytes(self):
+        late = np.zeros((500, 128), dtype=np.float32)  # ~256 KB, a long chunk's ColBERT matrix
+        cache = EmbeddingCache(max_entries=100, max_bytes=3 * late.nbytes)
+        for key in ("a", "b", "c", "d"):
+            cache.put(key, ([0.0] * 384, None, late.copy()))
+        self.assertEqual(list(cache.entries), ["c", "d"])
+        self.assertLessEqual(cache.stats()["bytes"], 3 * late.nbytes)
+        self.assertIsNone(cache.get("a"))
+
+    def test_disk_store_roundtrip(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            dense, sparse, late = numeric_embed(["hello"])
+            key = content_hash("hello")
+            EmbeddingCache(max_entries=10, disk_dir=tmp).put(key, (dense[0], sparse[0], late[0]))
+
+            reopened = DiskEmbeddingStore(tmp)
+            d, s, l = reopened.get(key)
+            self.assertEqual(d, dense[0])
+            self.assertEqual(s.indices.tolist(), [5, 7])
+            self.assertEqual(s.values.tolist(), [1.0, 2.0])
+            np.testing.assert_array_equal(l, late[0])
+
+class TestLazyEmbeddingModels(unittest.TestCase):
+    def setUp(self):
+        emb.EmbeddingModels._instance = None
+        self.patches = [
+            patch("utils.get_embedding.TextEmbedding"),
+            patch("utils.get_embedding.SparseTextEmbedding"),
+            patch("utils.get_embedding.LateInteractionTextEmbedding"),
+        ]
+        self.dense_cls, self.sparse_cls, self.late_cls = [p.start() for p in self.patches]
+
+    def tearDown(self):
+        for p in self.patches:
+            p.stop()
+        emb.EmbeddingModels._instance = None
+
+    def test_models_load_independently_on_first_use(self):
+        models = emb.EmbeddingModels()
+        self.assertFalse(any(models.is_loaded(k) for k in models.MODEL_KINDS))
+
+        models.dense_model.embed(["x"])
+        models.dense_model.embed(["y"])
+        self.assertEqual(self.dense_cls.call_count, 1)
+        self.sparse_cls.assert_not_called()
+        self.late_cls.assert_not_called()
+
+    def test_background_warm_up_loads_selected_models(self):
+        models = emb.EmbeddingModels()
+        models.warm_up(["sparse"]).join(timeout=5)
+        self.assertTrue(models.is_loaded("sparse"))
+        self.assertFalse(models.is_loaded("late_interaction"))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,115 @@
+import sys
+from unittest.mock import MagicMock
+
+# Mock heavy parsing/reranking dependencies pulled in by the rag_agent package
+for name in ["docling", "docling.datamodel", "docling.datamodel.base_models",
+             "docling.datamodel.pipeline_options", "docling.document_converter",
+             "docling_core", "docling_core.types", "docling_core.types.doc",
+             "sentence_transformers"]:
+    sys.modules.setdefault(name, MagicMock())
+
+import asyncio
+import base64
+import io
+import os
+import tempfile
+import threading
+import time
+import unittest
+from unittest.mock import patch
+
+from PIL import Image
+
+from rag_agent.content_processor import IMAGE_PLACEHOLDER, ContentProcessor
+from rag_agent.image_summarizer import ImageSummaryCache, prepare_image
+from utils.call_llm import RateLimiter
+
+def data_uri(color, size=(16, 16)):
+    buffer = io.BytesIO()
+    Image.new("RGB", size, color).save(buffer, "PNG")
+    return "data:image/png;base64," + base64.b64encode(buffer.getvalue()).decode()
+
+class TestImageSummarization(unittest.TestCase):
+    def setUp(self):
+        self.patches = [
+            patch("rag_agent.content_processor.get_image_summary_cache", return_value=ImageSummaryCache()),
+            patch("rag_agent.content_processor.get_rate_limiter", return_value=RateLimiter())
+        ]
+        for p in self.patches:
+            p.start()
+        self.processor = ContentProcessor(None)
+        self.calls = []
+        self.lock = threading.Lock()
+
+    def tearDown(self):
+        for p in self.patches:
+            p.stop()
+
+    def fake_llm(self, prompt, image_paths=None):
+        with self.lock:
+            self.calls.append(image_paths[0])
+        time.sleep(0.1)
+        return f"summary of {image_paths[0].getpixel((0, 0))}"
+
+    def test_concurrent_and_deduplicated(self):
+        images = [data_uri("red"), data_uri("blue"), data_uri("red"), data_uri("green"), data_uri("blue")]
+        start = time.perf_counter()
+        with patch("rag_agent.content_processor.call_llm", side_effect=self.fake_llm):
+            summaries = self.processor.summarize_images(images)
+        elapsed = time.perf_counter() - start
+
+        self.assertEqual(len(self.calls), 3)
+        self.assertLess(elapsed, 0.25)
+        self.assertEqual(summaries[0], summaries[2])
+        self.assertEqual(summaries[1], summaries[4])
+        self.assertEqual(summaries[0], "summary of (255, 0, 0)")
+
+        # Cached across documents
+        with patch("rag_agent.content_processor.call_llm", side_effect=self.fake_llm):
+            self.assertEqual(self.processor.summarize_images([data_uri("green")]), [summaries[3]])
+        self.assertEqual(len(self.calls), 3)
+
+    def test_failures_use_placeholder_and_are_not_cached(self):
+        with patch("rag_agent.content_processor.call_llm", side_effect=RuntimeError("quota")):
+            summaries = self.processor.summarize_images([data_uri("red"), "missing.png"])
+        self.assertEqual(summaries, ["no image summary", "no image summary"])
+
+        with patch("rag_agent.content_processor.call_llm", side_effect=self.fake_llm):
+            self.assertEqual(self.processor.summarize_images([data_uri("red")]), ["summary of (255, 0, 0)"])
+
+    def test_async_variant_bounded(self):
+        self.processor.summary_workers = 2
+        in_flight, peak = [0], [0]
+
+        async def fake_llm_async(prompt, image_paths=None):
+            in_flight[0] += 1
+            peak[0] = max(peak[0], in_flight[0])
+            await asyncio.sleep(0.05)
+            in_flight[0] -= 1
+            return "figure"
+
+        images = [data_uri((i, 0, 0)) for i in range(6)]
+        with patch("rag_agent.content_processor.call_llm_async", side_effect=fake_llm_async):
+            summaries = asyncio.run(self.processor.summarize_images_async(images))
+        self.assertEqual(summaries, ["figure"] * 6)
+        self.assertEqual(peak[0], 2)
+
+    def test_images_downscaled_before_upload(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "large.png")
+            Image.new("RGBA", (3000, 1500), "white").save(path)
+            digest, image = prepare_image(path, max_side=1024)
+        self.assertEqual(image.size, (1024, 512))
+        self.assertEqual(image.mode, "RGB")
+        self.assertEqual(len(digest), 64)
+
+    def test_insert_image_summaries(self):
+        markdown = f"a {IMAGE_PLACEHOLDER} b {IMAGE_PLACEHOLDER} c {IMAGE_PLACEHOLDER} d"
+        result = self.processor.insert_image_summaries(markdown, ["first", "Non-informative"])
+        self.assertEqual(result, f"a picture_counter_0 first b  c {IMAGE_PLACEHOLDER} d")
+        # Extra summaries and summaries containing the placeholder text are left alone
+        result = self.processor.insert_image_summaries(f"x {IMAGE_PLACEHOLDER}", [IMAGE_PLACEHOLDER, "unused"])
+        self.assertEqual(result, f"x picture_counter_0 {IMAGE_PLACEHOLDER}")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,145 @@
+import sys
+from unittest.mock import MagicMock
+
+# Mock heavy parsing/reranking dependencies pulled in by the rag_agent package
+for name in ["docling", "docling.datamodel", "docling.datamodel.base_models",
+             "docling.datamodel.pipeline_options", "docling.document_converter",
+             "docling_core", "docling_core.types", "docling_core.types.doc",
+             "sentence_transformers"]:
+    sys.modules.setdefault(name, MagicMock())
+
+import logging
+import os
+import tempfile
+import unittest
+
+from rag_agent import MedicalRAG
+from rag_agent.ingest_manifest import IngestManifest
+from utils.app_config import AppConfig
+
+def write(path, text):
+    with open(path, "w") as f:
+        f.write(text)
+
+class TestIngestManifest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.docs = os.path.join(self.tmp.name, "docs")
+        os.makedirs(self.docs)
+        self.manifest_path = os.path.join(self.tmp.name, "ingest_manifest.json")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def doc(self, name):
+        return os.path.join(self.docs, name)
+
+    def test_plan_classifies_files(self):
+        for name in ("a.pdf", "b.pdf", "c.pdf", "gone.pdf"):
+            write(self.doc(name), name)
+        manifest = IngestManifest(self.manifest_path)
+        for name in ("a.pdf", "b.pdf", "c.pdf", "gone.pdf"):
+            manifest.record(self.doc(name), [f"{name}-id"])
+        manifest.save()
+
+        write(self.doc("b.pdf"), "b.pdf edited")
+        os.utime(self.doc("c.pdf"), (0, 12345))  # touched, same bytes
+        os.remove(self.doc("gone.pdf"))
+        write(self.doc("new.pdf"), "new")
+
+        files = [self.doc(n) for n in ("a.pdf", "b.pdf", "c.pdf", "new.pdf")]
+        plan = IngestManifest(self.manifest_path).plan(self.docs, files)
+        self.assertEqual(plan["unchanged"], [self.doc("a.pdf"), self.doc("c.pdf")])
+        self.assertEqual(plan["changed"], [self.doc("b.pdf")])
+        self.assertEqual(plan["new"], [self.doc("new.pdf")])
+        self.assertEqual(plan["deleted"], [self.doc("gone.pdf")])
+
+    def test_ingest_directory_is_incremental(self):
+        config = AppConfig()
+        config.rag.ingest_pipeline = False
+        config.rag.ingest_manifest_path = self.manifest_path
+        rag = MedicalRAG.__new__(MedicalRAG)
+        rag.config = config
+        rag.logger = logging.getLogger("test")
+        rag.vector_store = MagicMock()
+        ingested = []
+
+        def ingest_file(path, metadata=None):
+            ingested.append(os.path.basename(path))
+            return {"success": True, "chunks_processed": 1, "chunk_ids": [f"id-{len(ingested)}"]}
+        rag.ingest_file = ingest_file
+
+        write(self.doc("a.pdf"), "a")
+        write(self.doc("b.pdf"), "b")
+        rag.ingest_directory(self.docs)
+        self.assertEqual(sorted(ingested), ["a.pdf", "b.pdf"])
+
+        ingested.clear()
+        result = rag.ingest_directory(self.docs)
+        self.assertEqual(ingested, [])
+        self.assertEqual(result["skipped_unchanged"], 2)
+        rag.vector_store.delete_source.assert_not_called()
+
+        write(self.doc("a.pdf"), "a edited")
+        b_id = IngestManifest(self.manifest_path).get(self.doc("b.pdf"))["chunk_ids"]
+        os.remove(self.doc("b.pdf"))
+        result = rag.ingest_directory(self.docs)
+        self.assertEqual(ingested, ["a.pdf"])
+        self.assertEqual((result["changed_documents"], result["deleted_documents"]), (1, 1))
+        deleted_ids = [call.args[1] for call in rag.vector_store.delete_source.call_args_list]
+        self.assertIn(b_id, deleted_ids)
+        self.assertIsNone(IngestManifest(self.manifest_path).get(self.doc("b.pdf")))
+
+    def test_unchanged_files_missing_from_store_reingested(self):
+        config = AppConfig()
+        config.rag.ingest_pipeline = False
+        config.rag.ingest_manifest_path = self.manifest_path
+        rag = MedicalRAG.__new__(MedicalRAG)
+        rag.config = config
+        rag.logger = logging.getLogger("test")
+        rag.vector_store = MagicMock()
+        ingested = []
+
+        def ingest_file(path, metadata=None):
+            ingested.append(os.path.basename(path))
+            return {"success": True, "chunks_processed": 1, "chunk_ids": ["id"]}
+        rag.ingest_file = ingest_file
+
+        write(self.doc("a.pdf"), "a")
+        rag.ingest_directory(self.docs)
+
+        # e.g. a new process with an in-memory store, or the storage was wiped
+        ingested.clear()
+        rag.vector_store.sync_source.return_value = False
+        result = rag.ingest_directory(self.docs)
+        self.assertEqual(ingested, ["a.pdf"])
+        self.assertEqual(result["skipped_unchanged"], 0)
+
+    def test_failed_upsert_not_recorded(self):
+        config = AppConfig()
+        config.rag.ingest_pipeline = False
+        config.rag.ingest_manifest_path = self.manifest_path
+        rag = MedicalRAG.__new__(MedicalRAG)
+        rag.config = config
+        rag.logger = logging.getLogger("test")
+        rag.parsed_content_dir = self.tmp.name
+        rag.doc_parser = MagicMock()
+        rag.doc_parser.parse_document.return_value = ("text", [])
+        rag.content_processor = MagicMock()
+        rag.content_processor.chunk_document.return_value = ["chunk"]
+        rag.vector_store = MagicMock()
+        rag.vector_store.sync_source.return_value = False
+        rag.vector_store.create_vectorstore.side_effect = [RuntimeError("embedding failed"), ["id-1"]]
+
+        write(self.doc("a.pdf"), "a")
+        result = rag.ingest_directory(self.docs)
+        self.assertEqual(result["failed_documents"], 1)
+        self.assertIsNone(IngestManifest(self.manifest_path).get(self.doc("a.pdf")))
+
+        # The next run retries the file instead of treating it as unchanged
+        result = rag.ingest_directory(self.docs)
+        self.assertEqual(result["documents_ingested"], 1)
+        self.assertEqual(IngestManifest(self.manifest_path).get(self.doc("a.pdf"))["chunk_ids"], ["id-1"])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,129 @@
+import sys
+from unittest.mock import MagicMock
+
+# Mock heavy parsing/reranking dependencies pulled in by the rag_agent package
+for name in ["docling", "docling.datamodel", "docling.datamodel.base_models",
+             "docling.datamodel.pipeline_options", "docling.document_converter",
+             "docling_core", "docling_core.types", "docling_core.types.doc",
+             "sentence_transformers"]:
+    sys.modules.setdefault(name, MagicMock())
+
+import asyncio
+import base64
+import io
+import logging
+import os
+import tempfile
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from PIL import Image
+
+from rag_agent import MedicalRAG
+from rag_agent.content_processor import ContentProcessor, IMAGE_PLACEHOLDER
+from rag_agent.ingest_pipeline import IngestPipeline
+from utils.app_config import AppConfig
+
+def data_uri(color):
+    buffer = io.BytesIO()
+    Image.new("RGB", (8, 8), color).save(buffer, "PNG")
+    return "data:image/png;base64," + base64.b64encode(buffer.getvalue()).decode()
+
+def fake_parse(path, output_dir):
+    time.sleep(0.05)
+    if path.endswith("broken.pdf"):
+        raise RuntimeError("cannot parse")
+    return f"# {path}\nintro {IMAGE_PLACEHOLDER}\n# Methods\ntext", [data_uri((len(path), 0, 0))]
+
+async def fake_llm(prompt, image_paths=None):
+    await asyncio.sleep(0.05)
+    return "figure summary" if image_paths else "split_after: 0"
+
+def make_rag(known=()):
+    vector_store = MagicMock()
+    vector_store.sync_source.side_effect = lambda path: path in known
+    content_processor = ContentProcessor(None)
+    content_processor.chunking_mode = "llm"
+    return SimpleNamespace(
+        vector_store=vector_store,
+        content_processor=content_processor,
+        parsed_content_dir="out"
+    )
+
+class TestIngestPipeline(unittest.TestCase):
+    def run_pipeline(self, rag, files, **kwargs):
+        with ThreadPoolExecutor(max_workers=4) as executor, \
+                patch("rag_agent.content_processor.call_llm_async", side_effect=fake_llm):
+            pipeline = IngestPipeline(rag, parse_workers=4, llm_concurrency=4,
+                                      parse_executor=executor, parse_fn=fake_parse, **kwargs)
+            return asyncio.run(pipeline.run(files))
+
+    def test_documents_flow_through_all_stages(self):
+        rag = make_rag(known={"old.pdf"})
+        files = [f"doc{i}.pdf" for i in range(8)] + ["old.pdf", "broken.pdf"]
+        start = time.perf_counter()
+        report = self.run_pipeline(rag, files)
+        elapsed = time.perf_counter() - start
+
+        results = {r["file"]: r for r in report["files"]}
+        self.assertTrue(all(results[f"doc{i}.pdf"]["success"] for i in range(8)))
+        self.assertEqual(results["doc0.pdf"]["chunks_processed"], 2)
+        self.assertTrue(results["old.pdf"]["skipped"])
+        self.assertFalse(results["broken.pdf"]["success"])
+        self.assertIn("cannot parse", results["broken.pdf"]["error"])
+
+        # Upserted chunks carry the image summary, and no document is written twice
+        upserted = [doc for call in rag.vector_store.create_vectorstore_batch.call_args_list
+                    for doc in call.args[0]]
+        self.assertEqual(sorted(path for _, path in upserted), sorted(f"doc{i}.pdf" for i in range(8)))
+        self.assertIn("figure summary", upserted[0][0][0])
+
+        # 9 parses + 16 LLM calls at 50ms each would take >1s one after another
+        self.assertLess(elapsed, 0.8)
+        self.assertEqual(report["stage_stats"]["parse"]["failures"], 1)
+        self.assertEqual(report["stage_stats"]["llm"]["items"], 8)
+        self.assertIn(report["bottleneck"], ("parse", "llm", "embed"))
+
+    def test_embed_batches_group_documents(self):
+        rag = make_rag()
+        self.run_pipeline(rag, [f"doc{i}.pdf" for i in range(6)], embed_batch_chunks=4, queue_size=8)
+
+        batch_sizes = [len(call.args[0]) for call in rag.vector_store.create_vectorstore_batch.call_args_list]
+        self.assertEqual(sum(batch_sizes), 6)
+        self.assertTrue(all(size <= 2 for size in batch_sizes))
+
+class TestIngestDirectoryPipeline(unittest.TestCase):
+    def test_runs_from_a_running_event_loop(self):
+        config = AppConfig()
+        config.rag.ingest_pipeline = True
+        config.rag.ingest_manifest_path = None
+        rag = MedicalRAG.__new__(MedicalRAG)
+        rag.config = config
+        rag.logger = logging.getLogger("test")
+
+        async def run(files, metadata=None):
+            await asyncio.sleep(0)
+            return {
+                "files": [{"file": f, "success": True, "chunks_processed": 1} for f in files],
+                "stage_stats": {},
+                "bottleneck": None
+            }
+        pipeline = MagicMock()
+        pipeline.run.side_effect = run
+
+        async def ingest_from_async_code(directory):
+            return rag.ingest_directory(directory)
+
+        with tempfile.TemporaryDirectory() as tmp, \
+                patch("rag_agent.IngestPipeline.from_config", return_value=pipeline):
+            with open(os.path.join(tmp, "a.pdf"), "w") as f:
+                f.write("a")
+            result = asyncio.run(ingest_from_async_code(tmp))
+        self.assertTrue(result["success"])
+        self.assertEqual(result["documents_ingested"], 1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,79 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import MagicMock, patch
+
+import utils.call_llm as llm
+from utils.llm_cache import LLMResponseCache
+
+class TestLLMResponseCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "cache.sqlite")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_key_depends_on_every_input(self):
+        base = LLMResponseCache.make_key("m", None, "p")
+        self.assertEqual(base, LLMResponseCache.make_key("m", None, "p"))
+        self.assertNotEqual(base, LLMResponseCache.make_key("m2", None, "p"))
+        self.assertNotEqual(base, LLMResponseCache.make_key("m", "sys", "p"))
+
+        image = os.path.join(self.tmp.name, "img.png")
+        with open(image, "wb") as f:
+            f.write(b"one")
+        with_image = LLMResponseCache.make_key("m", None, "p", [image])
+        with open(image, "wb") as f:
+            f.write(b"two")
+        self.assertNotEqual(with_image, LLMResponseCache.make_key("m", None, "p", [image]))
+
+    def test_roundtrip_persists_and_counts(self):
+        cache = LLMResponseCache(self.path)
+        self.assertIsNone(cache.get("k"))
+        cache.put("k", "answer")
+        cache.close()
+
+        cache = LLMResponseCache(self.path)
+        self.assertEqual(cache.get("k"), "answer")
+        stats = cache.stats()
+        self.assertEqual((stats["hits"], stats["misses"], stats["entries"]), (1, 0, 1))
+        cache.close()
+
+    def test_ttl_expiry(self):
+        cache = LLMResponseCache(self.path, ttl=10)
+        with patch("utils.llm_cache.time.time", return_value=1000.0):
+            cache.put("k", "answer")
+        with patch("utils.llm_cache.time.time", return_value=1011.0):
+            self.assertIsNone(cache.get("k"))
+        cache.close()
+
+    def test_lru_eviction_by_size(self):
+        cache = LLMResponseCache(self.path, max_bytes=10)
+        with patch("utils.llm_cache.time.time", side_effect=[1.0, 2.0, 3.0, 4.0]):
+            cache.put("a", "12345")
+            cache.put("b", "12345")
+            cache.get("a")  # a is now more recently used than b
+            cache.put("c", "12345")
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("a"), "12345")
+        self.assertEqual(cache.get("c"), "12345")
+        cache.close()
+
+class TestCallLLMWithCache(unittest.TestCase):
+    @patch('utils.call_llm.genai.Client')
+    def test_repeated_prompt_served_from_cache(self, mock_client_cls):
+        mock_client_cls.return_value.models.generate_content.return_value = MagicMock(text="ok")
+        llm.get_client_pool().clients = {}
+
+        with patch.object(llm, "_cache", LLMResponseCache(":memory:")), \
+                patch.object(llm.config.llm, "cache_enabled", True):
+            self.assertEqual(llm.call_llm("same prompt"), "ok")
+            self.assertEqual(llm.call_llm("same prompt"), "ok")
+            self.assertEqual(llm.get_response_cache().stats()["hits"], 1)
+
+        self.assertEqual(mock_client_cls.return_value.models.generate_content.call_count, 1)
+        llm.get_client_pool().clients = {}
+
+if __name__ == '__main__':
+    unittest.main()
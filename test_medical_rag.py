@@ -0,0 +1,79 @@
+import sys
+from unittest.mock import MagicMock
+
+# Mock heavy parsing/reranking dependencies pulled in by the rag_agent package
+for name in ["docling", "docling.datamodel", "docling.datamodel.base_models",
+             "docling.datamodel.pipeline_options", "docling.document_converter",
+             "docling_core", "docling_core.types", "docling_core.types.doc",
+             "sentence_transformers"]:
+    sys.modules.setdefault(name, MagicMock())
+
+import asyncio
+import logging
+import time
+import unittest
+from unittest.mock import AsyncMock
+
+from rag_agent import MedicalRAG
+
+def make_rag(expanded_query, docs_by_query, expansion_delay=0.0):
+    """MedicalRAG with fake components; retrieval returns docs_by_query[query]."""
+    rag = MedicalRAG.__new__(MedicalRAG)
+    rag.logger = logging.getLogger("test")
+    rag.parsed_content_dir = "out"
+    rag.calls = []
+
+    def retrieve(query, filters=None):
+        rag.calls.append(("retrieve", query, time.monotonic()))
+        return docs_by_query[query]
+
+    async def expand(query):
+        rag.calls.append(("expand", query, time.monotonic()))
+        await asyncio.sleep(expansion_delay)
+        return {"original_query": query, "expanded_query": expanded_query, "expansion_source": "llm"}
+
+    def expand_sync(query):
+        return {"original_query": query, "expanded_query": expanded_query, "expansion_source": "llm"}
+
+    rag.vector_store = MagicMock()
+    rag.vector_store.retrieve_relevant_chunks.side_effect = retrieve
+    rag.query_expander = MagicMock()
+    rag.query_expander.expand_query_async = AsyncMock(side_effect=expand)
+    rag.query_expander.expand_query.side_effect = expand_sync
+    rag.reranker = MagicMock()
+    rag.reranker.rerank.side_effect = lambda query, docs, _: (docs[:3], [])
+    rag.response_generator = MagicMock()
+    rag.response_generator.generate_response.side_effect = \
+        lambda query, retrieved_docs, picture_paths, chat_history: {"response": query, "docs": retrieved_docs}
+    return rag
+
+def doc(id):
+    return {"id": id, "content": f"chunk {id}", "score": 1.0, "source": "a.pdf"}
+
+class TestProcessQueryAsync(unittest.TestCase):
+    def test_unchanged_expansion_matches_sequential_path(self):
+        rag = make_rag("q", {"q": [doc(1), doc(2)]})
+        sequential = rag.process_query("q")
+        concurrent = asyncio.run(rag.process_query_async("q"))
+
+        self.assertEqual(concurrent["docs"], sequential["docs"])
+        self.assertEqual(concurrent["response"], sequential["response"])
+        rag.reranker.rerank.assert_called_with("q", [doc(1), doc(2)], "out")
+
+    def test_candidates_merged_and_deduplicated(self):
+        rag = make_rag("q expanded", {"q": [doc(1), doc(2)], "q expanded": [doc(2), doc(3)]})
+        result = asyncio.run(rag.process_query_async("q"))
+
+        rag.reranker.rerank.assert_called_once_with("q expanded", [doc(2), doc(3), doc(1)], "out")
+        self.assertEqual(result["response"], "q expanded")
+
+    def test_raw_retrieval_overlaps_expansion(self):
+        rag = make_rag("q", {"q": [doc(1)]}, expansion_delay=0.2)
+        asyncio.run(rag.process_query_async("q"))
+
+        expand_end = next(t for kind, _, t in rag.calls if kind == "expand") + 0.2
+        retrieve_start = next(t for kind, _, t in rag.calls if kind == "retrieve")
+        self.assertLess(retrieve_start, expand_end)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -3,8 +3,8 @@ from unittest.mock import MagicMock
 
 # Mock google.genai BEFORE importing nodes
 mock_genai = MagicMock()
-sys.modules["google"] = MagicMock()
-sys.modules["google.genai"] = mock_genai
+sys.modules.setdefault("google", MagicMock())
+sys.modules.setdefault("google.genai", mock_genai)
 
 from nodes import PlannerNode
 import unittest
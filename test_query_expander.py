@@ -0,0 +1,106 @@
+import sys
+from unittest.mock import MagicMock
+
+# Mock heavy parsing/reranking dependencies pulled in by the rag_agent package
+for name in ["docling", "docling.datamodel", "docling.datamodel.base_models",
+             "docling.datamodel.pipeline_options", "docling.document_converter",
+             "docling_core", "docling_core.types", "docling_core.types.doc",
+             "sentence_transformers"]:
+    sys.modules.setdefault(name, MagicMock())
+
+import asyncio
+import json
+import os
+import tempfile
+import unittest
+from unittest.mock import AsyncMock, patch
+
+from rag_agent.medical_synonyms import SynonymIndex, get_default_index
+from rag_agent.query_expander import QueryExpander
+from utils.app_config import AppConfig
+
+class TestSynonymIndex(unittest.TestCase):
+    def test_longest_phrase_match(self):
+        index = SynonymIndex({"suy tim": ["heart failure"], "suy": ["failure"]})
+        text = "Điều trị suy tim mạn"
+        matches = index.find(text)
+        self.assertEqual(len(matches), 1)
+        start, end, expansions = matches[0]
+        self.assertEqual(text[start:end], "suy tim")
+        self.assertEqual(expansions, ["heart failure"])
+
+    def test_abbreviations_are_case_sensitive(self):
+        index = get_default_index()
+        self.assertTrue(index.find("Phác đồ THA"))
+        self.assertFalse(index.find("ks gần bệnh viện"))
+        self.assertTrue(index.find("Tăng Huyết Áp ở người già"))
+
+    def test_from_json(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "dict.json")
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump({"synonyms": {"XYZ": ["xyz syndrome"]}, "ambiguous": {"AB": ["a", "b"]}}, f)
+            index = SynonymIndex.from_json(path)
+        self.assertEqual(len(index), 1)
+        self.assertEqual(index.ambiguous_terms("AB and XYZ"), ["AB"])
+
+class TestQueryExpander(unittest.TestCase):
+    def setUp(self):
+        self.config = AppConfig()
+
+    def test_known_abbreviation_expanded_without_llm(self):
+        expander = QueryExpander(self.config)
+        with patch("rag_agent.query_expander.call_llm") as llm:
+            result = expander.expand_query("Điều trị THA ở bệnh nhân ĐTĐ")
+        llm.assert_not_called()
+        self.assertEqual(result["expansion_source"], "local")
+        self.assertEqual(
+            result["expanded_query"],
+            "Điều trị THA (tăng huyết áp, hypertension) ở bệnh nhân ĐTĐ (đái tháo đường, diabetes mellitus)"
+        )
+
+    def test_plain_query_passes_through(self):
+        expander = QueryExpander(self.config)
+        with patch("rag_agent.query_expander.call_llm") as llm:
+            result = expander.expand_query("liều paracetamol cho trẻ em")
+        llm.assert_not_called()
+        self.assertEqual(result["expanded_query"], "liều paracetamol cho trẻ em")
+        self.assertEqual(result["expansion_source"], "none")
+
+    def test_ambiguous_queries_fall_back_to_llm(self):
+        expander = QueryExpander(self.config)
+        long_query = " ".join(["word"] * self.config.rag.query_expansion_llm_min_words)
+        with patch("rag_agent.query_expander.call_llm", return_value="expanded") as llm:
+            for query in ["Chẩn đoán PE", "Điều trị XQZ", long_query]:
+                self.assertEqual(expander.expand_query(query)["expansion_source"], "llm", query)
+        self.assertEqual(llm.call_count, 3)
+
+    def test_async_fallback_uses_async_llm_call(self):
+        expander = QueryExpander(self.config)
+        with patch("rag_agent.query_expander.call_llm_async", new=AsyncMock(return_value="expanded")) as llm:
+            result = asyncio.run(expander.expand_query_async("Chẩn đoán PE"))
+            local = asyncio.run(expander.expand_query_async("THA"))
+        self.assertEqual(result["expanded_query"], "expanded")
+        self.assertEqual(local["expansion_source"], "local")
+        llm.assert_awaited_once()
+
+    def test_local_mode_never_calls_llm(self):
+        self.config.rag.query_expansion_mode = "local"
+        expander = QueryExpander(self.config)
+        with patch("rag_agent.query_expander.call_llm") as llm:
+            expander.expand_query("Chẩn đoán PE")
+        llm.assert_not_called()
+
+    def test_hit_rate_counters(self):
+        expander = QueryExpander(self.config)
+        with patch("rag_agent.query_expander.call_llm", return_value="expanded"):
+            expander.expand_query("THA")
+            expander.expand_query("NMCT")
+            expander.expand_query("Chẩn đoán PE")
+            expander.expand_query("paracetamol")
+        stats = expander.stats()
+        self.assertEqual((stats["local"], stats["llm"], stats["none"], stats["total"]), (2, 1, 1, 4))
+        self.assertEqual(stats["local_hit_rate"], 0.5)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,92 @@
+import sys
+from unittest.mock import MagicMock
+
+# Mock heavy parsing/reranking dependencies pulled in by the rag_agent package
+for name in ["docling", "docling.datamodel", "docling.datamodel.base_models",
+             "docling.datamodel.pipeline_options", "docling.document_converter",
+             "docling_core", "docling_core.types", "docling_core.types.doc",
+             "sentence_transformers"]:
+    sys.modules.setdefault(name, MagicMock())
+
+import os
+import tempfile
+import threading
+import unittest
+from unittest.mock import patch
+
+import rag_agent.reranker as reranker_module
+from rag_agent.reranker import Reranker, RerankerService
+from utils.app_config import AppConfig
+
+class LengthModel:
+    """Fake cross-encoder: score is the document length; records each predict call."""
+    def __init__(self):
+        self.calls = []
+
+    def predict(self, pairs, batch_size=32):
+        self.calls.append(list(pairs))
+        return [float(len(doc)) for _, doc in pairs]
+
+class TestRerankerService(unittest.TestCase):
+    def test_scores_keep_input_order_and_batches_are_length_sorted(self):
+        model = LengthModel()
+        service = RerankerService(model, window_ms=1)
+        pairs = [("q", "ccc"), ("q", "a"), ("q", "bb")]
+
+        self.assertEqual(service.score(pairs), [3.0, 1.0, 2.0])
+        self.assertEqual([doc for _, doc in model.calls[0]], ["a", "bb", "ccc"])
+
+    def test_concurrent_requests_merged_into_one_pass(self):
+        model = LengthModel()
+        service = RerankerService(model, window_ms=200)
+        results = {}
+        barrier = threading.Barrier(3)
+
+        def worker(i):
+            barrier.wait()
+            results[i] = service.score([(f"q{i}", "x" * (i + 1))])
+
+        threads = [threading.Thread(target=worker, args=(i,)) for i in range(3)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        self.assertEqual(len(model.calls), 1)
+        self.assertEqual(results, {0: [1.0], 1: [2.0], 2: [3.0]})
+
+class TestSharedReranker(unittest.TestCase):
+    def test_model_loaded_once_across_instances(self):
+        with patch.object(reranker_module, "_services", {}), \
+                patch.object(reranker_module, "CrossEncoder", return_value=LengthModel()) as cross_encoder:
+            config = AppConfig()
+            first, second = Reranker(config), Reranker(config)
+
+            self.assertEqual(cross_encoder.call_count, 1)
+            self.assertIs(first.model, second.model)
+
+            docs, _ = first.rerank("q", [{"content": "short", "source": "a.pdf"},
+                                         {"content": "much longer text", "source": "b.pdf"}], "out")
+            self.assertEqual(docs[0]["content"], "much longer text")
+
+class TestCrossEncoderBackends(unittest.TestCase):
+    def test_unknown_backend_rejected(self):
+        with self.assertRaises(ValueError):
+            reranker_module.load_cross_encoder("m", backend="tensorrt")
+
+    def test_onnx_int8_reuses_exported_quantized_graph(self):
+        with tempfile.TemporaryDirectory() as tmp, \
+                patch.object(reranker_module, "CrossEncoder") as cross_encoder:
+            export_dir = os.path.join(tmp, "org__model")
+            os.makedirs(os.path.join(export_dir, "onnx"))
+            for name in ("model.onnx", "model_qint8_avx2.onnx"):
+                open(os.path.join(export_dir, "onnx", name), "w").close()
+
+            reranker_module.load_cross_encoder("org/model", "onnx-int8", tmp, "avx2")
+
+            cross_encoder.assert_called_once_with(
+                export_dir, backend="onnx", model_kwargs={"file_name": "onnx/model_qint8_avx2.onnx"}
+            )
+
+if __name__ == '__main__':
+    unittest.main()
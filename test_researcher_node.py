@@ -2,26 +2,26 @@ import sys
 from unittest.mock import MagicMock
 
 # Mock modules to avoid import errors
-sys.modules["google"] = MagicMock()
-sys.modules["google.genai"] = MagicMock()
-sys.modules["PIL"] = MagicMock()
-sys.modules["PIL.Image"] = MagicMock()
-sys.modules["dotenv"] = MagicMock()
-sys.modules["mcp"] = MagicMock()
-sys.modules["mcp.server"] = MagicMock()
-sys.modules["mcp.server.fastmcp"] = MagicMock()
-sys.modules["docx"] = MagicMock()
-sys.modules["docx.shared"] = MagicMock()
-sys.modules["docx.enum"] = MagicMock()
-sys.modules["docx.enum.text"] = MagicMock()
-sys.modules["docx.enum.style"] = MagicMock()
-sys.modules["docx.oxml"] = MagicMock()
-sys.modules["docx.oxml.ns"] = MagicMock()
-sys.modules["yaml"] = MagicMock()
+sys.modules.setdefault("google", MagicMock())
+sys.modules.setdefault("google.genai", MagicMock())
+sys.modules.setdefault("PIL", MagicMock())
+sys.modules.setdefault("PIL.Image", MagicMock())
+sys.modules.setdefault("dotenv", MagicMock())
+sys.modules.setdefault("mcp", MagicMock())
+sys.modules.setdefault("mcp.server", MagicMock())
+sys.modules.setdefault("mcp.server.fastmcp", MagicMock())
+sys.modules.setdefault("docx", MagicMock())
+sys.modules.setdefault("docx.shared", MagicMock())
+sys.modules.setdefault("docx.enum", MagicMock())
+sys.modules.setdefault("docx.enum.text", MagicMock())
+sys.modules.setdefault("docx.enum.style", MagicMock())
+sys.modules.setdefault("docx.oxml", MagicMock())
+sys.modules.setdefault("docx.oxml.ns", MagicMock())
+sys.modules.setdefault("yaml", MagicMock())
 
 import unittest
 import asyncio
-from unittest.mock import patch
+from unittest.mock import patch, AsyncMock
 from pocketflow import AsyncFlow
 from nodes import ResearcherNode
 
@@ -39,7 +39,7 @@ class TestResearcherNode(unittest.TestCase):
 
     def test_researcher_node_success(self):
         # Mock dependencies
-        with patch('nodes.call_llm') as mock_call_llm:
+        with patch('nodes.call_llm_async', new_callable=AsyncMock) as mock_call_llm:
             # call_llm return value
             mock_call_llm.return_value = "query"
 
@@ -67,6 +67,10 @@ class TestResearcherNode(unittest.TestCase):
 
             # rag_agent.ingest_text_chunks should be called twice
             self.assertEqual(self.shared["rag_agent"].ingest_text_chunks.call_count, 2)
+            # Results are tagged with their blueprint section
+            sections = sorted(call.kwargs["metadata"]["section"]
+                              for call in self.shared["rag_agent"].ingest_text_chunks.call_args_list)
+            self.assertEqual(sections, ["Section 1", "Section 2"])
 
             # Check results in shared
             self.assertIn("research_log", self.shared)
@@ -75,7 +79,7 @@ class TestResearcherNode(unittest.TestCase):
                 self.assertEqual(res, "Ingested 1 results.")
 
     def test_researcher_node_error(self):
-        with patch('nodes.call_llm') as mock_call_llm:
+        with patch('nodes.call_llm_async', new_callable=AsyncMock) as mock_call_llm:
             # Simulate an exception in call_llm
             mock_call_llm.side_effect = Exception("LLM Error")
 
@@ -91,7 +95,7 @@ class TestResearcherNode(unittest.TestCase):
         # Test case where web_search_agent is None
         self.shared["web_search_agent"] = None
 
-        with patch('nodes.call_llm') as mock_call_llm:
+        with patch('nodes.call_llm_async', new_callable=AsyncMock) as mock_call_llm:
             mock_call_llm.return_value = "query"
 
             flow = AsyncFlow(start=self.node)
@@ -0,0 +1,140 @@
+import sys
+from unittest.mock import MagicMock
+
+# Mock heavy parsing/reranking dependencies pulled in by the rag_agent package
+for name in ["docling", "docling.datamodel", "docling.datamodel.base_models",
+             "docling.datamodel.pipeline_options", "docling.document_converter",
+             "docling_core", "docling_core.types", "docling_core.types.doc",
+             "sentence_transformers"]:
+    sys.modules.setdefault(name, MagicMock())
+
+import re
+import asyncio
+import unittest
+from unittest.mock import patch
+
+from rag_agent.content_processor import ContentProcessor
+from rag_agent.semantic_chunker import merge_sections, split_oversized
+from utils.call_llm import estimate_tokens
+
+def words(n, word="word"):
+    return " ".join([word] * n)
+
+class TestMergeSections(unittest.TestCase):
+    def test_small_sections_merged_up_to_min_words(self):
+        sections = [words(100), words(100), words(100), words(100)]
+        orthogonal = [[1, 0], [0, 1], [1, 0], [0, 1]]
+        chunks = merge_sections(sections, orthogonal, min_words=250, max_words=512)
+        self.assertEqual([len(c.split()) for c in chunks], [400])
+
+    def test_topic_shift_starts_new_chunk_after_min_words(self):
+        sections = [words(150, "heart"), words(150, "heart"), words(150, "kidney"), words(150, "kidney")]
+        embeddings = [[1, 0], [0.9, 0.1], [0, 1], [0.1, 0.9]]
+        chunks = merge_sections(sections, embeddings, min_words=256, max_words=512)
+        self.assertEqual(len(chunks), 2)
+        self.assertNotIn("kidney", chunks[0])
+        self.assertNotIn("heart", chunks[1])
+
+    def test_chunks_never_exceed_max_words(self):
+        sections = [words(200)] * 6
+        same = [[1, 0]] * 6
+        chunks = merge_sections(sections, same, min_words=256, max_words=512)
+        self.assertTrue(all(len(c.split()) <= 512 for c in chunks))
+        self.assertEqual(sum(len(c.split()) for c in chunks), 1200)
+
+    def test_short_tail_folded_into_previous_chunk(self):
+        sections = [words(300), words(50)]
+        chunks = merge_sections(sections, [[1, 0], [0, 1]], min_words=256, max_words=512)
+        self.assertEqual(len(chunks), 1)
+
+    def test_split_oversized_on_paragraphs_then_words(self):
+        section = "\n\n".join([words(300), words(300), words(1100)])
+        pieces = split_oversized(section, 512)
+        self.assertEqual([len(p.split()) for p in pieces], [300, 300, 512, 512, 76])
+
+class TestContentProcessorChunking(unittest.TestCase):
+    def test_semantic_mode_uses_no_llm(self):
+        processor = ContentProcessor(None)
+        processor.chunking_mode = "semantic"
+        document = "\n".join(f"# Heading {i}\n{words(120)}" for i in range(8))
+        with patch("rag_agent.content_processor.get_embedding",
+                   side_effect=lambda texts: [[1.0, float(i % 2)] for i in range(len(texts))]) as embed, \
+                patch("rag_agent.content_processor.call_llm") as llm:
+            first = processor.chunk_document(document)
+            second = processor.chunk_document(document)
+
+        llm.assert_not_called()
+        self.assertEqual(embed.call_count, 2)
+        self.assertEqual(first, second)
+        self.assertTrue(all(256 <= len(c.split()) <= 512 for c in first))
+        self.assertTrue(first[0].startswith("# Heading 0"))
+        self.assertTrue(all(c.startswith("# Heading") for c in first))
+
+    def test_llm_mode_tolerates_noisy_split_response(self):
+        processor = ContentProcessor(None)
+        self.assertEqual(processor.chunking_mode, "llm")  # LLM split points by default, semantic is opt-in
+        with patch("rag_agent.content_processor.call_llm", return_value="split_after: 0, 1."):
+            chunks = processor.chunk_document("# A\nalpha\n# B\nbeta\n# C\ngamma")
+        self.assertEqual(len(chunks), 3)
+
+def split_after_even_ids(prompt):
+    """Fake chunking LLM: split after every even chunk id shown in the prompt."""
+    ids = [int(i) for i in re.findall(r"<\|start_chunk_(\d+)\|>", prompt)]
+    return "split_after: " + ", ".join(str(i) for i in ids if i % 2 == 0)
+
+class TestWindowedLLMChunking(unittest.TestCase):
+    def setUp(self):
+        self.processor = ContentProcessor(None)
+        self.processor.chunking_mode = "llm"
+        self.document = "\n".join(f"## Section {i}\n{words(100)}" for i in range(20))
+
+    def test_small_document_uses_one_prompt(self):
+        with patch("rag_agent.content_processor.call_llm", side_effect=split_after_even_ids) as llm:
+            chunks = self.processor.chunk_document(self.document)
+        self.assertEqual(llm.call_count, 1)
+        self.assertEqual(len(chunks), 11)
+
+    def test_windows_overlap_and_cover_document(self):
+        self.processor.chunk_window_tokens = 600  # ~4 sections per window
+        windows = self.processor._plan_windows(self.processor._split_sections(self.document))
+        self.assertGreater(len(windows), 1)
+        for (start, end, own_start, own_end), following in zip(windows, windows[1:]):
+            self.assertEqual(following[0], end - self.processor.chunk_window_overlap)
+            self.assertTrue(start <= own_start < own_end <= end)
+            self.assertEqual(own_end, following[2])
+        self.assertEqual((windows[0][2], windows[-1][3]), (0, 20))
+
+    def test_windowed_result_matches_single_prompt(self):
+        with patch("rag_agent.content_processor.call_llm", side_effect=split_after_even_ids):
+            expected = self.processor.chunk_document(self.document)
+        self.processor.chunk_window_tokens = 600
+        limiter = MagicMock()
+        with patch("rag_agent.content_processor.call_llm", side_effect=split_after_even_ids) as llm, \
+                patch("rag_agent.content_processor.get_rate_limiter", return_value=limiter):
+            chunks = self.processor.chunk_document(self.document)
+        self.assertGreater(llm.call_count, 1)
+        self.assertTrue(all(len(call.args[0]) < len(self.document) // 2 for call in llm.call_args_list))
+        self.assertEqual(chunks, expected)
+        # Every concurrent window reserved rate budget for its prompt
+        self.assertEqual(sorted(call.args[0] for call in limiter.acquire_blocking.call_args_list),
+                         sorted(estimate_tokens(call.args[0]) for call in llm.call_args_list))
+
+    def test_async_windows_requested_concurrently(self):
+        self.processor.chunk_window_tokens = 600
+        in_flight = max_in_flight = 0
+
+        async def fake_llm(prompt):
+            nonlocal in_flight, max_in_flight
+            in_flight += 1
+            max_in_flight = max(max_in_flight, in_flight)
+            await asyncio.sleep(0.01)
+            in_flight -= 1
+            return split_after_even_ids(prompt)
+
+        with patch("rag_agent.content_processor.call_llm_async", side_effect=fake_llm):
+            chunks = asyncio.run(self.processor.chunk_document_async(self.document))
+        self.assertEqual(max_in_flight, self.processor.chunk_window_workers)
+        self.assertEqual(len(chunks), 11)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,299 @@
+import sys
+from unittest.mock import MagicMock
+
+# Mock heavy parsing/reranking dependencies pulled in by the rag_agent package
+for name in ["docling", "docling.datamodel", "docling.datamodel.base_models",
+             "docling.datamodel.pipeline_options", "docling.document_converter",
+             "docling_core", "docling_core.types", "docling_core.types.doc",
+             "sentence_transformers"]:
+    sys.modules.setdefault(name, MagicMock())
+
+import os
+import tempfile
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+from fastembed import SparseEmbedding
+
+from utils.app_config import AppConfig
+import rag_agent.vectorstore_qdrant as vectorstore_qdrant
+from rag_agent.vectorstore_qdrant import VectorStore
+
+def fake_embeddings(texts):
+    """Deterministic stand-in for the dense/sparse/ColBERT models."""
+    dense, sparse, late = [], [], []
+    for text in texts:
+        seed = sum(map(ord, text)) % 997
+        rng = np.random.default_rng(seed)
+        dense.append(rng.random(384).tolist())
+        sparse.append(SparseEmbedding(values=np.array([1.0]), indices=np.array([seed])))
+        late.append(rng.random((4, 128)).astype(np.float32))
+    return dense, sparse, late
+
+class TestVectorStore(unittest.TestCase):
+    def setUp(self):
+        config = AppConfig()
+        config.rag.vector_local_path = ":memory:"
+        self.store = VectorStore(config)
+        self.embed_patch = patch("rag_agent.vectorstore_qdrant.get_all_embeddings",
+                                 side_effect=lambda texts, **kwargs: fake_embeddings(texts))
+        self.embed = self.embed_patch.start()
+
+    def tearDown(self):
+        self.embed_patch.stop()
+
+    def count(self):
+        return self.store.client.count(self.store.collection_name).count
+
+    def test_ingest_and_retrieve(self):
+        self.store.create_vectorstore(["alpha chunk", "beta chunk", "gamma chunk"], "doc.pdf")
+        self.assertEqual(self.count(), 3)
+
+        docs = self.store.retrieve_relevant_chunks("beta chunk")
+        self.assertTrue(docs)
+        self.assertEqual(docs[0]["content"], "beta chunk")
+        self.assertEqual(docs[0]["source"], "doc.pdf")
+
+    def test_warm_start_skips_known_source(self):
+        self.store.create_vectorstore(["alpha chunk"], "doc.pdf")
+        self.assertTrue(self.store.has_source("doc.pdf"))
+        self.assertFalse(self.store.has_source("other.pdf"))
+
+        self.store.create_vectorstore(["new chunk"], "doc.pdf")
+        self.assertEqual(self.count(), 1)
+
+    def test_duplicate_content_not_reupserted(self):
+        self.store.create_vectorstore(["shared chunk", "shared chunk", "one"], "a.pdf")
+        self.assertEqual(self.count(), 2)
+
+        self.store.create_vectorstore(["shared chunk", "two"], "b.pdf")
+        self.assertEqual(self.count(), 3)
+        # Only the new chunk was embedded
+        self.assertEqual(self.embed.call_args_list[-1].args[0], ["two"])
+
+    def test_batch_ingest_embeds_documents_together(self):
+        self.store.create_vectorstore(["alpha chunk"], "old.pdf")
+        self.embed.reset_mock()
+
+        self.store.create_vectorstore_batch([
+            (["beta chunk", "alpha chunk"], "a.pdf"),
+            (["gamma chunk"], "b.pdf"),
+            (["ignored"], "old.pdf")
+        ])
+        self.assertEqual(self.embed.call_count, 1)
+        self.assertEqual(self.embed.call_args.args[0], ["beta chunk", "gamma chunk"])
+        self.assertEqual(self.store.retrieve_relevant_chunks("gamma chunk")[0]["source"], "b.pdf")
+
+    def test_delete_source_removes_document_points(self):
+        ids = self.store.create_vectorstore(["alpha chunk", "beta chunk"], "a.pdf")
+        self.store.create_vectorstore(["gamma chunk"], "b.pdf")
+        self.assertEqual(len(ids), 2)
+
+        self.store.delete_source("a.pdf", ids)
+        self.assertEqual(self.count(), 1)
+        self.assertFalse(self.store.has_source("a.pdf"))
+
+    def test_shared_chunk_survives_deleting_one_source(self):
+        ids_a = self.store.create_vectorstore(["shared chunk", "only a"], "a.pdf")
+        ids_b = self.store.create_vectorstore(["shared chunk", "only b"], "b.pdf")
+        self.assertEqual(self.count(), 3)
+        self.assertEqual(ids_a[0], ids_b[0])
+
+        self.store.delete_source("a.pdf", ids_a)
+        self.assertFalse(self.store.has_source("a.pdf"))
+        self.assertTrue(self.store.has_source("b.pdf"))
+        points, _ = self.store.client.scroll(self.store.collection_name, with_payload=True)
+        self.assertEqual(sorted((p.payload["source"], p.payload["content"]) for p in points),
+                         [("b.pdf", "only b"), ("b.pdf", "shared chunk")])
+
+        self.store.delete_source("b.pdf", ids_b)
+        self.assertEqual(self.count(), 0)
+
+    def test_embedding_failure_raises(self):
+        self.embed.side_effect = RuntimeError("model unavailable")
+        with self.assertRaises(RuntimeError):
+            self.store.create_vectorstore(["alpha chunk"], "a.pdf")
+        self.assertFalse(self.store.has_source("a.pdf"))
+
+    def test_batch_retrieval_matches_single_queries(self):
+        self.store.create_vectorstore(["alpha chunk", "beta chunk", "gamma chunk"], "doc.pdf")
+        queries = ["alpha chunk", "gamma chunk"]
+
+        batched = self.store.retrieve_relevant_chunks_batch(queries)
+        single = [self.store.retrieve_relevant_chunks(q) for q in queries]
+        self.assertEqual(
+            [[d["id"] for d in docs] for docs in batched],
+            [[d["id"] for d in docs] for docs in single]
+        )
+        # All queries embedded in one call
+        self.assertEqual(self.embed.call_args_list[-3].args[0], queries)
+
+    def test_compact_colbert_modes(self):
+        for mode in ("int8", "binary"):
+            config = AppConfig()
+            config.rag.vector_local_path = ":memory:"
+            config.rag.colbert_storage = mode
+            store = VectorStore(config)
+
+            params = store._colbert_vector_params()
+            self.assertTrue(params.on_disk)
+            self.assertIsNotNone(params.quantization_config)
+
+            store.create_vectorstore(["alpha chunk", "beta chunk"], "doc.pdf")
+            docs = store.retrieve_relevant_chunks("beta chunk")
+            self.assertEqual(docs[0]["content"], "beta chunk", mode)
+
+    def test_retrieval_plans(self):
+        self.store.create_vectorstore(["alpha chunk", "beta chunk", "gamma chunk"], "doc.pdf")
+        self.embed.reset_mock()
+        with patch("rag_agent.vectorstore_qdrant.get_embedding", side_effect=lambda t: fake_embeddings(t)[0]), \
+                patch("rag_agent.vectorstore_qdrant.get_sparse_embedding", side_effect=lambda t: fake_embeddings(t)[1]) as sparse:
+            for mode in ("rrf", "dense"):
+                self.store.set_retrieval_plan(AppConfig.RAGConfig.RetrievalPlan(mode=mode, limit=2))
+                docs = self.store.retrieve_relevant_chunks("beta chunk")
+                self.assertEqual(docs[0]["content"], "beta chunk", mode)
+                self.assertEqual(len(docs), 2)
+            self.assertEqual(sparse.call_count, 1)  # only the rrf plan needs sparse query vectors
+
+            # Dense cosine of the exact match is 1.0; everything else is cut by the threshold
+            self.store.set_retrieval_plan(AppConfig.RAGConfig.RetrievalPlan(mode="dense", min_score=0.999))
+            self.assertEqual([d["content"] for d in self.store.retrieve_relevant_chunks("beta chunk")], ["beta chunk"])
+        # Neither plan ran the ColBERT query encoder
+        self.embed.assert_not_called()
+
+    def test_retrieval_plan_limits(self):
+        plan = AppConfig.RAGConfig.RetrievalPlan(dense_limit=40, sparse_limit=8, limit=3)
+        self.store.set_retrieval_plan(plan)
+        dense, sparse, late = fake_embeddings(["query"])
+        request = self.store._query_request(dense[0], sparse[0], late[0])
+        self.assertEqual([p.limit for p in request.prefetch], [40, 8])
+        self.assertEqual(request.limit, 3)
+
+        self.store.set_retrieval_plan(None)
+        request = self.store._query_request(dense[0], sparse[0], late[0])
+        self.assertEqual([p.limit for p in request.prefetch], [10, 10])
+        self.assertEqual(request.limit, 5)
+        with self.assertRaises(ValueError):
+            self.store.set_retrieval_plan(AppConfig.RAGConfig.RetrievalPlan(mode="bm25"))
+
+    def test_filtered_retrieval_by_source_and_section(self):
+        self.store.create_vectorstore(["alpha chunk", "beta chunk"], "a.pdf")
+        self.store.create_vectorstore(["beta notes"], "Query: beta", metadata={"session_id": "s1", "section": "Beta"})
+        self.store.create_vectorstore(["beta other"], "Query: beta 2", metadata={"session_id": "s2", "section": "Beta"})
+
+        docs = self.store.retrieve_relevant_chunks("beta chunk", filters={"source": "a.pdf"})
+        self.assertEqual({d["source"] for d in docs}, {"a.pdf"})
+
+        batched = self.store.retrieve_relevant_chunks_batch(
+            ["beta chunk", "beta chunk"],
+            filters=[{"session_id": "s1", "section": "Beta"}, {"session_id": ["s1", "s2"]}]
+        )
+        self.assertEqual([d["content"] for d in batched[0]], ["beta notes"])
+        self.assertEqual(sorted(d["content"] for d in batched[1]), ["beta notes", "beta other"])
+        self.assertEqual(self.store.retrieve_relevant_chunks("beta", filters={"section": "Missing"}), [])
+
+    def test_deduplication_scoped_per_session(self):
+        self.store.create_vectorstore(["shared result"], "Query: q", metadata={"session_id": "s1", "section": "A"})
+        self.store.create_vectorstore(["shared result"], "Query: q", metadata={"session_id": "s1", "section": "A"})
+        self.assertEqual(self.count(), 1)
+
+        # Another session gets its own copy, so its section filter still finds the result
+        self.store.create_vectorstore(["shared result"], "Query: q", metadata={"session_id": "s2", "section": "A"})
+        self.assertEqual(self.count(), 2)
+        docs = self.store.retrieve_relevant_chunks("shared result", filters={"session_id": "s2"})
+        self.assertEqual(len(docs), 1)
+
+    def test_session_filter_excludes_other_sessions(self):
+        self.store.create_vectorstore(["beta guideline"], "guideline.pdf", metadata={"ingest_batch": "b1"})
+        self.store.create_vectorstore(["beta mine"], "Query: q", metadata={"session_id": "s1", "section": "A"})
+        self.store.create_vectorstore(["beta theirs"], "Query: q", metadata={"session_id": "s2", "section": "A"})
+
+        docs = self.store.retrieve_relevant_chunks("beta", filters=self.store.session_filter("s1"))
+        self.assertEqual(sorted(d["content"] for d in docs), ["beta guideline", "beta mine"])
+
+    def test_delete_session_keeps_documents_and_other_sessions(self):
+        self.store.create_vectorstore(["beta guideline"], "guideline.pdf")
+        self.store.create_vectorstore(["beta mine"], "Query: q", metadata={"session_id": "s1", "section": "A"})
+        self.store.create_vectorstore(["beta theirs"], "Query: q", metadata={"session_id": "s2", "section": "A"})
+
+        self.store.delete_session("s1")
+        points, _ = self.store.client.scroll(self.store.collection_name, with_payload=True)
+        self.assertEqual(sorted(p.payload["content"] for p in points), ["beta guideline", "beta theirs"])
+
+    def test_payload_indexes_created_on_server(self):
+        config = AppConfig()
+        config.rag.vector_url = "http://qdrant:6333"
+        client = MagicMock()
+        client.get_collections.return_value.collections = []
+        with patch("rag_agent.vectorstore_qdrant._get_client", return_value=client):
+            store = VectorStore(config)
+        store._create_collection()
+        store.ensure_payload_indexes()
+        fields = [call.kwargs["field_name"] for call in client.create_payload_index.call_args_list]
+        self.assertEqual(fields, ["source", "source_path", "source_paths", "session_id", "section", "ingest_batch",
+                                  "content_hash"])
+
+        # Local stores filter without indexes
+        self.store._create_collection()
+        self.assertFalse(self.store._payload_indexed)
+
+class TestPersistentWarmStart(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.config = AppConfig()
+        self.config.rag.vector_local_path = os.path.join(self.tmp.name, "vectorstore")
+        self.document = os.path.join(self.tmp.name, "guideline.md")
+        with open(self.document, "w") as f:
+            f.write("version 1")
+        self.embed_patch = patch("rag_agent.vectorstore_qdrant.get_all_embeddings",
+                                 side_effect=lambda texts, **kwargs: fake_embeddings(texts))
+        self.embed_patch.start()
+
+    def tearDown(self):
+        self.embed_patch.stop()
+        self.close_store()
+        self.tmp.cleanup()
+
+    def close_store(self):
+        """Simulate a process restart: drop the shared client so the next store reopens the path."""
+        key = ("path", os.path.abspath(self.config.rag.vector_local_path))
+        client = vectorstore_qdrant._clients.pop(key, None)
+        if client is not None:
+            client.close()
+
+    def test_concurrent_ingestion_into_shared_local_store(self):
+        stores = [VectorStore(self.config) for _ in range(8)]
+        self.assertTrue(all(store.client is stores[0].client for store in stores))
+        stores[0].create_vectorstore(["seed chunk"], "seed.md")
+
+        def ingest(i):
+            stores[i].create_vectorstore([f"chunk {i} {j}" for j in range(20)], f"Query: {i}",
+                                         metadata={"session_id": f"s{i}"})
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            list(pool.map(ingest, range(8)))
+        self.assertEqual(stores[0].client.count(stores[0].collection_name).count, 1 + 8 * 20)
+
+    def test_reopened_store_detects_unchanged_and_edited_files(self):
+        store = VectorStore(self.config)
+        store.create_vectorstore(["old chunk"], self.document)
+        self.close_store()
+
+        store = VectorStore(self.config)
+        self.assertTrue(store.sync_source(self.document))
+        self.assertEqual(store.client.count(store.collection_name).count, 1)
+
+        with open(self.document, "w") as f:
+            f.write("version 2, edited")
+        self.assertFalse(store.sync_source(self.document))
+        self.assertFalse(store.has_source(self.document))  # stale chunks removed
+
+        store.create_vectorstore(["new chunk"], self.document)
+        self.close_store()
+        store = VectorStore(self.config)
+        self.assertTrue(store.sync_source(self.document))
+        self.assertEqual([d["content"] for d in store.retrieve_relevant_chunks("new chunk")], ["new chunk"])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,25 +1,144 @@
 class AppConfig:
     class RAGConfig:
+        class RetrievalPlan:
+            def __init__(self, mode="colbert", dense_limit=None, sparse_limit=None, limit=None, min_score=None):
+                # "colbert": dense + sparse prefetch reranked by ColBERT late interaction (most accurate);
+                # "rrf": dense + sparse prefetch fused by reciprocal rank, no ColBERT query encoding;
+                # "dense": dense vectors only, no prefetch (fastest)
+                self.mode = mode
+                # Candidates prefetched per stage; None uses 2 * top_k
+                self.dense_limit = dense_limit
+                self.sparse_limit = sparse_limit
+                self.limit = limit # Results returned; None uses top_k
+                # Drop results scoring below this; the scale depends on the mode (ColBERT MaxSim
+                # sum, RRF rank score, dense cosine). None keeps everything
+                self.min_score = min_score
+
         def __init__(self):
             self.collection_name = "medical_rag"
             # Dense embedding dimension for 'all-MiniLM-L6-v2'
             self.embedding_dim = 384
             self.top_k = 5 # Increased slightly for hybrid search
-            self.vector_local_path = ":memory:"
+            # Retrieval stages and limits; see benchmarks/bench_retrieval_plans.py for the
+            # recall/latency trade-off of each mode
+            self.retrieval_plan = self.RetrievalPlan()
+            # On-disk Qdrant storage; use ":memory:" for a throwaway per-process index
+            self.vector_local_path = "output/vectorstore"
+            # Qdrant server URL (e.g. "http://localhost:6333"); takes precedence over vector_local_path
+            # so several app workers can share one index
+            self.vector_url = None
             self.doc_local_path = "output/docstore"
             self.parsed_content_dir = "output/parsed_content"
             self.distance_metric = "cosine"
+            # docling parsing profile: "accurate" (TableFormer ACCURATE, OCR, formulas, 2x images,
+            # page images), "balanced" or "fast" (TableFormer FAST, OCR only for scanned PDFs,
+            # 1x images, no page images); see rag_agent.doc_parser.PARSING_PROFILES
+            self.parsing_profile = "accurate"
+            # Extracted figure/table/page images are encoded on a background thread pool.
+            # "png" stays lossless; a low zlib level keeps encoding cheap for slightly larger files.
+            # "webp"/"jpeg" (lossy, image_quality) write far less and are opt-in.
+            self.image_format = "png"
+            self.image_quality = 90
+            self.png_compress_level = 1 # 0-9, only for "png"
+            self.image_write_workers = 4
+            self.export_page_images = None # True/False overrides the parsing profile
+            # Image summarization: concurrent multimodal calls (within the LLM rate limits), images
+            # downscaled to image_summary_max_side px before upload, summaries cached by content hash
+            self.image_summary_workers = 8
+            self.image_summary_max_side = 1024
+            self.image_summary_cache_size = 2048
+            # Chunking: "llm" asks the LLM for split points; "semantic" (opt-in) splits on headings and
+            # merges adjacent sections by dense-embedding similarity within chunk_min_words..chunk_max_words
+            # with no LLM call, which is faster but produces different chunk boundaries
+            self.chunking_mode = "llm"
+            self.chunk_min_words = 256
+            self.chunk_max_words = 512
+            self.chunk_similarity_threshold = 0.5
+            # LLM chunking of documents over chunk_window_tokens (estimated) is done in windows sharing
+            # chunk_window_overlap sections, up to chunk_window_workers requests in flight (0 = one prompt)
+            self.chunk_window_tokens = 24000
+            self.chunk_window_overlap = 2
+            self.chunk_window_workers = 4
+            # ColBERT multivector storage: "float32" (full precision), "int8" (scalar
+            # quantization) or "binary" (binary quantization). The compact modes keep
+            # float16 originals on disk and only the quantized copy in RAM (server mode).
+            self.colbert_storage = "float32"
 
             # Model Names
             self.dense_model_name = "sentence-transformers/all-MiniLM-L6-v2"
             self.sparse_model_name = "Qdrant/bm25"
             self.late_interaction_model_name = "colbert-ir/colbertv2.0"
             self.fastembed_cache_dir = "fastembed_cache"
+            # Embedding models load lazily; list kinds ("dense", "sparse", "late_interaction")
+            # to load at startup, optionally on a background warm-up thread
+            self.embedding_preload = []
+            self.embedding_warmup_in_background = True
+
+            # Micro-batching of embedding requests from concurrent ingest callers
+            # (query embedding skips the batch window)
+            self.embedding_batching = True
+            self.embedding_batch_window_ms = 20
+            self.embedding_batch_max_texts = 256
+
+            # Content-hash embedding cache (0 disables); optional memory-mapped on-disk store.
+            # The in-memory LRU is also capped at embedding_cache_max_mb, since each entry holds a
+            # float32 ColBERT matrix (up to ~260 KB per chunk); the disk store has no cap
+            self.embedding_cache_size = 10000
+            self.embedding_cache_max_mb = 256
+            self.embedding_cache_dir = None # e.g. "output/embedding_cache"
+
+            # Concurrent ingest_directory pipeline: parsing in a process pool, async LLM
+            # summarization/chunking, batched embedding/upsert, joined by bounded queues
+            self.ingest_pipeline = True
+            self.ingest_parse_workers = 2
+            self.ingest_llm_concurrency = 4
+            self.ingest_queue_size = 4 # documents waiting between stages
+            self.ingest_embed_batch_chunks = 256
+            # Manifest of ingested files (size, mtime, hash, point ids) kept next to parsed_content_dir;
+            # ingest_directory skips unchanged files and replaces the points of changed/deleted ones.
+            # None re-ingests everything.
+            self.ingest_manifest_path = "output/ingest_manifest.json"
+
+            # Query expansion: "hybrid" expands from the local synonym dictionary and only calls
+            # the LLM for ambiguous queries (unknown/ambiguous abbreviations or at least
+            # query_expansion_llm_min_words words); "local" never calls the LLM, "llm" always does
+            self.query_expansion_mode = "hybrid"
+            self.query_expansion_llm_min_words = 15
+            self.synonym_dict_path = None # JSON {"synonyms": {...}, "ambiguous": {...}}; None uses the built-in dictionary
 
             self.include_sources = True
             self.reranker_model = "cross-encoder/ms-marco-MiniLM-L-6-v2"
             self.reranker_top_k = 3
             self.reranker_model = "pritamdeka/S-PubMedBert-MS-MARCO"
+            # Shared reranker service: pairs from concurrent queries are merged for up to
+            # reranker_batch_window_ms and scored length-sorted in batches of reranker_batch_size
+            self.reranker_batch_size = 32
+            self.reranker_batch_window_ms = 10
+            # Cross-encoder backend: "torch", "onnx" (ONNX Runtime) or "onnx-int8"
+            # (ONNX Runtime with dynamic int8 quantization, exported once to reranker_onnx_dir).
+            # The ONNX backends need `pip install sentence-transformers[onnx]`.
+            self.reranker_backend = "torch"
+            self.reranker_onnx_dir = "output/reranker_onnx"
+            self.reranker_onnx_quantization = "avx512_vnni" # or "avx2", "avx512", "arm64"
+
+    class LLMConfig:
+        def __init__(self):
+            # HTTP connection pool shared by every call_llm invocation
+            self.max_connections = 20
+            self.max_keepalive_connections = 10
+            self.keepalive_expiry = 60.0 # seconds an idle connection stays open
+            self.base_url = None # Override the Gemini endpoint (e.g. a local stub)
+
+            # call_llm_async budgets (None disables a budget)
+            self.max_concurrent_requests = 8
+            self.requests_per_minute = 60
+            self.tokens_per_minute = 250000
+
+            # On-disk response cache (identical prompts skip the LLM round trip)
+            self.cache_enabled = False
+            self.cache_path = "output/llm_cache.sqlite"
+            self.cache_ttl = 7 * 24 * 3600 # seconds, None keeps entries forever
+            self.cache_max_bytes = 256 * 1024 * 1024 # LRU eviction above this size
 
     class WebSearchConfig:
         def __init__(self):
@@ -27,4 +146,5 @@ class AppConfig:
 
     def __init__(self):
         self.rag = self.RAGConfig()
+        self.llm = self.LLMConfig()
         self.web_search = self.WebSearchConfig()
@@ -1,33 +1,345 @@
 from google import genai
+from google.genai import types
+import httpx
 import os
+import time
+import asyncio
+import threading
+from collections import deque
 from dotenv import load_dotenv
 import PIL.Image
+from utils.app_config import AppConfig
+from utils.llm_cache import LLMResponseCache
 
 load_dotenv()
 
-def call_llm(prompt, system_prompt=None, image_paths=None):
-    client = genai.Client(api_key=os.environ.get("GEMINI_API_KEY", "your-api-key"))
+config = AppConfig()
+
+class LLMClientPool:
+    """
+    Process-wide pool of genai clients keyed by (api_key, model), sharing keep-alive connections.
+    The async side (client.aio) is kept per running event loop: its httpx AsyncClient and
+    connections are bound to the loop that first used them, and each asyncio.run gets a new loop.
+    """
+
+    _instance = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super(LLMClientPool, cls).__new__(cls)
+            cls._instance.initialized = False
+        return cls._instance
+
+    def __init__(self):
+        if self.initialized:
+            return
+        self.clients = {}
+        self.async_clients = {}
+        self.lock = threading.Lock()
+        self.initialized = True
+
+    def _http_options(self):
+        """Build HTTP options with the configured keep-alive and connection limits."""
+        limits = httpx.Limits(
+            max_connections=config.llm.max_connections,
+            max_keepalive_connections=config.llm.max_keepalive_connections,
+            keepalive_expiry=config.llm.keepalive_expiry
+        )
+        return types.HttpOptions(
+            base_url=config.llm.base_url,
+            client_args={"limits": limits},
+            async_client_args={"limits": limits}
+        )
+
+    def get_client(self, api_key: str, model: str) -> genai.Client:
+        """Return the shared client for this key/model, creating it on first use."""
+        key = (api_key, model)
+        client = self.clients.get(key)
+        if client is None:
+            with self.lock:
+                client = self.clients.get(key)
+                if client is None:
+                    client = genai.Client(api_key=api_key, http_options=self._http_options())
+                    self.clients[key] = client
+        return client
+
+    def get_async_client(self, api_key: str, model: str):
+        """Return the async client (genai.Client.aio) for this key/model on the running event loop."""
+        loop = asyncio.get_running_loop()
+        key = (api_key, model, loop)
+        client = self.async_clients.get(key)
+        if client is None:
+            with self.lock:
+                client = self.async_clients.get(key)
+                if client is None:
+                    # Clients of finished loops cannot be reused (or awaited closed); drop them
+                    for old_key in [k for k in self.async_clients if k[2].is_closed()]:
+                        del self.async_clients[old_key]
+                    client = genai.Client(api_key=api_key, http_options=self._http_options())
+                    self.async_clients[key] = client
+        return client.aio
+
+    def close(self):
+        """Close every pooled client and release their connections."""
+        with self.lock:
+            for client in self.clients.values():
+                try:
+                    client.close()
+                except Exception as e:
+                    print(f"Error closing LLM client: {e}")
+            self.clients = {}
+            self.async_clients = {}
+
+# Global instance
+_pool = None
+
+def get_client_pool():
+    global _pool
+    if _pool is None:
+        _pool = LLMClientPool()
+    return _pool
+
+class RateLimiter:
+    """Sliding one-minute window over request and token budgets."""
+
+    def __init__(self, requests_per_minute=None, tokens_per_minute=None, window=60.0):
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.window = window
+        self.events = deque()  # [timestamp, tokens]
+        self.lock = threading.Lock()
+
+    def _prune(self, now):
+        while self.events and now - self.events[0][0] >= self.window:
+            self.events.popleft()
+
+    def _wait_time(self, tokens, now):
+        """Seconds until a request of `tokens` fits in the budget (0 if it fits now)."""
+        self._prune(now)
+        if not self.events:
+            return 0.0
+        if self.requests_per_minute and len(self.events) >= self.requests_per_minute:
+            return self.events[0][0] + self.window - now
+        if self.tokens_per_minute:
+            used = sum(event[1] for event in self.events)
+            if used + tokens > self.tokens_per_minute:
+                # Wait until enough of the oldest events leave the window
+                for timestamp, event_tokens in self.events:
+                    used -= event_tokens
+                    if used + tokens <= self.tokens_per_minute:
+                        return timestamp + self.window - now
+                return self.events[-1][0] + self.window - now
+        return 0.0
+
+    def _try_reserve(self, tokens):
+        """Reserve budget if it fits now. Returns (event, 0) or (None, seconds to wait)."""
+        with self.lock:
+            now = time.monotonic()
+            wait = self._wait_time(tokens, now)
+            if wait <= 0:
+                event = [now, tokens]
+                self.events.append(event)
+                return event, 0.0
+            return None, wait
+
+    async def acquire(self, tokens):
+        """Wait for budget and reserve it. Returns the reserved event for later correction."""
+        while True:
+            event, wait = self._try_reserve(tokens)
+            if event is not None:
+                return event
+            await asyncio.sleep(wait)
+
+    def acquire_blocking(self, tokens):
+        """Thread-blocking acquire, for worker threads that call the synchronous call_llm."""
+        while True:
+            event, wait = self._try_reserve(tokens)
+            if event is not None:
+                return event
+            time.sleep(wait)
+
+    def record(self, event, tokens):
+        """Replace a reservation's estimated token count with the actual usage."""
+        with self.lock:
+            event[1] = tokens
+
+_limiter = None
+_semaphores = {}
+
+def get_rate_limiter():
+    global _limiter
+    if _limiter is None:
+        _limiter = RateLimiter(config.llm.requests_per_minute, config.llm.tokens_per_minute)
+    return _limiter
+
+def _get_semaphore():
+    """Global in-flight limit. asyncio primitives are loop-bound, so keep one per running loop."""
+    loop = asyncio.get_running_loop()
+    semaphore = _semaphores.get(loop)
+    if semaphore is None:
+        for old_loop in [l for l in _semaphores if l.is_closed()]:
+            del _semaphores[old_loop]
+        semaphore = asyncio.Semaphore(config.llm.max_concurrent_requests or 1_000_000)
+        _semaphores[loop] = semaphore
+    return semaphore
+
+_cache = None
+
+def get_response_cache():
+    """Shared response cache, or None when caching is disabled in AppConfig.LLMConfig."""
+    global _cache
+    if not config.llm.cache_enabled:
+        return None
+    if _cache is None:
+        _cache = LLMResponseCache(
+            config.llm.cache_path,
+            ttl=config.llm.cache_ttl,
+            max_bytes=config.llm.cache_max_bytes
+        )
+    return _cache
+
+def _cache_key(prompt, system_prompt=None, image_paths=None):
     model = os.environ.get("GEMINI_MODEL", "gemini-2.5-flash-lite")
-    
+    return LLMResponseCache.make_key(model, system_prompt, prompt, image_paths)
+
+def estimate_tokens(prompt, system_prompt=None):
+    """Rough pre-call estimate (~4 characters per token) used to reserve the token budget."""
+    return (len(prompt) + len(system_prompt or "")) // 4 + 1
+
+def _build_request(prompt, system_prompt=None, image_paths=None, use_async=False):
+    """Client (the running loop's async client with use_async), model, contents and generation config."""
+    api_key = os.environ.get("GEMINI_API_KEY", "your-api-key")
+    model = os.environ.get("GEMINI_MODEL", "gemini-2.5-flash-lite")
+    pool = get_client_pool()
+    client = pool.get_async_client(api_key, model) if use_async else pool.get_client(api_key, model)
+
     # Gemini API uses system_instruction parameter for system prompts
-    config = {"system_instruction": system_prompt} if system_prompt else {}
+    generation_config = {"system_instruction": system_prompt} if system_prompt else {}
 
     contents = [prompt]
     if image_paths:
+        # Entries may be file paths or already-loaded PIL images
         for path in image_paths:
             try:
-                img = PIL.Image.open(path)
+                img = path if isinstance(path, PIL.Image.Image) else PIL.Image.open(path)
                 contents.append(img)
             except Exception as e:
                 print(f"Error loading image {path}: {e}")
 
+    return client, model, contents, generation_config
+
+def call_llm(prompt, system_prompt=None, image_paths=None):
+    cache = get_response_cache()
+    if cache:
+        key = _cache_key(prompt, system_prompt, image_paths)
+        cached = cache.get(key)
+        if cached is not None:
+            return cached
+
+    client, model, contents, generation_config = _build_request(prompt, system_prompt, image_paths)
+
     response = client.models.generate_content(
         model=model,
         contents=contents,
-        config=config
+        config=generation_config
     )
+    if cache:
+        cache.put(key, response.text)
+    return response.text
+
+async def call_llm_async(prompt, system_prompt=None, image_paths=None):
+    """
+    Awaitable call_llm on the SDK's async client.
+    Bounded by a global in-flight semaphore and per-minute request/token budgets.
+    """
+    cache = get_response_cache()
+    if cache:
+        key = _cache_key(prompt, system_prompt, image_paths)
+        cached = cache.get(key)
+        if cached is not None:
+            return cached
+
+    client, model, contents, generation_config = _build_request(prompt, system_prompt, image_paths, use_async=True)
+    limiter = get_rate_limiter()
+
+    async with _get_semaphore():
+        event = await limiter.acquire(estimate_tokens(prompt, system_prompt))
+        response = await client.models.generate_content(
+            model=model,
+            contents=contents,
+            config=generation_config
+        )
+
+    usage = getattr(response, "usage_metadata", None)
+    total_tokens = getattr(usage, "total_token_count", None)
+    if isinstance(total_tokens, int):
+        limiter.record(event, total_tokens)
+    if cache:
+        cache.put(key, response.text)
     return response.text
-    
+
+def call_llm_stream(prompt, system_prompt=None, image_paths=None):
+    """Streaming call_llm: yields text chunks as they arrive."""
+    cache = get_response_cache()
+    if cache:
+        key = _cache_key(prompt, system_prompt, image_paths)
+        cached = cache.get(key)
+        if cached is not None:
+            yield cached
+            return
+
+    client, model, contents, generation_config = _build_request(prompt, system_prompt, image_paths)
+
+    parts = []
+    for chunk in client.models.generate_content_stream(
+        model=model,
+        contents=contents,
+        config=generation_config
+    ):
+        if chunk.text:
+            parts.append(chunk.text)
+            yield chunk.text
+
+    if cache:
+        cache.put(key, "".join(parts))
+
+async def call_llm_stream_async(prompt, system_prompt=None, image_paths=None):
+    """
+    Async streaming call_llm: yields text chunks as they arrive.
+    Shares the in-flight semaphore and rate budgets with call_llm_async.
+    """
+    cache = get_response_cache()
+    if cache:
+        key = _cache_key(prompt, system_prompt, image_paths)
+        cached = cache.get(key)
+        if cached is not None:
+            yield cached
+            return
+
+    client, model, contents, generation_config = _build_request(prompt, system_prompt, image_paths, use_async=True)
+    limiter = get_rate_limiter()
+
+    parts = []
+    total_tokens = None
+    async with _get_semaphore():
+        event = await limiter.acquire(estimate_tokens(prompt, system_prompt))
+        stream = await client.models.generate_content_stream(
+            model=model,
+            contents=contents,
+            config=generation_config
+        )
+        async for chunk in stream:
+            usage = getattr(chunk, "usage_metadata", None)
+            total_tokens = getattr(usage, "total_token_count", None) or total_tokens
+            if chunk.text:
+                parts.append(chunk.text)
+                yield chunk.text
+
+    if isinstance(total_tokens, int):
+        limiter.record(event, total_tokens)
+    if cache:
+        cache.put(key, "".join(parts))
+
 if __name__ == "__main__":
     prompt = "What is the meaning of life?"
     print(call_llm(prompt))
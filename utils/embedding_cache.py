@@ -0,0 +1,175 @@
+import os
+import sys
+import json
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from fastembed import SparseEmbedding
+
+def content_hash(text: str) -> str:
+    """Stable identifier for a chunk's text."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+class DiskEmbeddingStore:
+    """
+    Append-only on-disk store for (dense, sparse, ColBERT) vectors, read back through np.memmap.
+    Vectors live in flat binary files; index.jsonl maps each content hash to its offsets.
+    """
+    FILES = {
+        "dense": np.float32,
+        "late": np.float32,
+        "sparse_indices": np.int64,
+        "sparse_values": np.float32,
+    }
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self.index: Dict[str, Dict[str, List[int]]] = {}
+        self.sizes = {name: self._file_len(name) for name in self.FILES}
+        self.maps: Dict[str, Optional[np.memmap]] = {name: None for name in self.FILES}
+        self.lock = threading.Lock()
+
+        index_path = os.path.join(directory, "index.jsonl")
+        if os.path.exists(index_path):
+            with open(index_path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue  # partially written last line
+                    self.index[entry.pop("hash")] = entry
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.directory, f"{name}.bin")
+
+    def _file_len(self, name: str) -> int:
+        path = self._path(name)
+        if not os.path.exists(path):
+            return 0
+        return os.path.getsize(path) // np.dtype(self.FILES[name]).itemsize
+
+    def _view(self, name: str, offset: int, length: int) -> np.ndarray:
+        mm = self.maps[name]
+        if mm is None or len(mm) < offset + length:
+            mm = np.memmap(self._path(name), dtype=self.FILES[name], mode="r")
+            self.maps[name] = mm
+        return np.array(mm[offset:offset + length])
+
+    def _append(self, name: str, array: np.ndarray) -> List[int]:
+        array = np.ascontiguousarray(array, dtype=self.FILES[name]).ravel()
+        with open(self._path(name), "ab") as f:
+            f.write(array.tobytes())
+        offset = self.sizes[name]
+        self.sizes[name] += len(array)
+        return [offset, len(array)]
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.index
+
+    def get(self, key: str) -> Optional[Tuple[List[float], SparseEmbedding, np.ndarray]]:
+        with self.lock:
+            entry = self.index.get(key)
+            if entry is None:
+                return None
+            dense = self._view("dense", *entry["dense"]).tolist()
+            late = self._view("late", *entry["late"]).reshape(-1, entry["late_dim"])
+            sparse = SparseEmbedding(
+                values=self._view("sparse_values", *entry["sparse_values"]),
+                indices=self._view("sparse_indices", *entry["sparse_indices"])
+            )
+            return dense, sparse, late
+
+    def put(self, key: str, dense: List[float], sparse: Any, late: np.ndarray) -> None:
+        with self.lock:
+            if key in self.index:
+                return
+            sp = sparse.as_object()
+            late = np.asarray(late)
+            entry = {
+                "dense": self._append("dense", np.asarray(dense)),
+                "late": self._append("late", late),
+                "late_dim": int(late.shape[-1]),
+                "sparse_indices": self._append("sparse_indices", sp["indices"]),
+                "sparse_values": self._append("sparse_values", sp["values"]),
+            }
+            with open(os.path.join(self.directory, "index.jsonl"), "a", encoding="utf-8") as f:
+                f.write(json.dumps({"hash": key, **entry}) + "\n")
+            self.index[key] = entry
+
+def _nbytes(vector: Any) -> int:
+    """Approximate memory held by one cached vector (numpy array, sparse embedding or list of floats)."""
+    if isinstance(vector, np.ndarray):
+        return vector.nbytes
+    if isinstance(vector, SparseEmbedding):
+        return vector.values.nbytes + vector.indices.nbytes
+    if isinstance(vector, list):
+        return sys.getsizeof(vector) + 24 * len(vector)  # boxed Python floats
+    return 0
+
+class EmbeddingCache:
+    """
+    Content-hash cache of (dense, sparse, ColBERT) embeddings.
+    In-memory LRU bounded by `max_entries` and by `max_bytes` (ColBERT matrices dominate, up to
+    ~260 KB per 512-token chunk), optionally backed by a DiskEmbeddingStore.
+    """
+    def __init__(self, max_entries: int = 10000, disk_dir: Optional[str] = None, max_bytes: Optional[int] = None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.entries: "OrderedDict[str, Tuple[Any, Any, Any]]" = OrderedDict()
+        self.sizes: Dict[str, int] = {}
+        self.bytes = 0
+        self.disk = DiskEmbeddingStore(disk_dir) if disk_dir else None
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Tuple[Any, Any, Any]]:
+        with self.lock:
+            value = self.entries.get(key)
+            if value is not None:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return value
+        if self.disk is not None:
+            value = self.disk.get(key)
+            if value is not None:
+                self._remember(key, value)
+                with self.lock:
+                    self.hits += 1
+                return value
+        with self.lock:
+            self.misses += 1
+        return None
+
+    def put(self, key: str, value: Tuple[Any, Any, Any]) -> None:
+        self._remember(key, value)
+        if self.disk is not None:
+            self.disk.put(key, *value)
+
+    def _remember(self, key: str, value: Tuple[Any, Any, Any]) -> None:
+        size = sum(_nbytes(vector) for vector in value)
+        with self.lock:
+            self.bytes += size - self.sizes.get(key, 0)
+            self.sizes[key] = size
+            self.entries[key] = value
+            self.entries.move_to_end(key)
+            while self.entries and (
+                    len(self.entries) > self.max_entries
+                    or (self.max_bytes is not None and self.bytes > self.max_bytes)):
+                evicted, _ = self.entries.popitem(last=False)
+                self.bytes -= self.sizes.pop(evicted)
+
+    def stats(self) -> Dict[str, float]:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": len(self.entries),
+            "bytes": self.bytes,
+            "disk_entries": len(self.disk.index) if self.disk is not None else 0
+        }
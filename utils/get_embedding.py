@@ -1,13 +1,20 @@
 from fastembed import TextEmbedding, LateInteractionTextEmbedding, SparseTextEmbedding
-from typing import List, Union, Any, Tuple
+from typing import List, Union, Any, Tuple, Callable, Optional
+from concurrent.futures import Future
 import os
+import time
+import queue
+import threading
 import numpy as np
 from utils.app_config import AppConfig
+from utils.embedding_cache import EmbeddingCache, content_hash
 
 config = AppConfig()
 
 class EmbeddingModels:
-    """Container for embedding models with lazy loading and cache support."""
+    """Container for embedding models; each model loads lazily and independently on first use."""
+
+    MODEL_KINDS = ("dense", "sparse", "late_interaction")
 
     _instance = None
 
@@ -20,37 +27,66 @@ class EmbeddingModels:
     def __init__(self):
         if self.initialized:
             return
-        self.dense_model = None
-        self.sparse_model = None
-        self.late_interaction_model = None
+        self._models = {kind: None for kind in self.MODEL_KINDS}
+        self._locks = {kind: threading.Lock() for kind in self.MODEL_KINDS}
         self.cache_dir = config.rag.fastembed_cache_dir
         os.makedirs(self.cache_dir, exist_ok=True)
-        self.load()
         self.initialized = True
 
-    def load(self):
-        """Load all embedding models from cache directory."""
-        print(f"Loading embedding models from cache: {self.cache_dir}")
+    def _create(self, kind: str):
+        if kind == "dense":
+            print(f"  - Loading dense model: {config.rag.dense_model_name}")
+            return TextEmbedding(config.rag.dense_model_name, cache_dir=self.cache_dir)
+        if kind == "sparse":
+            print(f"  - Loading sparse model: {config.rag.sparse_model_name}")
+            return SparseTextEmbedding(config.rag.sparse_model_name, cache_dir=self.cache_dir)
+        if kind == "late_interaction":
+            print(f"  - Loading late interaction model: {config.rag.late_interaction_model_name}")
+            return LateInteractionTextEmbedding(config.rag.late_interaction_model_name, cache_dir=self.cache_dir)
+        raise ValueError(f"Unknown embedding model kind: {kind}")
+
+    def get(self, kind: str):
+        """Return the model of this kind, loading it on first use."""
+        model = self._models[kind]
+        if model is None:
+            with self._locks[kind]:
+                model = self._models[kind]
+                if model is None:
+                    model = self._create(kind)
+                    self._models[kind] = model
+        return model
+
+    def is_loaded(self, kind: str) -> bool:
+        return self._models[kind] is not None
+
+    @property
+    def dense_model(self):
+        return self.get("dense")
+
+    @property
+    def sparse_model(self):
+        return self.get("sparse")
 
-        print(f"  - Dense model: {config.rag.dense_model_name}")
-        self.dense_model = TextEmbedding(
-            config.rag.dense_model_name,
-            cache_dir=self.cache_dir
-        )
+    @property
+    def late_interaction_model(self):
+        return self.get("late_interaction")
 
-        print(f"  - Sparse model: {config.rag.sparse_model_name}")
-        self.sparse_model = SparseTextEmbedding(
-            config.rag.sparse_model_name,
-            cache_dir=self.cache_dir
-        )
+    def load(self, kinds: Optional[List[str]] = None):
+        """Eagerly load the given models (all by default) from the cache directory."""
+        for kind in kinds or self.MODEL_KINDS:
+            self.get(kind)
 
-        print(f"  - Late interaction model: {config.rag.late_interaction_model_name}")
-        self.late_interaction_model = LateInteractionTextEmbedding(
-            config.rag.late_interaction_model_name,
-            cache_dir=self.cache_dir
-        )
+    def warm_up(self, kinds: Optional[List[str]] = None) -> threading.Thread:
+        """Load models on a background thread so the first request doesn't pay for it."""
+        def _load():
+            try:
+                self.load(kinds)
+            except Exception as e:
+                print(f"Embedding model warm-up failed: {e}")
 
-        print("All models loaded from cache successfully.\n")
+        thread = threading.Thread(target=_load, name="embedding-warmup", daemon=True)
+        thread.start()
+        return thread
 
 # Global instance
 _models = None
@@ -61,6 +97,17 @@ def get_models():
         _models = EmbeddingModels()
     return _models
 
+def preload_models(kinds: Optional[List[str]] = None, background: bool = False):
+    """
+    Load only the models a deployment needs, e.g. preload_models(["dense"]).
+    With background=True the models load on a warm-up thread, which is returned.
+    """
+    models = get_models()
+    if background:
+        return models.warm_up(kinds)
+    models.load(kinds)
+    return None
+
 def get_embedding(content: Union[str, List[str]]) -> Union[List[float], List[List[float]]]:
     """
     Get dense embedding for backward compatibility.
@@ -77,11 +124,14 @@ def get_embedding(content: Union[str, List[str]]) -> Union[List[float], List[Lis
 
     return embeddings[0] if is_single else embeddings
 
-def get_all_embeddings(content: List[str]) -> Tuple[List[Any], List[Any], List[Any]]:
+def get_sparse_embedding(content: List[str]) -> List[Any]:
     """
-    Get all three types of embeddings for a list of strings.
-    Returns: (dense_embeddings, sparse_embeddings, late_interaction_embeddings)
+    Get BM25 sparse embeddings (SparseEmbedding objects) without running the other models.
     """
+    return list(get_models().sparse_model.embed(content))
+
+def _compute_all_embeddings(content: List[str]) -> Tuple[List[Any], List[Any], List[Any]]:
+    """Run the dense, sparse and ColBERT models once over `content`."""
     models = get_models()
 
     dense = list(models.dense_model.embed(content))
@@ -94,3 +144,145 @@ def get_all_embeddings(content: List[str]) -> Tuple[List[Any], List[Any], List[A
     # Late embeddings are numpy arrays (tokens, 128)
 
     return dense, sparse, late
+
+class EmbeddingBatcher:
+    """
+    Micro-batching embedding service.
+    Requests from concurrent callers are gathered for up to `window_ms` (or until
+    `max_texts` texts are queued), embedded in a single pass per model, and the
+    results are split back to each caller.
+    """
+
+    def __init__(self, embed_fn: Callable[[List[str]], Tuple[List[Any], List[Any], List[Any]]],
+                 window_ms: float = 20, max_texts: int = 256):
+        self.embed_fn = embed_fn
+        self.window = window_ms / 1000.0
+        self.max_texts = max_texts
+        self.requests = queue.Queue()
+        self.batches = 0
+        self.texts = 0
+        self.worker = threading.Thread(target=self._run, name="embedding-batcher", daemon=True)
+        self.worker.start()
+
+    def submit(self, content: List[str]) -> Future:
+        """Queue texts for embedding. The future resolves to (dense, sparse, late) for these texts."""
+        future = Future()
+        if not content:
+            future.set_result(([], [], []))
+            return future
+        self.requests.put((list(content), future))
+        return future
+
+    def embed(self, content: List[str]) -> Tuple[List[Any], List[Any], List[Any]]:
+        return self.submit(content).result()
+
+    def _collect(self) -> List[Tuple[List[str], Future]]:
+        """Block for the first request, then gather more until the window closes or the batch is full."""
+        batch = [self.requests.get()]
+        total = len(batch[0][0])
+        deadline = time.monotonic() + self.window
+        while total < self.max_texts:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                request = self.requests.get(timeout=remaining)
+            except queue.Empty:
+                break
+            batch.append(request)
+            total += len(request[0])
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            combined = [text for texts, _ in batch for text in texts]
+            try:
+                dense, sparse, late = self.embed_fn(combined)
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+
+            self.batches += 1
+            self.texts += len(combined)
+            offset = 0
+            for texts, future in batch:
+                end = offset + len(texts)
+                future.set_result((dense[offset:end], sparse[offset:end], late[offset:end]))
+                offset = end
+
+_batcher = None
+_batcher_lock = threading.Lock()
+
+def get_embedding_batcher() -> EmbeddingBatcher:
+    global _batcher
+    if _batcher is None:
+        with _batcher_lock:
+            if _batcher is None:
+                _batcher = EmbeddingBatcher(
+                    _compute_all_embeddings,
+                    window_ms=config.rag.embedding_batch_window_ms,
+                    max_texts=config.rag.embedding_batch_max_texts
+                )
+    return _batcher
+
+_cache = None
+_cache_lock = threading.Lock()
+
+def get_embedding_cache():
+    """Shared content-hash embedding cache, or None when disabled."""
+    global _cache
+    if not config.rag.embedding_cache_size:
+        return None
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = EmbeddingCache(
+                    max_entries=config.rag.embedding_cache_size,
+                    disk_dir=config.rag.embedding_cache_dir,
+                    max_bytes=int(config.rag.embedding_cache_max_mb * 1024 * 1024)
+                )
+    return _cache
+
+def _embed_uncached(content: List[str], batching: bool = True) -> Tuple[List[Any], List[Any], List[Any]]:
+    if batching and config.rag.embedding_batching:
+        return get_embedding_batcher().embed(content)
+    return _compute_all_embeddings(content)
+
+def get_all_embeddings(content: List[str], batching: bool = True) -> Tuple[List[Any], List[Any], List[Any]]:
+    """
+    Get all three types of embeddings for a list of strings.
+    Each unique text is embedded once: repeats are served from the content-hash cache,
+    and concurrent callers share one model pass per batch window when batching is enabled.
+    Pass batching=False on latency-sensitive paths (queries) so a lone call never waits
+    for the batch window.
+    Returns: (dense_embeddings, sparse_embeddings, late_interaction_embeddings)
+    """
+    cache = get_embedding_cache()
+    if cache is None:
+        return _embed_uncached(content, batching)
+
+    keys = [content_hash(text) for text in content]
+    found = {}
+    pending = {}
+    for key, text in zip(keys, content):
+        if key in found or key in pending:
+            continue
+        value = cache.get(key)
+        if value is not None:
+            found[key] = value
+        else:
+            pending[key] = text
+
+    if pending:
+        dense, sparse, late = _embed_uncached(list(pending.values()), batching)
+        for key, d, s, l in zip(pending, dense, sparse, late):
+            found[key] = (d, s, l)
+            cache.put(key, (d, s, l))
+
+    return (
+        [found[key][0] for key in keys],
+        [found[key][1] for key in keys],
+        [found[key][2] for key in keys]
+    )